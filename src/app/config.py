@@ -11,6 +11,42 @@ class AppConfig:
     anthropic_api_key: str
     github_repo: str | None
     github_token: str | None
+    # 0 keeps handlers inline on Bolt's listener threads; >0 runs them on a bounded worker pool
+    pipeline_workers: int
+    pipeline_queue_size: int
+    # 0 disables micro-batching; otherwise messages in one channel within this window share an LLM call
+    classify_batch_window_ms: int
+    classify_batch_max: int
+    # off | shadow (log what the local pre-filter would skip) | on (skip low-scoring messages)
+    prefilter_mode: str
+    prefilter_pass_threshold: float
+    # Shared Anthropic client: SDK retries, request/connect timeouts and connection pool size
+    anthropic_max_retries: int
+    anthropic_timeout_seconds: float
+    anthropic_connect_timeout_seconds: float
+    anthropic_pool_size: int
+    # Stream @mention answers into a placeholder reply, edited at most once per interval
+    stream_mentions: bool
+    stream_update_interval_seconds: float
+    # 0 writes + fsyncs each messages.txt line inline; >0 batches appends on a background thread
+    journal_group_commit_ms: int
+    # Important messages included in @mention answers: token budget, recency window, score half-life
+    respond_context_token_budget: int
+    respond_context_window_days: float
+    respond_context_half_life_days: float
+    # BM25 matches that lead the @mention context regardless of age
+    retrieval_top_k: int
+    # Approved updates within this window share one commit on the project branch
+    git_commit_coalesce_seconds: float
+    # Background job workers (compaction drafts, dashboard deploys)
+    job_workers: int
+    # Estimated ground truth tokens before compaction is proposed; incremental | full rewrite
+    ground_truth_token_budget: int
+    compaction_mode: str
+    # Unanswered proposals (updates, nudges, compaction drafts) expire after this many days
+    pending_approval_ttl_days: float
+    # Most queued events.db writes committed in one transaction
+    db_write_batch_max: int
 
 
 def load_config() -> AppConfig:
@@ -36,4 +72,27 @@ def load_config() -> AppConfig:
         anthropic_api_key=anthropic_api_key or "",
         github_repo=os.environ.get("GITHUB_REPO"),
         github_token=os.environ.get("GITHUB_TOKEN"),
+        pipeline_workers=int(os.environ.get("PIPELINE_WORKERS", "0")),
+        pipeline_queue_size=int(os.environ.get("PIPELINE_QUEUE_SIZE", "1000")),
+        classify_batch_window_ms=int(os.environ.get("CLASSIFY_BATCH_WINDOW_MS", "0")),
+        classify_batch_max=int(os.environ.get("CLASSIFY_BATCH_MAX", "10")),
+        prefilter_mode=os.environ.get("PREFILTER_MODE", "off"),
+        prefilter_pass_threshold=float(os.environ.get("PREFILTER_PASS_THRESHOLD", "0.2")),
+        anthropic_max_retries=int(os.environ.get("ANTHROPIC_MAX_RETRIES", "4")),
+        anthropic_timeout_seconds=float(os.environ.get("ANTHROPIC_TIMEOUT_SECONDS", "60")),
+        anthropic_connect_timeout_seconds=float(os.environ.get("ANTHROPIC_CONNECT_TIMEOUT_SECONDS", "5")),
+        anthropic_pool_size=int(os.environ.get("ANTHROPIC_POOL_SIZE", "20")),
+        stream_mentions=os.environ.get("STREAM_MENTIONS", "0") == "1",
+        stream_update_interval_seconds=float(os.environ.get("STREAM_UPDATE_INTERVAL_SECONDS", "1.0")),
+        journal_group_commit_ms=int(os.environ.get("JOURNAL_GROUP_COMMIT_MS", "0")),
+        respond_context_token_budget=int(os.environ.get("RESPOND_CONTEXT_TOKEN_BUDGET", "1500")),
+        respond_context_window_days=float(os.environ.get("RESPOND_CONTEXT_WINDOW_DAYS", "30")),
+        respond_context_half_life_days=float(os.environ.get("RESPOND_CONTEXT_HALF_LIFE_DAYS", "7")),
+        retrieval_top_k=int(os.environ.get("RETRIEVAL_TOP_K", "8")),
+        git_commit_coalesce_seconds=float(os.environ.get("GIT_COMMIT_COALESCE_SECONDS", "2.0")),
+        job_workers=int(os.environ.get("JOB_WORKERS", "2")),
+        ground_truth_token_budget=int(os.environ.get("GROUND_TRUTH_TOKEN_BUDGET", "1500")),
+        compaction_mode=os.environ.get("COMPACTION_MODE", "incremental"),
+        pending_approval_ttl_days=float(os.environ.get("PENDING_APPROVAL_TTL_DAYS", "7")),
+        db_write_batch_max=int(os.environ.get("DB_WRITE_BATCH_MAX", "256")),
     )
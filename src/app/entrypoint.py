@@ -1,3 +1,4 @@
+import atexit
 import logging
 
 from dotenv import load_dotenv
@@ -7,19 +8,66 @@ from slack_bolt import App
 
 from slack_bolt.adapter.socket_mode import SocketModeHandler
 
-from src.handlers.slack_events import _agents, register_handlers
+from src.handlers.slack_events import _agents, configure_streaming, register_handlers
+from src.services.classify_batcher import ClassifyBatcher
+from src.services.event_pipeline import EventPipeline
+from src.services.job_runner import JobRunner
+from src.services.git_committer import configure as configure_commits
+from src.services.git_committer import flush_commits
+from src.services.llm_service import configure_client
+from src.services.prefilter import configure as configure_prefilter
+from src.services.project_service import configure_compaction, configure_respond_context, configure_retrieval
+from src.services.prompt_registry import validate_prompts
+from src.stores.db import configure as configure_db
+from src.stores.journal import close_journals
+from src.stores.journal import configure as configure_journals
+from src.stores.pending import configure as configure_pending
+from src.utils.channels import warm_up
+from src.utils.users import warm_up_users
 
 
 def main() -> None:
     logging.basicConfig(level=logging.INFO, format="%(name)s | %(message)s")
+    log = logging.getLogger(__name__)
     load_dotenv()
     config = load_config()
+    configure_prefilter(config.prefilter_mode, config.prefilter_pass_threshold)
+    configure_client(
+        config.anthropic_max_retries,
+        config.anthropic_timeout_seconds,
+        config.anthropic_connect_timeout_seconds,
+        config.anthropic_pool_size,
+    )
+    configure_streaming(config.stream_mentions, config.stream_update_interval_seconds)
+    configure_journals(config.journal_group_commit_ms)
+    configure_respond_context(
+        config.respond_context_token_budget,
+        config.respond_context_window_days,
+        config.respond_context_half_life_days,
+    )
+    configure_retrieval(config.retrieval_top_k)
+    configure_compaction(config.ground_truth_token_budget, config.compaction_mode)
+    configure_pending(config.pending_approval_ttl_days)
+    configure_db(config.db_write_batch_max)
+    configure_commits(config.git_commit_coalesce_seconds)
+    # Fail fast on a broken prompt template instead of on the first message that needs it
+    validate_prompts()
+    # Group-committed journal lines still in memory are written out on a clean exit
+    atexit.register(close_journals)
+    atexit.register(flush_commits)
     app = create_app(config)
-    register_handlers(app)
+    pipeline = create_pipeline(config)
+    register_handlers(app, pipeline, create_batcher(config), JobRunner(config.job_workers))
+    # One paginated conversations_list up front so message handlers never resolve names over the network
+    warm_up(app.client)
+    try:
+        warm_up_users(app.client)
+    except Exception as e:
+        # Not fatal — `@bot initialize` falls back to per-user lookups
+        log.warning("User directory warm-up failed: %s", e)
 
     # GitHub PR monitor is optional — only starts if both env vars are set.
     # Lazy import avoids pulling in urllib/threading when not needed.
-    log = logging.getLogger(__name__)
     github_repo = config.github_repo
     github_token = config.github_token
     if github_repo and github_token:
@@ -39,6 +87,21 @@ def create_app(config) -> App:
     return App(token=config.slack_bot_token)
 
 
+def create_pipeline(config) -> EventPipeline | None:
+    # Off by default — handlers run inline unless PIPELINE_WORKERS is set
+    if config.pipeline_workers <= 0:
+        return None
+    pipeline = EventPipeline(config.pipeline_workers, config.pipeline_queue_size)
+    pipeline.start()
+    return pipeline
+
+
+def create_batcher(config) -> ClassifyBatcher | None:
+    if config.classify_batch_window_ms <= 0:
+        return None
+    return ClassifyBatcher(config.classify_batch_window_ms / 1000, config.classify_batch_max)
+
+
 def start_socket_mode(app: App, config) -> None:
     # SLACK_APP_TOKEN (xapp-...) opens the WebSocket connection — no public URL needed
     handler = SocketModeHandler(app, config.slack_app_token)
@@ -1,24 +1,66 @@
 import logging
 import re
-from pathlib import Path
+import threading
+import time
+from urllib.parse import quote
 
 from slack_bolt import App
 
+from src.services.classify_batcher import ClassifyBatcher
+from src.services.event_pipeline import EventPipeline
+from src.services.job_runner import JobRunner
+
 log = logging.getLogger(__name__)
 
+from src.models.ground_truth import DECISION_LOG_HEADING, GroundTruth
 from src.services.project_service import ProjectAgent
 from src.services.dashboard_service import deploy
 from src.services.people_service import build_person_summary
+from src.services.prompt_registry import render_prompt
 from src.constants import APPROVE_REACTIONS, APPROVE_WORDS, REJECT_REACTIONS, REJECT_WORDS
 from src.stores.db import log_event, update_reaction
-from src.utils.history import fetch_context
+from src.stores.pending import PendingStore
+from src.utils.channels import handle_channel_rename, resolve_channel_name
+from src.utils.history import get_context, record_message
+from src.utils.metrics import incr, snapshot, timed
+from src.utils.users import channel_member_ids, get_users, handle_user_change
 
 # One ProjectAgent per channel — lazy-loaded on first message, cached for the session
 _agents: dict[str, ProjectAgent] = {}
-# Keyed by Slack message timestamp — tracks proposed ground truth changes awaiting Y/N
-_pending_updates: dict[str, dict] = {}
-# Keyed by Slack message timestamp — tracks nudges (MISALIGN/QUESTION) awaiting feedback
-_pending_nudges: dict[str, dict] = {}
+# Keyed by Slack message timestamp and persisted per project, so restarts keep them:
+# proposed ground truth changes awaiting Y/N
+_pending_updates = PendingStore("update")
+# nudges (MISALIGN/QUESTION) awaiting feedback
+_pending_nudges = PendingStore("nudge")
+# compacted ground truth drafts awaiting approval
+_pending_compactions = PendingStore("compaction")
+# Set by register_handlers when micro-batching is enabled; None classifies each message inline
+_batcher: ClassifyBatcher | None = None
+
+# Stream @mention answers into a placeholder message instead of posting once complete.
+# chat.update is Tier 3 (~50/min per workspace), so edits are throttled per answer.
+# Off until configure_streaming applies AppConfig.
+STREAM_MENTIONS = False
+STREAM_UPDATE_INTERVAL_SECONDS = 1.0
+
+# A draft is thrown away if the ground truth changes while it's being written; give up after this many redrafts
+COMPACTION_MAX_ATTEMPTS = 3
+# Compaction is a multi-second LLM rewrite, so it runs as a background job — one per project at a time.
+# register_handlers swaps in the runner main() sizes from AppConfig.
+_jobs = JobRunner()
+
+# Dashboard deploys publish one shared site, so they run as a single coalescing job:
+# requests that arrive while a deploy is running are all served by one follow-up deploy.
+DEPLOY_JOB_KEY = "dashboard-deploy"
+_deploy_requests: list[dict] = []
+_deploy_lock = threading.Lock()
+
+
+def configure_streaming(enabled: bool, update_interval_seconds: float) -> None:
+    """Turn @mention streaming on or off (from AppConfig, once the environment is loaded)."""
+    global STREAM_MENTIONS, STREAM_UPDATE_INTERVAL_SECONDS
+    STREAM_MENTIONS = enabled
+    STREAM_UPDATE_INTERVAL_SECONDS = update_interval_seconds
 
 
 def _get_agent(channel_name: str) -> ProjectAgent:
@@ -28,31 +70,17 @@ def _get_agent(channel_name: str) -> ProjectAgent:
 
 
 def _resolve_channel_name(client, channel_id: str) -> str:
-    try:
-        response = client.conversations_info(channel=channel_id)
-        return response["channel"]["name"]
-    except Exception:
-        return channel_id
+    return resolve_channel_name(client, channel_id)
 
 
 def _fetch_channel_members(client, channel_id: str) -> list[dict]:
     """Fetch all non-bot members in a channel with their profile info."""
-    members_response = client.conversations_members(channel=channel_id)
-    member_ids = members_response.get("members", [])
-
-    members = []
-    for user_id in member_ids:
-        info = client.users_info(user=user_id)
-        user = info.get("user", {})
-        if user.get("is_bot") or user.get("id") == "USLACKBOT":
-            continue
-        members.append({
-            "id": user.get("id", ""),
-            "name": user.get("name", ""),
-            "real_name": user.get("real_name", ""),
-            "title": user.get("profile", {}).get("title", ""),
-        })
-    return members
+    member_ids = channel_member_ids(client, channel_id)
+    return [
+        {"id": user["id"], "name": user["name"], "real_name": user["real_name"], "title": user["title"]}
+        for user in get_users(client, member_ids)
+        if not user["is_bot"] and not user["deleted"]
+    ]
 
 
 def _strip_mention(text: str) -> str:
@@ -94,16 +122,117 @@ def _format_diff(current: str, addition: str) -> str:
     return "\n".join(parts)
 
 
+def _format_metrics(metrics: dict) -> str:
+    """Format a metrics snapshot for Slack."""
+    lines = [":bar_chart: *Bot metrics*"]
+    if metrics["gauges"]:
+        lines.append("\n*Gauges*")
+        lines.extend(f"- {name}: {value}" for name, value in sorted(metrics["gauges"].items()))
+    if metrics["latencies"]:
+        lines.append("\n*Latency*")
+        for stage, stats in sorted(metrics["latencies"].items()):
+            lines.append(f"- {stage}: n={stats['count']} avg={stats['avg_ms']}ms max={stats['max_ms']}ms")
+    if metrics["counters"]:
+        lines.append("\n*Counters*")
+        lines.extend(f"- {name}: {value}" for name, value in sorted(metrics["counters"].items()))
+    if len(lines) == 1:
+        lines.append("(nothing recorded yet)")
+    return "\n".join(lines)
+
+
+def _schedule_compaction(agent: ProjectAgent, channel_id: str, thread_ts: str, client) -> None:
+    """Start a background compaction for the project unless one is already running."""
+    _jobs.submit(
+        f"compaction:{agent.name}", "compaction",
+        lambda: _propose_compaction(agent, channel_id, thread_ts, client),
+    )
+
+
+def _request_deploy(channel_name: str, channel_id: str, thread_ts: str | None, client) -> None:
+    """Post a status message in the thread and queue a dashboard deploy for the project."""
+    if _jobs.in_flight(DEPLOY_JOB_KEY):
+        text = ":hourglass_flowing_sand: A dashboard deploy is in progress, yours will run right after it..."
+    else:
+        text = ":chart_with_upwards_trend: Deploying dashboard..."
+    status = client.chat_postMessage(channel=channel_id, thread_ts=thread_ts, text=text)
+    with _deploy_lock:
+        _deploy_requests.append({
+            "channel_name": channel_name,
+            "channel_id": channel_id,
+            "thread_ts": thread_ts,
+            "status_ts": status["ts"],
+        })
+    _jobs.submit(DEPLOY_JOB_KEY, "deploy", lambda: _run_deploy(client), coalesce=True)
+
+
+def _run_deploy(client) -> None:
+    """Export every requested project, publish once, and report back in each request's thread."""
+    with _deploy_lock:
+        requests = list(_deploy_requests)
+        _deploy_requests.clear()
+    if not requests:
+        return
+
+    def progress(text: str) -> None:
+        for request in requests:
+            try:
+                client.chat_update(channel=request["channel_id"], ts=request["status_ts"], text=f":gear: {text}")
+            except Exception as e:
+                log.warning("Deploy status update failed: %s", e)
+
+    def reply(request: dict, text: str) -> None:
+        # One thread failing to post must not keep the rest from hearing back
+        try:
+            client.chat_postMessage(channel=request["channel_id"], thread_ts=request["thread_ts"], text=text)
+        except Exception as e:
+            log.warning("Deploy reply failed: %s", e)
+
+    try:
+        url = deploy([request["channel_name"] for request in requests], progress=progress)
+    except Exception as e:
+        log.error("Dashboard deploy failed: %s", e)
+        progress("Deploy failed")
+        for request in requests:
+            reply(request, f":x: Dashboard deploy failed: {e}")
+        return
+    progress("Deploy finished")
+    for request in requests:
+        link = f"{url}?project={quote(request['channel_name'])}"
+        reply(request, f":white_check_mark: Dashboard deployed: {link}")
+
+
 def _propose_compaction(agent: ProjectAgent, channel_id: str, thread_ts: str, client) -> None:
-    """If ground truth needs compaction, run it and post the result for approval."""
-    compacted = agent.compact()
-    log.info("[%s] Ground truth compacted (%d words)", agent.name, len(compacted.split()))
-    client.chat_postMessage(
+    """Draft a compacted ground truth and post it for approval without saving it."""
+    for _ in range(COMPACTION_MAX_ATTEMPTS):
+        if not agent.check_compaction():
+            return
+        base_version, compacted = agent.draft_compaction()
+        if base_version == agent.ground_truth_version:
+            break
+        incr("jobs.compaction.cancelled")
+        log.info("[%s] Ground truth changed during compaction, redrafting", agent.name)
+    else:
+        return
+    log.info("[%s] Ground truth compaction drafted (%d words)", agent.name, len(compacted.split()))
+    # Incremental compaction only changes the Decision Log, so that's the part worth showing
+    document = GroundTruth.parse(compacted.strip())
+    section = document.section(DECISION_LOG_HEADING)
+    preview = "\n".join(document.lines[section.start:section.end]).strip() if section else compacted
+    response = client.chat_postMessage(
         channel=channel_id,
-        text=f":compression: *Ground truth was getting long — here's a compacted version:*\n\n```{compacted[:1500]}```\n\n"
+        text=f":compression: *Ground truth was getting long — here's a compacted version:*\n\n```{preview[:1500]}```\n\n"
              "React :white_check_mark: to accept or :x: to keep the original.",
         thread_ts=thread_ts,
     )
+    # Only the newest draft per project can still apply
+    for ts in [ts for ts, pending in _pending_compactions.items() if pending["channel_name"] == agent.name]:
+        del _pending_compactions[ts]
+    _pending_compactions[response["ts"]] = {
+        "channel_name": agent.name,
+        "thread_ts": thread_ts,
+        "compacted": compacted,
+        "base_version": base_version,
+    }
 
 
 def _accept_update(pending: dict, channel_id: str, user: str, client) -> None:
@@ -118,7 +247,7 @@ def _accept_update(pending: dict, channel_id: str, user: str, client) -> None:
     )
     log.info("[%s] UPDATE accepted by %s", pending["channel_name"], user)
     if needs_compaction:
-        _propose_compaction(agent, channel_id, pending["thread_ts"], client)
+        _schedule_compaction(agent, channel_id, pending["thread_ts"], client)
 
 
 def _reject_update(pending: dict, channel_id: str, user: str, client) -> None:
@@ -131,6 +260,26 @@ def _reject_update(pending: dict, channel_id: str, user: str, client) -> None:
     log.info("[%s] UPDATE rejected by %s", pending["channel_name"], user)
 
 
+def _accept_compaction(pending: dict, channel_id: str, user: str, client) -> None:
+    agent = _get_agent(pending["channel_name"])
+    if agent.apply_compaction(pending["compacted"], pending["base_version"]):
+        text = ":white_check_mark: Compacted ground truth saved."
+        log.info("[%s] Compaction accepted by %s", pending["channel_name"], user)
+    else:
+        text = ":warning: The ground truth changed since this draft was written — kept the current version."
+        log.info("[%s] Stale compaction discarded", pending["channel_name"])
+    client.chat_postMessage(channel=channel_id, text=text, thread_ts=pending["thread_ts"])
+
+
+def _reject_compaction(pending: dict, channel_id: str, user: str, client) -> None:
+    client.chat_postMessage(
+        channel=channel_id,
+        text=":ok_hand: Kept the original ground truth.",
+        thread_ts=pending["thread_ts"],
+    )
+    log.info("[%s] Compaction rejected by %s", pending["channel_name"], user)
+
+
 def _accept_nudge(pending: dict, channel_id: str, client) -> None:
     if "event_id" in pending:
         update_reaction(pending["channel_name"], pending["event_id"], "approved", "")
@@ -158,10 +307,29 @@ def _reject_nudge(pending: dict, channel_id: str, client) -> None:
 # Messages = passive classification of every channel message (the core alignment loop)
 # Reactions = emoji-based approval/rejection for pending updates and nudges
 
-def register_handlers(app: App) -> None:
-    app.event("app_mention")(handle_app_mention)
-    app.event("message")(handle_message)
-    app.event("reaction_added")(handle_reaction)
+def register_handlers(
+    app: App,
+    pipeline: EventPipeline | None = None,
+    batcher: ClassifyBatcher | None = None,
+    jobs: JobRunner | None = None,
+) -> None:
+    global _batcher, _jobs
+    _batcher = batcher
+    if jobs is not None:
+        _jobs.shutdown(wait=False)
+        _jobs = jobs
+    # With a pipeline, listeners only enqueue — classification and posting happen on its workers
+    if pipeline:
+        app.event("app_mention")(pipeline.wrap("app_mention", handle_app_mention))
+        app.event("message")(pipeline.wrap("message", handle_message))
+        app.event("reaction_added")(pipeline.wrap("reaction_added", handle_reaction))
+    else:
+        app.event("app_mention")(handle_app_mention)
+        app.event("message")(handle_message)
+        app.event("reaction_added")(handle_reaction)
+    app.event("channel_rename")(handle_channel_rename)
+    app.event("user_change")(handle_user_change)
+    app.event("team_join")(handle_user_change)
 
 
 def handle_app_mention(event: dict, client, say) -> None:
@@ -187,13 +355,7 @@ def handle_app_mention(event: dict, client, say) -> None:
         return
 
     if user_message.lower().startswith("dashboard"):
-        say(":chart_with_upwards_trend: Deploying dashboard...", thread_ts=thread_ts)
-        try:
-            url = deploy(channel_name)
-            say(f":white_check_mark: Dashboard deployed: {url}", thread_ts=thread_ts)
-        except Exception as e:
-            log.error("Dashboard deploy failed: %s", e)
-            say(f":x: Dashboard deploy failed: {e}", thread_ts=thread_ts)
+        _request_deploy(channel_name, channel_id, thread_ts, client)
         return
 
     if user_message.lower().strip() == "plan":
@@ -201,6 +363,10 @@ def handle_app_mention(event: dict, client, say) -> None:
         say(f":clipboard: *Current ground truth:*\n\n```{agent.ground_truth}```", thread_ts=thread_ts)
         return
 
+    if user_message.lower().strip() == "metrics":
+        say(_format_metrics(snapshot()), thread_ts=thread_ts)
+        return
+
     if user_message.lower().strip() == "me":
         log.info("[%s] Person lookup: %s looking up themselves", channel_name, user_id)
         summary = build_person_summary(user_id, _pending_updates, _pending_nudges)
@@ -220,11 +386,39 @@ def handle_app_mention(event: dict, client, say) -> None:
         return
 
     agent = _get_agent(channel_name)
-    history = fetch_context(client, channel_id)
+    history = get_context(client, channel_id)
+    if STREAM_MENTIONS:
+        _stream_reply(agent.respond_stream(user_message, history), channel_id, thread_ts, client, say)
+        return
     response = agent.respond(user_message, history)
     say(response, thread_ts=thread_ts)
 
 
+def _stream_reply(chunks, channel_id: str, thread_ts: str | None, client, say) -> None:
+    """Post a placeholder in the thread and progressively edit it as text streams in."""
+    placeholder = say(":hourglass_flowing_sand: Thinking...", thread_ts=thread_ts)
+    ts = placeholder["ts"]
+    text = ""
+    last_update = time.monotonic()
+    try:
+        for chunk in chunks:
+            text += chunk
+            now = time.monotonic()
+            if now - last_update >= STREAM_UPDATE_INTERVAL_SECONDS and text.strip():
+                client.chat_update(channel=channel_id, ts=ts, text=text)
+                last_update = now
+    except Exception as e:
+        log.error("Streaming response failed: %s", e)
+        if text.strip():
+            # Make it obvious the partial text is not the whole answer
+            client.chat_update(channel=channel_id, ts=ts, text=f"{text.strip()}\n\n:warning: _Answer interrupted._")
+        else:
+            client.chat_update(channel=channel_id, ts=ts, text=":x: Sorry, I couldn't answer that.")
+        return
+    # Final edit is the stripped full text, identical to the non-streaming answer
+    client.chat_update(channel=channel_id, ts=ts, text=text.strip())
+
+
 def _check_text_approval(event: dict, client, say) -> bool:
     """Check if message is a text approval/rejection for a pending update or nudge.
 
@@ -238,26 +432,41 @@ def _check_text_approval(event: dict, client, say) -> bool:
     channel_id = event.get("channel", "")
     user = event.get("user", "")
 
-    if thread_ts in _pending_updates:
-        pending = _pending_updates.pop(thread_ts)
+    # Look up without popping — most thread replies aren't approvals and shouldn't rewrite the store
+    pending = _pending_updates.get(thread_ts)
+    if pending is not None:
         if word in APPROVE_WORDS:
+            del _pending_updates[thread_ts]
             _accept_update(pending, channel_id, user, client)
             return True
         if word in REJECT_WORDS:
+            del _pending_updates[thread_ts]
             _reject_update(pending, channel_id, user, client)
             return True
-        _pending_updates[thread_ts] = pending
         return False
 
-    if thread_ts in _pending_nudges:
-        pending = _pending_nudges.pop(thread_ts)
+    pending = _pending_compactions.get(thread_ts)
+    if pending is not None:
         if word in APPROVE_WORDS:
+            del _pending_compactions[thread_ts]
+            _accept_compaction(pending, channel_id, user, client)
+            return True
+        if word in REJECT_WORDS:
+            del _pending_compactions[thread_ts]
+            _reject_compaction(pending, channel_id, user, client)
+            return True
+        return False
+
+    pending = _pending_nudges.get(thread_ts)
+    if pending is not None:
+        if word in APPROVE_WORDS:
+            del _pending_nudges[thread_ts]
             _accept_nudge(pending, channel_id, client)
             return True
         if word in REJECT_WORDS:
+            del _pending_nudges[thread_ts]
             _reject_nudge(pending, channel_id, client)
             return True
-        _pending_nudges[thread_ts] = pending
         return False
 
     return False
@@ -268,6 +477,9 @@ def handle_message(event: dict, client, say) -> None:
     if event.get("bot_id") or event.get("subtype"):
         return
 
+    # Feed the local history buffer first so this message is part of its own context
+    record_message(event)
+
     # Check if this is a text-based Y/N reply to a pending update before classifying
     if _check_text_approval(event, client, say):
         return
@@ -281,8 +493,25 @@ def handle_message(event: dict, client, say) -> None:
     thread_ts = event.get("ts", "")
 
     log.info("[%s] @%s: %s", channel_name, user, user_message)
-    history = fetch_context(client, channel_id)
-    raw_result = agent.classify(user, user_message, history)
+    with timed("message.context"):
+        history = get_context(client, channel_id)
+
+    if _batcher:
+        # Results come back on the batcher's thread, in arrival order for this channel
+        _batcher.submit(
+            agent, channel_id, user, user_message, history,
+            lambda raw_result: _act_on_classification(agent, channel_id, user, thread_ts, raw_result, say),
+        )
+        return
+
+    with timed("message.classify"):
+        raw_result = agent.classify(user, user_message, history)
+    _act_on_classification(agent, channel_id, user, thread_ts, raw_result, say)
+
+
+def _act_on_classification(agent: ProjectAgent, channel_id: str, user: str, thread_ts: str, raw_result: str, say) -> None:
+    """Post, log and track whatever the classifier decided for one message."""
+    channel_name = agent.name
     result, category = _parse_category(raw_result)
     log.info("[%s] -> %s (category=%s)", channel_name, result, category)
 
@@ -321,7 +550,7 @@ def handle_message(event: dict, client, say) -> None:
 
     elif result.startswith("MISALIGN:"):
         misalign_text = _action_content(result, "MISALIGN")
-        warning = Path("prompts/misalign.md").read_text().format(misalign_content=misalign_text)
+        warning = render_prompt("misalign.md", misalign_content=misalign_text)
         response = say(warning, thread_ts=thread_ts)
         agent.log_message(user, permalink, category, misalign_text)
         event_id = log_event(channel_name, "MISALIGN", user, category, misalign_text, permalink)
@@ -335,7 +564,7 @@ def handle_message(event: dict, client, say) -> None:
 
     elif result.startswith("QUESTION:"):
         question_text = _action_content(result, "QUESTION")
-        nudge = Path("prompts/nudge.md").read_text().format(nudge_content=question_text)
+        nudge = render_prompt("nudge.md", nudge_content=question_text)
         response = say(nudge, thread_ts=thread_ts)
         agent.log_message(user, permalink, category, question_text)
         event_id = log_event(channel_name, "QUESTION", user, category, question_text, permalink)
@@ -365,6 +594,14 @@ def handle_reaction(event: dict, client, say) -> None:
         _handle_nudge_reaction(msg_ts, reaction, channel_id, client)
         return
 
+    if msg_ts in _pending_compactions:
+        user = event.get("user", "")
+        if reaction in APPROVE_REACTIONS:
+            _accept_compaction(_pending_compactions.pop(msg_ts), channel_id, user, client)
+        elif reaction in REJECT_REACTIONS:
+            _reject_compaction(_pending_compactions.pop(msg_ts), channel_id, user, client)
+        return
+
     if msg_ts not in _pending_updates:
         log.info("Reaction on message %s — not a pending update or nudge, ignoring", msg_ts)
         return
@@ -378,10 +615,9 @@ def handle_reaction(event: dict, client, say) -> None:
 
         # Validate directory user IDs against channel membership
         try:
-            members_resp = client.conversations_members(channel=channel_id)
-            channel_member_ids = members_resp.get("members", [])
+            member_ids = channel_member_ids(client, channel_id)
             agent = _get_agent(pending["channel_name"])
-            missing = agent.validate_directory(channel_member_ids)
+            missing = agent.validate_directory(member_ids)
             if missing:
                 mentions = ", ".join(f"<@{uid}>" for uid in missing)
                 log.warning("[%s] Directory lists users not in channel: %s", pending["channel_name"], mentions)
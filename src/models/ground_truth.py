@@ -0,0 +1,171 @@
+"""Parsed, indexed view of a ground truth document.
+
+The document is kept as its original lines so `render()` round-trips byte for
+byte; sections, Directory entries and Decision Log entries are indexes into
+those lines. Edits return a new document with only the touched lines changed.
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+DIRECTORY_HEADING = "Directory"
+DECISION_LOG_HEADING = "AI Decision Log"
+
+_SLACK_ID = re.compile(r"<@(U[A-Z0-9]+)>")
+_NAME = re.compile(r"\*\*(.+?)\*\*")
+_GITHUB = re.compile(r"github:\s*(\S+)", re.IGNORECASE)
+_ROLE_BEFORE_GITHUB = re.compile(r"—\s*(.+?)(?:\s*github:)", re.IGNORECASE)
+_DECISION_DATE = re.compile(r"^\*\s+\*\*(\d{4}-\d{2}-\d{2}):\*\*\s*(.*)$")
+
+
+@dataclass(frozen=True)
+class Section:
+    title: str | None  # None for anything before the first `## ` heading
+    start: int  # index of the heading line (or 0 for the preamble)
+    end: int  # exclusive
+
+
+@dataclass(frozen=True)
+class DirectoryEntry:
+    line_index: int
+    slack_id: str
+    name: str
+    role: str  # everything after the em dash, "" when no role is set
+    github: str  # lowercased, "" when not linked
+    line: str = field(default="", repr=False, compare=False)
+
+    @property
+    def role_summary(self) -> str:
+        """Role text without the trailing `github: handle` tag."""
+        match = _ROLE_BEFORE_GITHUB.search(self.line) if self.github else None
+        if match:
+            return match.group(1).strip().rstrip(".")
+        return self.role.rstrip(".") if self.role else "Unknown"
+
+
+@dataclass(frozen=True)
+class DecisionEntry:
+    line_index: int
+    date: str  # YYYY-MM-DD, "" for entries without a date (e.g. compacted summaries)
+    text: str
+    line: str = field(default="", repr=False, compare=False)
+
+
+class GroundTruth:
+    def __init__(self, text: str) -> None:
+        self.lines: tuple[str, ...] = tuple(text.split("\n"))
+        self.sections = _parse_sections(self.lines)
+        self.directory: dict[str, DirectoryEntry] = {}
+        self.by_github: dict[str, DirectoryEntry] = {}
+        self.decisions: list[DecisionEntry] = []
+        self._index()
+
+    @classmethod
+    def parse(cls, text: str) -> "GroundTruth":
+        """Parse with memoization — the same version is only ever parsed once."""
+        return _parse_cached(text)
+
+    def render(self) -> str:
+        return "\n".join(self.lines)
+
+    def section(self, title_prefix: str) -> Section | None:
+        for section in self.sections:
+            if section.title and section.title.lower().startswith(title_prefix.lower()):
+                return section
+        return None
+
+    def role_of(self, slack_id: str) -> str:
+        entry = self.directory.get(slack_id)
+        return entry.role if entry and entry.role else "(no role set)"
+
+    def with_role(self, slack_id: str, role: str) -> "GroundTruth | None":
+        """Return a copy with the user's Directory role replaced, or None if they aren't listed."""
+        entry = self.directory.get(slack_id)
+        if entry is None:
+            return None
+        marker = f"(<@{slack_id}>)"
+        prefix = entry.line.split(marker)[0] + marker if marker in entry.line else entry.line.split("—")[0].rstrip()
+        return self._replace_lines(entry.line_index, entry.line_index + 1, [f"{prefix} — {role}"])
+
+    def with_decision(self, entry_line: str, placeholder: str) -> "GroundTruth":
+        """Return a copy with a Decision Log entry replacing the placeholder, or appended at the end."""
+        placeholder = placeholder.rstrip("\n")
+        for i, line in enumerate(self.lines):
+            if line == placeholder:
+                return self._replace_lines(i, i + 1, [entry_line])
+        end = len(self.lines)
+        while end > 0 and not self.lines[end - 1].strip():
+            end -= 1
+        return self._replace_lines(end, len(self.lines), [entry_line])
+
+    def with_rolled_up_decisions(self, count: int, summary_lines: list[str]) -> "GroundTruth":
+        """Return a copy with the oldest `count` Decision Log entries replaced by summary lines.
+
+        Everything outside that span — including newer entries — is left byte-identical.
+        """
+        oldest = self.decisions[:count]
+        if not oldest:
+            return self
+        return self._replace_lines(oldest[0].line_index, oldest[-1].line_index + 1, summary_lines)
+
+    def _replace_lines(self, start: int, end: int, new_lines: list[str]) -> "GroundTruth":
+        return GroundTruth.parse("\n".join(self.lines[:start] + tuple(new_lines) + self.lines[end:]))
+
+    def _index(self) -> None:
+        directory = self.section(DIRECTORY_HEADING)
+        # Free-form documents without a Directory heading are treated as all-directory
+        start, end = (directory.start, directory.end) if directory else (0, len(self.lines))
+        for i in range(start, end):
+            line = self.lines[i]
+            slack_match = _SLACK_ID.search(line)
+            gh_match = _GITHUB.search(line)
+            if not slack_match and not gh_match:
+                continue
+            name_match = _NAME.search(line)
+            parts = line.split("—", 1)
+            github = gh_match.group(1).lower() if gh_match else ""
+            entry = DirectoryEntry(
+                line_index=i,
+                slack_id=slack_match.group(1) if slack_match else "",
+                name=name_match.group(1) if name_match else github,
+                role=parts[1].strip() if len(parts) > 1 else "",
+                github=github,
+                line=line,
+            )
+            if entry.slack_id and entry.slack_id not in self.directory:
+                self.directory[entry.slack_id] = entry
+            if github:
+                self.by_github[github] = entry
+
+        log_section = self.section(DECISION_LOG_HEADING)
+        if log_section:
+            for i in range(log_section.start + 1, log_section.end):
+                line = self.lines[i]
+                if not line.startswith("* "):
+                    continue
+                date_match = _DECISION_DATE.match(line)
+                self.decisions.append(DecisionEntry(
+                    line_index=i,
+                    date=date_match.group(1) if date_match else "",
+                    text=date_match.group(2) if date_match else line[2:].strip(),
+                    line=line,
+                ))
+
+
+def _parse_sections(lines: tuple[str, ...]) -> list[Section]:
+    sections: list[Section] = []
+    title: str | None = None
+    start = 0
+    for i, line in enumerate(lines):
+        if line.startswith("## "):
+            if i > start or title is not None:
+                sections.append(Section(title, start, i))
+            title, start = line[3:].strip(), i
+    sections.append(Section(title, start, len(lines)))
+    return sections
+
+
+@lru_cache(maxsize=64)
+def _parse_cached(text: str) -> GroundTruth:
+    return GroundTruth(text)
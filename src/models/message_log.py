@@ -0,0 +1,138 @@
+"""Indexed view of messages.txt for assembling bounded respond context.
+
+Entries are parsed once and appended incrementally; an inverted keyword index
+and the chronological order let `select()` score only recent entries plus
+entries sharing a keyword with the question, instead of re-reading the log.
+"""
+
+import bisect
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from src.utils.tokens import estimate_tokens
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+# Decisions and pivots answer most "what did we agree" questions; unknown categories score 1.0
+CATEGORY_WEIGHTS = {
+    "decision": 1.5,
+    "pivot": 1.5,
+    "blocker": 1.3,
+    "escalation": 1.2,
+    "milestone": 1.0,
+    "general": 0.8,
+}
+# Keyword overlap counts for more than recency — an old decision that names the
+# thing being asked about beats yesterday's unrelated blocker.
+OVERLAP_WEIGHT = 2.0
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9_\-]+")
+_STOPWORDS = frozenset(
+    "the and for are but not you your our was were has have had with this that what when where who why how "
+    "its it's from they them their will would can could should about into over just than then there these "
+    "those does did doing been being any all some out off per via".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [word for word in _WORD.findall(text.lower()) if word not in _STOPWORDS]
+
+
+def keywords(text: str) -> set[str]:
+    return set(tokenize(text))
+
+
+@dataclass(frozen=True)
+class MessageEntry:
+    timestamp: str  # YYYY-MM-DD HH:MM, as written by log_message
+    user: str
+    permalink: str
+    category: str
+    summary: str
+    line: str = field(repr=False, compare=False)
+    keywords: frozenset[str] = field(default=frozenset(), repr=False, compare=False)
+
+    @classmethod
+    def parse(cls, line: str) -> "MessageEntry | None":
+        if line.startswith("#") or not line.strip():
+            return None
+        parts = line.split(" | ", 4)
+        if len(parts) < 5:
+            return None
+        timestamp, user, permalink, category, summary = (part.strip() for part in parts)
+        return cls(timestamp, user, permalink, category, summary, line.strip(), frozenset(keywords(summary)))
+
+
+class MessageLog:
+    def __init__(self) -> None:
+        self.entries: list[MessageEntry] = []
+        self._timestamps: list[str] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+
+    @classmethod
+    def parse(cls, text: str) -> "MessageLog":
+        log = cls()
+        for line in text.splitlines():
+            log.append(line)
+        return log
+
+    def append(self, line: str) -> MessageEntry | None:
+        entry = MessageEntry.parse(line)
+        if entry is None:
+            return None
+        index = len(self.entries)
+        self.entries.append(entry)
+        self._timestamps.append(entry.timestamp)
+        for word in entry.keywords:
+            self._postings[word].append(index)
+        return entry
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def select(
+        self,
+        question: str,
+        budget_tokens: int,
+        window_days: float,
+        half_life_days: float,
+        now: datetime | None = None,
+    ) -> list[MessageEntry]:
+        """Pick the best entries that fit the token budget, returned oldest first.
+
+        Candidates are entries from the last `window_days` plus any entry sharing a
+        keyword with the question. Score = category weight × (recency decay + keyword overlap).
+        """
+        now = now or datetime.now()
+        query = keywords(question)
+        cutoff_stamp = (now - timedelta(days=window_days)).strftime(TIMESTAMP_FORMAT)
+        candidates = set(range(bisect.bisect_left(self._timestamps, cutoff_stamp), len(self.entries)))
+        for word in query:
+            candidates.update(self._postings.get(word, ()))
+
+        scored = []
+        for index in candidates:
+            entry = self.entries[index]
+            overlap = len(query & entry.keywords) / len(query) if query else 0.0
+            recency = 0.5 ** (_age_days(entry.timestamp, now) / half_life_days)
+            weight = CATEGORY_WEIGHTS.get(entry.category.lower(), 1.0)
+            scored.append((weight * (recency + OVERLAP_WEIGHT * overlap), index))
+
+        chosen: list[int] = []
+        used = 0
+        for _, index in sorted(scored, reverse=True):
+            cost = estimate_tokens(self.entries[index].line)
+            if used + cost > budget_tokens:
+                continue
+            chosen.append(index)
+            used += cost
+        return [self.entries[i] for i in sorted(chosen)]
+
+
+def _age_days(timestamp: str, now: datetime) -> float:
+    try:
+        then = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    except ValueError:
+        return float("inf")
+    return max((now - then).total_seconds() / 86400, 0.0)
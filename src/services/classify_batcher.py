@@ -0,0 +1,99 @@
+"""Per-channel micro-batching of classification calls.
+
+Messages arriving in the same channel within a short window are classified in
+one LLM request. Results are handed back through callbacks in arrival order.
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from src.services.project_service import ProjectAgent
+from src.utils.metrics import incr, timed
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class _Pending:
+    user: str
+    message: str
+    history: str
+    callback: Callable[[str], None]
+
+
+class ClassifyBatcher:
+    def __init__(self, window_seconds: float, max_batch: int = 10) -> None:
+        self.window_seconds = window_seconds
+        self.max_batch = max(1, max_batch)
+        self._lock = threading.Lock()
+        self._pending: dict[str, list[_Pending]] = {}
+        self._agents: dict[str, ProjectAgent] = {}
+        self._timers: dict[str, threading.Timer] = {}
+        # Held while a channel's batch is being classified so two flushes never reorder results
+        self._flush_locks: dict[str, threading.Lock] = {}
+
+    def submit(
+        self,
+        agent: ProjectAgent,
+        channel_id: str,
+        user: str,
+        message: str,
+        history: str,
+        callback: Callable[[str], None],
+    ) -> None:
+        """Queue a message for classification. `callback` receives the raw classify result."""
+        with self._lock:
+            batch = self._pending.setdefault(channel_id, [])
+            batch.append(_Pending(user, message, history, callback))
+            self._agents[channel_id] = agent
+            self._flush_locks.setdefault(channel_id, threading.Lock())
+            if len(batch) >= self.max_batch:
+                timer = self._timers.pop(channel_id, None)
+                if timer:
+                    timer.cancel()
+                flush_now = True
+            else:
+                flush_now = False
+                if channel_id not in self._timers:
+                    timer = threading.Timer(self.window_seconds, self.flush, args=(channel_id,))
+                    timer.daemon = True
+                    self._timers[channel_id] = timer
+                    timer.start()
+        if flush_now:
+            self.flush(channel_id)
+
+    def flush(self, channel_id: str) -> None:
+        """Classify everything queued for a channel and dispatch the results."""
+        with self._lock:
+            flush_lock = self._flush_locks.get(channel_id)
+        if flush_lock is None:
+            return
+        with flush_lock:
+            with self._lock:
+                self._timers.pop(channel_id, None)
+                batch = self._pending.pop(channel_id, [])
+                agent = self._agents.get(channel_id)
+            if not batch or agent is None:
+                return
+            results = self._classify(agent, batch)
+            for item, result in zip(batch, results):
+                try:
+                    item.callback(result)
+                except Exception:
+                    log.exception("[%s] Error handling classification result", agent.name)
+
+    def _classify(self, agent: ProjectAgent, batch: list[_Pending]) -> list[str]:
+        with timed("message.classify"):
+            try:
+                if len(batch) == 1:
+                    item = batch[0]
+                    return [agent.classify(item.user, item.message, item.history)]
+                incr("classify.batches")
+                incr("classify.batched_messages", len(batch))
+                # The oldest message's history precedes everything else in the batch
+                return agent.classify_batch([(b.user, b.message) for b in batch], batch[0].history)
+            except Exception:
+                log.exception("[%s] Batch classification failed — treating %d messages as PASS", agent.name, len(batch))
+                return ["PASS"] * len(batch)
@@ -1,27 +1,87 @@
-"""Export bot data to JSON for the static dashboard."""
+"""Export bot data to JSON for the static dashboard.
 
+Each project is exported into its own directory, dashboard/data/projects/<name>/, and
+dashboard/data/index.json lists every exported project for the page's project selector.
+
+Exports are incremental. A project's manifest.json records how far the last run got (messages.txt
+byte offset and a fingerprint of the bytes before it, last event id, last reaction sequence) and lists the data shards: one
+compact JSON array per kind per month, oldest record first. A run reads only what's
+new, rewrites only the shards it touched, and writes the manifest last, so the page
+never sees a shard the manifest doesn't describe. The page loads the manifest, then
+fetches shards newest month first as they're needed.
+"""
+
+import gzip
+import hashlib
 import json
 import logging
+import os
 import re
+import shutil
 import subprocess
 import sys
+import threading
 from collections import defaultdict
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import Protocol, TypedDict
 
 log = logging.getLogger(__name__)
 
-from src.stores.db import get_events
+from src.stores.db import EventQuery, get_rollups, iter_events
+from src.stores.journal import atomic_write, flush_journal
+from src.utils.metrics import timed
 
 PROJECTS_DIR = Path("projects")
-DASHBOARD_DIR = Path("dashboard/data")
+DASHBOARD_SITE_DIR = Path("dashboard")
+DASHBOARD_DIR = DASHBOARD_SITE_DIR / "data"
+
+CLOUDFLARE_PAGES_PROJECT = "humanand-dashboard"
+INDEX_FILENAME = "index.json"
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 2
+# messages.txt bytes just before the export offset that must be unchanged to resume from it
+FINGERPRINT_BYTES = 4096
+SHARD_KINDS = ("timeline", "changes", "misalignments")
+# Event-backed shard kinds and the event types that go in them
+EVENT_SHARDS = {"changes": ("UPDATE",), "misalignments": ("MISALIGN", "QUESTION")}
+
+
+class Cursors(TypedDict):
+    messages_offset: int
+    messages_fingerprint: str
+    last_event_id: int
+    last_reaction_seq: int
+
+
+class Shard(TypedDict):
+    file: str
+    count: int
+
+
+class Manifest(TypedDict):
+    version: int
+    project: str
+    gzip: bool
+    cursors: Cursors
+    shards: dict[str, dict[str, Shard]]  # kind -> month -> shard
+    stats: dict[str, dict]
+    exported_at: str
 
 
 def parse_messages_txt(path: Path) -> list[dict]:
     """Parse a messages.txt file into structured entries."""
-    entries = []
     if not path.exists():
-        return entries
-    for line in path.read_text().splitlines():
+        return []
+    return parse_message_lines(path.read_text().splitlines())
+
+
+def parse_message_lines(lines: Iterable[str]) -> list[dict]:
+    """Parse messages.txt lines into structured entries, skipping headers and blanks."""
+    entries = []
+    for line in lines:
         if line.startswith("#") or not line.strip():
             continue
         parts = line.split(" | ", 4)
@@ -40,103 +100,344 @@ def parse_messages_txt(path: Path) -> list[dict]:
     return entries
 
 
-def build_stats(events: list[dict]) -> dict:
-    """Build per-project stats from SQLite events."""
+def build_stats(rollups: list[dict]) -> dict:
+    """Build per-project stats from the events.db daily rollups (see get_rollups)."""
     by_type: dict[str, int] = defaultdict(int)
     by_category: dict[str, int] = defaultdict(int)
     by_day: dict[str, int] = defaultdict(int)
+    total_events = 0
     total_with_reaction = 0
     total_approved = 0
 
-    for event in events:
-        by_type[event["event_type"]] += 1
-        by_category[event["category"]] += 1
-        day = event["timestamp"][:10]
-        by_day[day] += 1
-        if event.get("reaction"):
-            total_with_reaction += 1
-            if event["reaction"] == "approved":
-                total_approved += 1
+    for row in rollups:
+        count = row["count"]
+        by_type[row["event_type"]] += count
+        by_category[row["category"]] += count
+        by_day[row["day"]] += count
+        total_events += count
+        if row["reaction"]:
+            total_with_reaction += count
+            if row["reaction"] == "approved":
+                total_approved += count
 
     return {
         "by_type": dict(by_type),
         "by_category": dict(by_category),
         "by_day": dict(sorted(by_day.items())),
-        "total_events": len(events),
+        "total_events": total_events,
         "total_with_reaction": total_with_reaction,
         "total_approved": total_approved,
         "acceptance_rate": round(total_approved / total_with_reaction * 100) if total_with_reaction else 0,
     }
 
 
-def export(project_name: str):
-    """Export a single project's data to dashboard/data/ as JSON."""
-    DASHBOARD_DIR.mkdir(parents=True, exist_ok=True)
+# Serializes read-modify-write of index.json between concurrent exports
+_index_lock = threading.Lock()
+
+
+def export(project_name: str, full: bool = False) -> Manifest:
+    """Export a project's new data and add it to the project index. Returns the manifest."""
+    manifest = _export_project(project_name, full)
+    _update_index([manifest])
+    return manifest
+
+
+def export_all(full: bool = False, workers: int | None = None) -> list[Manifest]:
+    """Export every project under projects/ in parallel, then write the project index once.
+
+    `workers` defaults to DASHBOARD_EXPORT_WORKERS (8); the work is SQLite reads and file I/O.
+    A project that fails to export is logged and left out; the others still go through.
+    Returns the manifests of the projects that were exported.
+    """
+    names = sorted(path.name for path in PROJECTS_DIR.iterdir() if path.is_dir()) if PROJECTS_DIR.exists() else []
+    if workers is None:
+        workers = int(os.environ.get("DASHBOARD_EXPORT_WORKERS", "8"))
+    manifests: list[Manifest] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="dashboard-export") as pool:
+        futures = {name: pool.submit(_export_project, name, full) for name in names}
+        for name, future in futures.items():
+            try:
+                manifests.append(future.result())
+            except Exception as e:
+                log.error("Dashboard export failed for %s: %s", name, e)
+    _update_index(manifests)
+    log.info("Exported %d of %d projects to %s", len(manifests), len(names), DASHBOARD_DIR)
+    return manifests
 
+
+def _export_project(project_name: str, full: bool) -> Manifest:
+    """Export a project's new data to dashboard/data/projects/<name>/ and return the manifest.
+
+    Continues from the previous export unless `full` is set or that export can't be
+    continued from (another format or gzip setting, or a rewritten messages.txt),
+    in which case the project's shards are rebuilt from scratch.
+    """
+    out_dir = _output_dir(project_name)
+    out_dir.mkdir(parents=True, exist_ok=True)
     project_dir = PROJECTS_DIR / project_name
+    messages_path = project_dir / "messages.txt"
+
+    manifest = None if full else _load_manifest(out_dir, project_name, messages_path)
+    if manifest is None:
+        manifest = Manifest(
+            version=MANIFEST_VERSION,
+            project=project_name,
+            gzip=_gzip_shards(),
+            cursors=Cursors(messages_offset=0, messages_fingerprint="", last_event_id=0, last_reaction_seq=0),
+            shards={kind: {} for kind in SHARD_KINDS},
+            stats={},
+            exported_at="",
+        )
+        for kind in SHARD_KINDS:
+            shutil.rmtree(out_dir / kind, ignore_errors=True)
+    cursors = manifest["cursors"]
+
+    added: dict[str, list[dict]] = {kind: [] for kind in SHARD_KINDS}
+    updated: dict[str, list[dict]] = {kind: [] for kind in SHARD_KINDS}
+
+    added["timeline"], cursors["messages_offset"] = _read_new_messages(messages_path, cursors["messages_offset"])
+    cursors["messages_fingerprint"] = _fingerprint(messages_path, cursors["messages_offset"]) or ""
 
-    timeline = parse_messages_txt(project_dir / "messages.txt")
-    for msg in timeline:
-        msg["project"] = project_name
-
-    changes = []
-    misalignments = []
-    stats = {}
-
-    db_path = project_dir / "events.db"
-    if db_path.exists():
-        events = get_events(project_name, limit=500)
-        for event in events:
-            event["project"] = project_name
-            if event["event_type"] == "UPDATE":
-                changes.append(event)
-            elif event["event_type"] in ("MISALIGN", "QUESTION"):
-                misalignments.append(event)
-        stats[project_name] = build_stats(events)
-
-    timeline.sort(key=lambda x: x["timestamp"])
-
-    _write_json("meta.json", {"project": project_name})
-    _write_json("timeline.json", timeline)
-    _write_json("changes.json", changes)
-    _write_json("misalignments.json", misalignments)
-    _write_json("stats.json", stats)
-
-    print(f"Exported {len(timeline)} timeline entries, {len(changes)} changes, {len(misalignments)} misalignments")
-    print(f"Project: {project_name}")
-    print(f"Output: {DASHBOARD_DIR}/")
-
-
-def _write_json(filename: str, data: list | dict) -> None:
-    path = DASHBOARD_DIR / filename
-    path.write_text(json.dumps(data, indent=2))
-
-
-def deploy(project_name: str) -> str:
-    """Export data and deploy to Cloudflare Pages. Returns the deployment URL."""
-    export(project_name)
-    result = subprocess.run(
-        ["npx", "wrangler", "pages", "deploy", "./dashboard",
-         "--project-name", "humanand-dashboard", "--commit-dirty=true"],
-        capture_output=True, text=True,
+    stats: dict[str, dict] = {}
+    if (project_dir / "events.db").exists():
+        last_event_id, last_reaction_seq = cursors["last_event_id"], cursors["last_reaction_seq"]
+        for kind, event_types in EVENT_SHARDS.items():
+            fresh = iter_events(project_name, EventQuery(event_types=event_types, after_id=last_event_id))
+            added[kind] = list(fresh)[::-1]  # oldest first, like the shards
+            reacted = iter_events(project_name, EventQuery(event_types=event_types, reaction_seq_after=last_reaction_seq))
+            updated[kind] = [event for event in reacted if event["id"] <= last_event_id]
+            for event in added[kind] + updated[kind]:
+                cursors["last_event_id"] = max(cursors["last_event_id"], event["id"])
+                cursors["last_reaction_seq"] = max(cursors["last_reaction_seq"], event["reaction_seq"] or 0)
+        stats[project_name] = build_stats(get_rollups(project_name))
+
+    for kind in SHARD_KINDS:
+        for record in added[kind] + updated[kind]:
+            record["project"] = project_name
+        _update_shards(out_dir, manifest, kind, added[kind], updated[kind])
+
+    manifest["stats"] = stats
+    manifest["exported_at"] = datetime.now().isoformat(timespec="seconds")
+    atomic_write(out_dir / MANIFEST_FILENAME, json.dumps(manifest, separators=(",", ":")))
+
+    log.info(
+        "Exported %s: %d new timeline entries, %d changes, %d misalignments (%d reactions updated)",
+        project_name, len(added["timeline"]), len(added["changes"]), len(added["misalignments"]),
+        sum(map(len, updated.values())),
     )
-    output = result.stdout + result.stderr
-    log.info("Wrangler output: %s", output)
+    return manifest
+
+
+def _gzip_shards() -> bool:
+    """Whether shards are written as .json.gz (DASHBOARD_GZIP=1), read when the export runs."""
+    return os.environ.get("DASHBOARD_GZIP", "0") == "1"
+
+
+def _output_dir(project_name: str) -> Path:
+    return DASHBOARD_DIR / "projects" / project_name
+
+
+def _update_index(manifests: list[Manifest]) -> None:
+    """Add or refresh these projects in dashboard/data/index.json."""
+    if not manifests:
+        return
+    with _index_lock:
+        path = DASHBOARD_DIR / INDEX_FILENAME
+        try:
+            projects = {entry["name"]: entry for entry in json.loads(path.read_text())["projects"]}
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            projects = {}
+        for manifest in manifests:
+            name = manifest["project"]
+            stats = manifest["stats"].get(name, {})
+            projects[name] = {
+                "name": name,
+                "manifest": f"projects/{name}/{MANIFEST_FILENAME}",
+                "exported_at": manifest["exported_at"],
+                "total_events": stats.get("total_events", 0),
+            }
+        index = {"projects": [projects[name] for name in sorted(projects)]}
+        atomic_write(path, json.dumps(index, separators=(",", ":")))
+
+
+def _load_manifest(out_dir: Path, project_name: str, messages_path: Path) -> Manifest | None:
+    """The previous export's manifest, or None if this export has to start over."""
+    try:
+        manifest: Manifest = json.loads((out_dir / MANIFEST_FILENAME).read_text())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if (
+        manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("project") != project_name
+        or manifest.get("gzip") != _gzip_shards()
+    ):
+        return None
+    cursors = manifest["cursors"]
+    if cursors["messages_offset"] and (
+        _fingerprint(messages_path, cursors["messages_offset"]) != cursors["messages_fingerprint"]
+    ):
+        log.info("messages.txt for %s was rewritten, rebuilding dashboard data", project_name)
+        return None
+    return manifest
+
 
-    # Parse URL from wrangler output
-    match = re.search(r"https://[\w.-]+\.pages\.dev", output)
-    if match:
-        return match.group(0)
-    if result.returncode != 0:
-        raise RuntimeError(f"Deploy failed: {output}")
-    return "https://humanand-dashboard.pages.dev"
+def _fingerprint(path: Path, offset: int) -> str | None:
+    """Hash of the FINGERPRINT_BYTES before `offset`, or None if the file is shorter than that.
+
+    These are the newest entries the last export read, so a messages.txt that was
+    rewritten (re-initialized, then logged to again) no longer matches even once it
+    has grown past the old offset.
+    """
+    if not path.exists() or path.stat().st_size < offset:
+        return None
+    start = max(offset - FINGERPRINT_BYTES, 0)
+    with path.open("rb") as f:
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def _read_new_messages(path: Path, offset: int) -> tuple[list[dict], int]:
+    """Entries appended to messages.txt since `offset`, and the offset to resume from."""
+    if not path.exists():
+        return [], offset
+    flush_journal(path)
+    with path.open("rb") as f:
+        f.seek(offset)
+        data = f.read()
+    # Leave a partly written last line for the next export
+    end = data.rfind(b"\n") + 1
+    return parse_message_lines(data[:end].decode().splitlines()), offset + end
+
+
+def _update_shards(out_dir: Path, manifest: Manifest, kind: str, added: list[dict], updated: list[dict]) -> None:
+    """Append new records and replace re-reacted ones in this kind's monthly shards."""
+    by_month: dict[str, tuple[list[dict], list[dict]]] = defaultdict(lambda: ([], []))
+    for record in added:
+        by_month[record["timestamp"][:7]][0].append(record)
+    for record in updated:
+        by_month[record["timestamp"][:7]][1].append(record)
+
+    shards = manifest["shards"][kind]
+    for month, (new_records, changed_records) in sorted(by_month.items()):
+        filename = f"{kind}/{month}.json" + (".gz" if manifest["gzip"] else "")
+        records = _read_shard(out_dir / filename) if month in shards else []
+        if changed_records:
+            replacements = {record["id"]: record for record in changed_records}
+            records = [replacements.get(record.get("id"), record) for record in records]
+        records.extend(new_records)
+        _write_shard(out_dir / filename, records)
+        shards[month] = Shard(file=filename, count=len(records))
+
+
+def _read_shard(path: Path) -> list[dict]:
+    if not path.exists():
+        return []
+    data = path.read_bytes()
+    return json.loads(gzip.decompress(data) if path.suffix == ".gz" else data)
+
+
+def _write_shard(path: Path, records: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.dumps(records, separators=(",", ":")).encode()
+    atomic_write(path, gzip.compress(data, mtime=0) if path.suffix == ".gz" else data)
+
+
+class DeployBackend(Protocol):
+    """Somewhere to publish the static dashboard site."""
+
+    name: str
+
+    def publish(self, site_dir: Path) -> str:
+        """Publish the site directory and return its public URL."""
+        ...
+
+
+class WranglerBackend:
+    """Cloudflare Pages, via `npx wrangler pages deploy`."""
+
+    name = "Cloudflare Pages"
+
+    def __init__(self, pages_project: str = CLOUDFLARE_PAGES_PROJECT) -> None:
+        self.pages_project = pages_project
+
+    def publish(self, site_dir: Path) -> str:
+        result = subprocess.run(
+            ["npx", "wrangler", "pages", "deploy", str(site_dir),
+             "--project-name", self.pages_project, "--commit-dirty=true"],
+            capture_output=True, text=True,
+        )
+        output = result.stdout + result.stderr
+        log.info("Wrangler output: %s", output)
+
+        # Parse URL from wrangler output
+        match = re.search(r"https://[\w.-]+\.pages\.dev", output)
+        if match:
+            return match.group(0)
+        if result.returncode != 0:
+            raise RuntimeError(f"Deploy failed: {output}")
+        return f"https://{self.pages_project}.pages.dev"
+
+
+class LocalDirectoryBackend:
+    """Copies the site into a local directory, e.g. the root of a static file server."""
+
+    name = "local directory"
+
+    def __init__(self, target_dir: Path, public_url: str = "") -> None:
+        self.target_dir = target_dir
+        self.public_url = public_url
+
+    def publish(self, site_dir: Path) -> str:
+        shutil.copytree(site_dir, self.target_dir, dirs_exist_ok=True)
+        return self.public_url or (self.target_dir.resolve() / "index.html").as_uri()
+
+
+def deploy_backend() -> DeployBackend:
+    """The backend configured by the environment, read when the deploy runs.
+
+    A local directory (e.g. a static server's root) if DASHBOARD_DEPLOY_DIR is set,
+    served at DASHBOARD_PUBLIC_URL if given; Cloudflare Pages otherwise.
+    """
+    deploy_dir = os.environ.get("DASHBOARD_DEPLOY_DIR", "")
+    if deploy_dir:
+        return LocalDirectoryBackend(Path(deploy_dir), os.environ.get("DASHBOARD_PUBLIC_URL", ""))
+    return WranglerBackend()
+
+
+def deploy(
+    project_names: str | Iterable[str],
+    backend: DeployBackend | None = None,
+    progress: Callable[[str], None] | None = None,
+) -> str:
+    """Export the given projects, then publish the dashboard site. Returns the site URL.
+
+    `progress` is called with a short status line before each step.
+    """
+    names = [project_names] if isinstance(project_names, str) else list(dict.fromkeys(project_names))
+    report = progress or (lambda text: None)
+    for name in names:
+        report(f"Exporting {name}...")
+        export(name)
+    backend = backend or deploy_backend()
+    report(f"Publishing to {backend.name}...")
+    with timed("dashboard.deploy"):
+        return backend.publish(DASHBOARD_SITE_DIR)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 2 and sys.argv[1] == "export":
-        export(sys.argv[2])
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if len(sys.argv) > 1 and sys.argv[1] == "export-all":
+        exported = export_all(full="--full" in sys.argv[2:])
+        print(f"Exported {len(exported)} projects to {DASHBOARD_DIR}/")
+    elif len(sys.argv) > 2 and sys.argv[1] == "export":
+        export(sys.argv[2], full="--full" in sys.argv[3:])
+        print(f"Output: {_output_dir(sys.argv[2])}/")
     elif len(sys.argv) > 2 and sys.argv[1] == "deploy":
         url = deploy(sys.argv[2])
         print(f"Deployed to: {url}")
     else:
-        print("Usage: python dashboard.py [export|deploy] <project_name>")
+        print("Usage: python dashboard.py [export|deploy] <project_name> [--full]")
+        print("       python dashboard.py export-all [--full]")
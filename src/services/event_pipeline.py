@@ -0,0 +1,105 @@
+"""Bounded worker pool that runs Slack handlers off the Bolt listener threads.
+
+Each channel is pinned to one worker queue, so events from the same channel are
+handled in arrival order while different channels proceed in parallel.
+"""
+
+import logging
+import queue
+import threading
+import time
+import zlib
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from src.utils.metrics import incr, record_latency, register_gauge
+
+log = logging.getLogger(__name__)
+
+Handler = Callable[[dict, Any, Any], None]
+
+
+class Listener(Protocol):
+    """A Bolt listener: Bolt injects its arguments by parameter name."""
+
+    def __call__(self, event: dict, client: Any, say: Any) -> None: ...
+
+
+@dataclass
+class WorkItem:
+    kind: str
+    channel_id: str
+    handler: Handler
+    event: dict
+    client: Any
+    say: Any
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+def _event_channel(event: dict) -> str:
+    # Reactions carry the channel on the reacted-to item, everything else at the top level
+    return event.get("channel") or event.get("item", {}).get("channel", "")
+
+
+class EventPipeline:
+    def __init__(self, workers: int, max_queue: int = 1000) -> None:
+        self.workers = max(1, workers)
+        self._queues: list[queue.Queue[WorkItem | None]] = [
+            queue.Queue(maxsize=max_queue) for _ in range(self.workers)
+        ]
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for i, q in enumerate(self._queues):
+            thread = threading.Thread(target=self._run, args=(q,), name=f"pipeline-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        register_gauge("pipeline.queue_depth", self.depth)
+        log.info("Event pipeline started with %d workers", self.workers)
+
+    def stop(self) -> None:
+        for q in self._queues:
+            q.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    def submit(self, kind: str, handler: Handler, event: dict, client, say) -> bool:
+        """Enqueue an event for background handling. Returns False if the queue is full."""
+        channel_id = _event_channel(event)
+        item = WorkItem(kind, channel_id, handler, event, client, say)
+        q = self._queues[zlib.crc32(channel_id.encode()) % self.workers]
+        try:
+            q.put_nowait(item)
+        except queue.Full:
+            incr("pipeline.dropped")
+            log.warning("Event pipeline full — dropped %s event for %s", kind, channel_id)
+            return False
+        incr("pipeline.enqueued")
+        return True
+
+    def wrap(self, kind: str, handler: Handler) -> Listener:
+        """Return a Bolt listener that enqueues instead of handling inline."""
+        # Bolt injects listener args by parameter name, so the signature must stay event/client/say
+        def listener(event: dict, client, say) -> None:
+            self.submit(kind, handler, event, client, say)
+        return listener
+
+    def _run(self, q: "queue.Queue[WorkItem | None]") -> None:
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            started = time.monotonic()
+            record_latency("pipeline.queue_wait", started - item.enqueued_at)
+            try:
+                item.handler(item.event, item.client, item.say)
+            except Exception:
+                incr("pipeline.errors")
+                log.exception("Error handling %s event for %s", item.kind, item.channel_id)
+            finally:
+                record_latency(f"pipeline.{item.kind}", time.monotonic() - started)
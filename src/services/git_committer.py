@@ -0,0 +1,140 @@
+"""Background committer that records ground truth versions on project/<name> branches.
+
+Commits are written straight into the object database with one `git fast-import`
+run — no worktree checkout, no index — and off the request thread. Updates that
+arrive within GIT_COMMIT_COALESCE_SECONDS are folded into a single commit per
+project, and every project touched in that window shares the same fast-import run.
+Each commit's tree is its parent's tree with only projects/<name>/ground_truth.txt
+replaced, so the branch still starts from HEAD exactly like a regular commit would.
+"""
+
+import logging
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# Default until configure() applies AppConfig
+GIT_COMMIT_COALESCE_SECONDS = 2.0
+BRANCH_PREFIX = "project/"
+_FALLBACK_IDENT = "HumanAlign Bot <bot@humanalign.local>"
+
+
+@dataclass
+class _PendingCommit:
+    content: bytes
+    notes: list[str] = field(default_factory=list)
+
+
+class GitCommitter:
+    def __init__(self, repo_dir: Path = Path("."), coalesce_seconds: float = GIT_COMMIT_COALESCE_SECONDS) -> None:
+        self.repo_dir = repo_dir
+        self.coalesce_seconds = coalesce_seconds
+        self._pending: dict[str, _PendingCommit] = {}
+        self._lock = threading.Lock()
+        # Serializes fast-import runs so two flushes never race on the same ref
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._ident: str | None = None
+        self._thread: threading.Thread | None = None
+
+    def submit(self, project: str, content: str, summary: str, approved_by: str) -> None:
+        """Queue a ground truth version; returns immediately."""
+        with self._lock:
+            pending = self._pending.get(project)
+            if pending is None:
+                pending = self._pending[project] = _PendingCommit(content.encode())
+            pending.content = content.encode()  # the latest version wins
+            pending.notes.append(f"{summary} (approved by {approved_by})")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="git-committer", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def flush(self) -> None:
+        """Write every queued commit now (tests, shutdown)."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if batch:
+                self._commit(batch)
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            time.sleep(self.coalesce_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("Git commit flush failed: %s", e)
+
+    def _git(self, *args: str, stdin: bytes | None = None) -> subprocess.CompletedProcess:
+        return subprocess.run(["git", *args], cwd=self.repo_dir, input=stdin, capture_output=True)
+
+    def _commit(self, batch: dict[str, _PendingCommit]) -> None:
+        head = self._git("rev-parse", "--verify", "-q", "HEAD")
+        if head.returncode != 0:
+            log.debug("Git commit skipped: %s is not a git repository with commits", self.repo_dir.resolve())
+            return
+        tips = self._branch_tips()
+        ident = f"{self._committer_ident()} {int(time.time())} +0000"
+        stream = bytearray()
+        for project, pending in batch.items():
+            branch = f"{BRANCH_PREFIX}{project}"
+            parent = tips.get(branch) or head.stdout.decode().strip()
+            message = _commit_message(pending.notes).encode()
+            stream += f"commit refs/heads/{branch}\ncommitter {ident}\n".encode()
+            stream += f"data {len(message)}\n".encode() + message + b"\n"
+            stream += f"from {parent}\n".encode()
+            stream += f"M 100644 inline projects/{project}/ground_truth.txt\n".encode()
+            stream += f"data {len(pending.content)}\n".encode() + pending.content + b"\n\n"
+        result = self._git("fast-import", "--quiet", stdin=bytes(stream))
+        if result.returncode != 0:
+            log.warning("Git commit failed for %s: %s", ", ".join(batch), result.stderr.decode().strip())
+            return
+        for project, pending in batch.items():
+            log.info("Committed ground truth to branch %s%s (%d update(s))", BRANCH_PREFIX, project, len(pending.notes))
+
+    def _branch_tips(self) -> dict[str, str]:
+        result = self._git("for-each-ref", "--format=%(refname:short) %(objectname)", f"refs/heads/{BRANCH_PREFIX}")
+        tips = {}
+        for line in result.stdout.decode().splitlines():
+            name, _, sha = line.partition(" ")
+            tips[name] = sha
+        return tips
+
+    def _committer_ident(self) -> str:
+        if self._ident is None:
+            result = self._git("var", "GIT_COMMITTER_IDENT")
+            # "Name <email> 1700000000 +0000" — keep the identity, fresh timestamp per commit
+            ident = result.stdout.decode().strip().rsplit(" ", 2)[0] if result.returncode == 0 else ""
+            self._ident = ident or _FALLBACK_IDENT
+        return self._ident
+
+
+def _commit_message(notes: list[str]) -> str:
+    if len(notes) == 1:
+        return f"ground truth: {notes[0]}"
+    return f"ground truth: {len(notes)} updates\n\n" + "\n".join(f"- {note}" for note in notes)
+
+
+_committer = GitCommitter()
+
+
+def configure(coalesce_seconds: float) -> None:
+    """Set the shared committer's coalescing window (from AppConfig, once the environment is loaded)."""
+    global GIT_COMMIT_COALESCE_SECONDS
+    GIT_COMMIT_COALESCE_SECONDS = coalesce_seconds
+    _committer.coalesce_seconds = coalesce_seconds
+
+
+def submit_commit(project: str, content: str, summary: str, approved_by: str) -> None:
+    _committer.submit(project, content, summary, approved_by)
+
+
+def flush_commits() -> None:
+    _committer.flush()
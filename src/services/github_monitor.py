@@ -1,14 +1,15 @@
 import json
 import logging
 import os
-import re
 import threading
 import time
 import urllib.request
 
+from src.models.ground_truth import GroundTruth
 from src.services.project_service import ProjectAgent
 from src.stores.db import log_event
 from src.services.llm_service import classify_pr
+from src.utils.channels import resolve_channel_id
 
 log = logging.getLogger(__name__)
 
@@ -51,23 +52,17 @@ def parse_github_map(ground_truth: str) -> dict[str, dict]:
     """Parse Directory entries for 'github: username' to build github_user -> info map.
 
     Expects lines like: * **Name** (<@SLACK_ID>) — Role description. github: ghusername
-    This is the bridge between GitHub identities and Slack/role identities.
+    This is the bridge between GitHub identities and Slack/role identities. The parsed
+    document is memoized per ground truth version, so repeat calls are dict lookups.
     """
-    mapping: dict[str, dict] = {}
-    for line in ground_truth.splitlines():
-        gh_match = re.search(r"github:\s*(\S+)", line, re.IGNORECASE)
-        if not gh_match:
-            continue
-        github_username = gh_match.group(1).lower()
-        name_match = re.search(r"\*\*(.+?)\*\*", line)
-        slack_match = re.search(r"<@(U[A-Z0-9]+)>", line)
-        role_match = re.search(r"—\s*(.+?)(?:\s*github:)", line, re.IGNORECASE)
-        mapping[github_username] = {
-            "name": name_match.group(1) if name_match else github_username,
-            "slack_id": slack_match.group(1) if slack_match else "",
-            "role": role_match.group(1).strip().rstrip(".") if role_match else "Unknown",
+    return {
+        github_username: {
+            "name": entry.name,
+            "slack_id": entry.slack_id,
+            "role": entry.role_summary,
         }
-    return mapping
+        for github_username, entry in GroundTruth.parse(ground_truth).by_github.items()
+    }
 
 
 def check_pr(pr: dict, repo: str, agent: ProjectAgent) -> dict | None:
@@ -111,15 +106,8 @@ def format_nudge(nudge: dict) -> str:
 
 
 def _resolve_channel_id(client, channel_name: str) -> str | None:
-    """Find channel ID by name."""
-    try:
-        for page in client.conversations_list(types="public_channel", limit=200):
-            for ch in page["channels"]:
-                if ch["name"] == channel_name:
-                    return ch["id"]
-    except Exception as e:
-        log.error("Failed to resolve channel %s: %s", channel_name, e)
-    return None
+    """Find channel ID by name via the shared channel directory."""
+    return resolve_channel_id(client, channel_name)
 
 
 def poll_once(repo: str, slack_client, agents: dict[str, ProjectAgent]) -> None:
@@ -0,0 +1,70 @@
+"""Small background job runner for slow, deduplicated work like ground truth compaction.
+
+Jobs are identified by a key (e.g. "compaction:<project>"); submitting a key that is
+already queued or running is a no-op, so a burst of approvals starts one job. With
+coalesce=True such a submission instead schedules one follow-up run after the current
+one finishes (the latest submitted callable wins), so work requested mid-run isn't lost.
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from src.utils.metrics import incr, register_gauge, timed
+
+log = logging.getLogger(__name__)
+
+
+class JobRunner:
+    def __init__(self, workers: int = 2) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._in_flight: dict[str, Future] = {}
+        # Follow-up runs requested for in-flight coalescing keys: key -> (kind, fn)
+        self._follow_ups: dict[str, tuple[str, Callable[[], None]]] = {}
+        self._lock = threading.Lock()
+        register_gauge("jobs.in_flight", lambda: len(self._in_flight))
+
+    def submit(self, key: str, kind: str, fn: Callable[[], None], coalesce: bool = False) -> Future | None:
+        """Run `fn` in the background unless a job with the same key is already pending.
+
+        Returns the job's future, or None if it was deduplicated or coalesced.
+        """
+        with self._lock:
+            if key in self._in_flight:
+                if coalesce:
+                    self._follow_ups[key] = (kind, fn)
+                    incr(f"jobs.{kind}.coalesced")
+                else:
+                    incr(f"jobs.{kind}.deduplicated")
+                return None
+            return self._start(key, kind, fn)
+
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._in_flight
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _start(self, key: str, kind: str, fn: Callable[[], None]) -> Future:
+        future = self._executor.submit(self._run, key, kind, fn)
+        self._in_flight[key] = future
+        return future
+
+    def _run(self, key: str, kind: str, fn: Callable[[], None]) -> None:
+        try:
+            with timed(f"job.{kind}"):
+                fn()
+        except Exception as e:
+            incr(f"jobs.{kind}.errors")
+            log.error("Job %s failed: %s", key, e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                follow_up = self._follow_ups.pop(key, None)
+                if follow_up is not None:
+                    try:
+                        self._start(key, *follow_up)
+                    except RuntimeError as e:  # executor shut down meanwhile
+                        log.warning("Follow-up job %s dropped: %s", key, e)
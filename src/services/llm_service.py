@@ -1,20 +1,79 @@
 import os
-from pathlib import Path
+import re
+import threading
+from collections.abc import Iterator
 
 import anthropic
+import httpx
+from anthropic.types import TextBlockParam
+
+from src.services.prompt_registry import get_prompt
+from src.utils.metrics import incr
 
 # Sonnet for all calls — fast enough for classification, smart enough for nuance.
-# Prompts are loaded from disk at call time so you can edit them without restarting.
+# Prompts come from the prompt registry, which reloads edited files without a restart.
 MODEL = "claude-sonnet-4-6"
-PROMPTS_DIR = Path("prompts")
+
+# One client per process so every call reuses warm keep-alive connections instead of
+# paying client construction + TLS handshake. The SDK already retries 408/409/429/5xx
+# (including 529 overloaded) with exponential backoff and honours retry-after headers;
+# these knobs only tune how hard it tries and how many sockets it keeps. Defaults until
+# configure_client applies AppConfig.
+ANTHROPIC_MAX_RETRIES = 4
+ANTHROPIC_TIMEOUT_SECONDS = 60.0
+ANTHROPIC_CONNECT_TIMEOUT_SECONDS = 5.0
+ANTHROPIC_POOL_SIZE = 20
+
+_client: anthropic.Anthropic | None = None
+_client_lock = threading.Lock()
 
 
 def _load_prompt(name: str) -> str:
-    return (PROMPTS_DIR / name).read_text()
+    return get_prompt(name)
+
+
+def _client_options() -> dict:
+    return {
+        "api_key": os.environ["ANTHROPIC_API_KEY"],
+        "max_retries": ANTHROPIC_MAX_RETRIES,
+        "timeout": httpx.Timeout(ANTHROPIC_TIMEOUT_SECONDS, connect=ANTHROPIC_CONNECT_TIMEOUT_SECONDS),
+    }
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(max_connections=ANTHROPIC_POOL_SIZE, max_keepalive_connections=ANTHROPIC_POOL_SIZE)
 
 
 def _get_client() -> anthropic.Anthropic:
-    return anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = anthropic.Anthropic(
+                    **_client_options(),
+                    http_client=anthropic.DefaultHttpxClient(limits=_pool_limits()),
+                )
+    return _client
+
+
+def configure_client(max_retries: int, timeout_seconds: float, connect_timeout_seconds: float, pool_size: int) -> None:
+    """Set the client's retry, timeout and pool settings (from AppConfig, once the environment is loaded)."""
+    global ANTHROPIC_MAX_RETRIES, ANTHROPIC_TIMEOUT_SECONDS, ANTHROPIC_CONNECT_TIMEOUT_SECONDS, ANTHROPIC_POOL_SIZE
+    ANTHROPIC_MAX_RETRIES = max_retries
+    ANTHROPIC_TIMEOUT_SECONDS = timeout_seconds
+    ANTHROPIC_CONNECT_TIMEOUT_SECONDS = connect_timeout_seconds
+    ANTHROPIC_POOL_SIZE = pool_size
+    # A client built before this keeps its old settings; the next call builds a new one
+    close_clients()
+
+
+def close_clients() -> None:
+    """Drop the shared client (e.g. on shutdown, or after changing the API key)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = None
 
 
 def _extract_text(response: anthropic.types.Message) -> str:
@@ -22,69 +81,140 @@ def _extract_text(response: anthropic.types.Message) -> str:
     return response.content[0].text.strip()  # pyrefly: ignore
 
 
-# Max tokens are tuned per function: 256 for single-line classification,
-# 128 for binary PASS/NUDGE, 1024 for free-form responses, 2048 for document rewriting.
+# Every prompt is split in two: a stable system prefix (instructions + ground truth)
+# marked as a prompt-cache breakpoint, and a volatile user turn (history, message, PR
+# details). Consecutive calls for the same project reuse the cached prefix until the
+# ground truth changes. Prefixes under the model's minimum cacheable length are simply
+# sent uncached by the API.
+
+def _cached_system(stable_prompt: str) -> list[TextBlockParam]:
+    return [TextBlockParam(type="text", text=stable_prompt, cache_control={"type": "ephemeral"})]
+
+
+def _record_usage(response: anthropic.types.Message) -> None:
+    """Count cache reads vs writes so the hit rate shows up in `@bot metrics`."""
+    usage = getattr(response, "usage", None)
+    for attr, counter in (
+        ("cache_read_input_tokens", "llm.cache_read_tokens"),
+        ("cache_creation_input_tokens", "llm.cache_write_tokens"),
+        ("input_tokens", "llm.uncached_input_tokens"),
+        ("output_tokens", "llm.output_tokens"),
+    ):
+        value = getattr(usage, attr, None)
+        if isinstance(value, int) and value:
+            incr(counter, value)
+
+
+def _create(max_tokens: int, stable_prompt: str, content: str | list[TextBlockParam]) -> str:
+    client = _get_client()
+    response = client.messages.create(
+        model=MODEL,
+        max_tokens=max_tokens,
+        system=_cached_system(stable_prompt),
+        messages=[{"role": "user", "content": content}],
+    )
+    _record_usage(response)
+    return _extract_text(response)
+
+
+# Max tokens are tuned per function: 256 for single-line classification (per message when batched),
+# 128 for binary PASS/NUDGE, 1024 for free-form responses, 2048 for document rewriting;
+# Decision Log roll-ups are capped by the caller.
 
 def classify_message(ground_truth: str, user: str, message: str, history: str = "") -> str:
-    system_prompt = _load_prompt("classify.md").format(
-        ground_truth=ground_truth,
+    stable_prompt = _load_prompt("classify.md").format(ground_truth=ground_truth)
+    content = _load_prompt("classify_message.md").format(
         user=user,
         message=message,
         history=history or "(no recent messages)",
     )
-    client = _get_client()
-    response = client.messages.create(
-        model=MODEL,
-        max_tokens=256,
-        system=system_prompt,
-        messages=[{"role": "user", "content": message}],
+    return _create(256, stable_prompt, content)
+
+
+def classify_messages(ground_truth: str, messages: list[tuple[str, str]], history: str = "") -> list[str]:
+    """Classify several (user, message) pairs from one channel in a single request.
+
+    Returns one action line per input, in order. Lines the model drops or garbles fall back to PASS.
+    """
+    numbered = "\n".join(
+        f'{i}. <@{user}>: "{message}"' for i, (user, message) in enumerate(messages, start=1)
     )
-    return _extract_text(response)
+    # Same cached prefix as classify_message, so single and batched calls share cache entries
+    stable_prompt = _load_prompt("classify.md").format(ground_truth=ground_truth)
+    content = _load_prompt("classify_batch.md").format(
+        history=history or "(no recent messages)",
+        messages=numbered,
+    )
+    return _parse_numbered_lines(_create(256 * len(messages), stable_prompt, content), len(messages))
+
+
+def _parse_numbered_lines(text: str, count: int) -> list[str]:
+    results = ["PASS"] * count
+    for line in text.splitlines():
+        match = re.match(r"^\s*(\d+)[.)]\s*(.+)$", line)
+        if not match:
+            continue
+        index = int(match.group(1)) - 1
+        if 0 <= index < count:
+            results[index] = match.group(2).strip()
+    return results
 
 
 def compact_ground_truth(ground_truth: str) -> str:
-    system_prompt = _load_prompt("compaction.md").format(ground_truth=ground_truth)
-    client = _get_client()
-    response = client.messages.create(
-        model=MODEL,
-        max_tokens=2048,
-        system=system_prompt,
-        messages=[{"role": "user", "content": "Compact this ground truth document."}],
-    )
-    return _extract_text(response)
+    stable_prompt = _load_prompt("compaction.md")
+    return _create(2048, stable_prompt, f"Compact this ground truth document.\n\n{ground_truth}")
+
+
+def summarize_decisions(entries: str, max_tokens: int) -> list[str]:
+    """Roll the oldest Decision Log entries up into a few bullet lines."""
+    stable_prompt = _load_prompt("compaction_decisions.md")
+    text = _create(max_tokens, stable_prompt, f"Roll up these Decision Log entries.\n\n{entries}")
+    bullets = [line.strip() for line in text.splitlines() if line.strip().startswith("* ")]
+    # A model that ignores the bullet format still yields one usable entry
+    return bullets or [f"* {' '.join(text.split())}"]
 
 
 def classify_pr(
     author_name: str, author_role: str, pr_title: str, commits: str, ground_truth: str
 ) -> str:
-    system_prompt = _load_prompt("pr_alignment.md").format(
+    stable_prompt = _load_prompt("pr_alignment.md").format(ground_truth=ground_truth)
+    content = _load_prompt("pr_alignment_details.md").format(
         author_name=author_name,
         author_role=author_role,
         pr_title=pr_title,
         commits=commits,
-        ground_truth=ground_truth,
-    )
-    client = _get_client()
-    response = client.messages.create(
-        model=MODEL,
-        max_tokens=128,
-        system=system_prompt,
-        messages=[{"role": "user", "content": "Check this PR for alignment."}],
     )
-    return _extract_text(response)
+    return _create(128, stable_prompt, content)
 
 
-def respond_to_mention(ground_truth: str, message: str, history: str = "", messages: str = "") -> str:
-    system_prompt = _load_prompt("respond.md").format(
-        ground_truth=ground_truth,
+def _respond_prompt(ground_truth: str, message: str, history: str, messages: str) -> tuple[str, list[TextBlockParam]]:
+    stable_prompt = _load_prompt("respond.md").format(ground_truth=ground_truth)
+    context = _load_prompt("respond_context.md").format(
         history=history or "(no recent messages)",
         messages=messages or "(no important messages yet)",
     )
+    return stable_prompt, [TextBlockParam(type="text", text=context), TextBlockParam(type="text", text=message)]
+
+
+def respond_to_mention(ground_truth: str, message: str, history: str = "", messages: str = "") -> str:
+    stable_prompt, content = _respond_prompt(ground_truth, message, history, messages)
+    return _create(1024, stable_prompt, content)
+
+
+def stream_response_to_mention(
+    ground_truth: str, message: str, history: str = "", messages: str = ""
+) -> Iterator[str]:
+    """Same request as respond_to_mention, yielding text deltas as they arrive.
+
+    Joining the deltas and stripping gives exactly what respond_to_mention returns.
+    """
+    stable_prompt, content = _respond_prompt(ground_truth, message, history, messages)
     client = _get_client()
-    response = client.messages.create(
+    with client.messages.stream(
         model=MODEL,
         max_tokens=1024,
-        system=system_prompt,
-        messages=[{"role": "user", "content": message}],
-    )
-    return _extract_text(response)
+        system=_cached_system(stable_prompt),
+        messages=[{"role": "user", "content": content}],
+    ) as stream:
+        yield from stream.text_stream
+        _record_usage(stream.get_final_message())
@@ -1,8 +1,11 @@
 import logging
-import re
+from collections.abc import Mapping
 from pathlib import Path
 
+from src.models.ground_truth import GroundTruth
 from src.services.dashboard_service import parse_messages_txt
+from src.stores.db import read_user_events
+from src.stores.pending import PendingStore
 
 log = logging.getLogger(__name__)
 
@@ -11,15 +14,7 @@ PROJECTS_DIR = Path("projects")
 
 def _extract_role(ground_truth: str, user_id: str) -> str:
     """Extract a user's role line from the Directory section."""
-    marker = f"(<@{user_id}>)"
-    for line in ground_truth.splitlines():
-        if marker in line:
-            # Line looks like: * **Name** (<@U123>) — Role description
-            parts = line.split("—", 1)
-            if len(parts) > 1:
-                return parts[1].strip()
-            return "(no role set)"
-    return "(no role set)"
+    return GroundTruth.parse(ground_truth).role_of(user_id)
 
 
 def _iter_project_files(filename: str):
@@ -57,11 +52,39 @@ def scan_user_activity(user_id: str, limit: int = 10) -> list[dict]:
     return all_entries[:limit]
 
 
-def build_person_summary(user_id: str, pending_updates: dict | None = None, pending_nudges: dict | None = None) -> str:
+def scan_user_events(user_id: str, limit: int = 5) -> list[dict]:
+    """Recent bot events (routes, updates, flags) raised by a user, via each events.db's user index.
+
+    Reads each database read-only instead of opening (and migrating) a pooled store per project.
+    """
+    all_events = []
+    for project_name, db_path in _iter_project_files("events.db"):
+        for event in read_user_events(db_path, user_id, limit):
+            event["project"] = project_name
+            all_events.append(event)
+    all_events.sort(key=lambda x: x["timestamp"], reverse=True)
+    return all_events[:limit]
+
+
+def _count_pending(pending: Mapping[str, dict] | None, user_id: str) -> int:
+    if isinstance(pending, PendingStore):
+        return pending.count_for_user(user_id)
+    return sum(1 for p in (pending or {}).values() if p.get("user") == user_id)
+
+
+def build_person_summary(
+    user_id: str,
+    pending_updates: Mapping[str, dict] | None = None,
+    pending_nudges: Mapping[str, dict] | None = None,
+) -> str:
     """Build a formatted summary of a user's roles and activity across all projects."""
     projects = scan_user_projects(user_id)
     activity = scan_user_activity(user_id)
-    log.info("Person lookup: %s — %d projects, %d activity entries", user_id, len(projects), len(activity))
+    events = scan_user_events(user_id)
+    log.info(
+        "Person lookup: %s — %d projects, %d activity entries, %d events",
+        user_id, len(projects), len(activity), len(events),
+    )
 
     if not projects:
         log.info("Person lookup: %s not found in any project", user_id)
@@ -79,10 +102,13 @@ def build_person_summary(user_id: str, pending_updates: dict | None = None, pend
             link = f"<{entry['permalink']}|link>" if entry.get("permalink") else ""
             lines.append(f"- {entry['timestamp']} | {entry['project']} | {entry['category']} | {entry['summary']} {link}")
 
-    pending_count = (
-        sum(1 for p in (pending_updates or {}).values() if p.get("user") == user_id)
-        + sum(1 for p in (pending_nudges or {}).values() if p.get("user") == user_id)
-    )
+    if events:
+        lines.append("\n*Recent Events*")
+        for event in events:
+            reaction = f" ({event['reaction']})" if event.get("reaction") else ""
+            lines.append(f"- {event['timestamp'][:16]} | {event['project']} | {event['event_type']} | {event['content']}{reaction}")
+
+    pending_count = _count_pending(pending_updates, user_id) + _count_pending(pending_nudges, user_id)
     if pending_count:
         lines.append(f"\n*Pending*\n- {pending_count} item(s) awaiting review")
 
@@ -0,0 +1,121 @@
+"""Cheap local pre-classification that lets obviously-PASS messages skip the LLM.
+
+Each rule inspects the message and returns a (signal, weight) pair or None.
+Positive weights mean "this might need action", negative weights mean "this
+looks like chatter". The summed score is compared against a threshold; only
+messages scoring below it are skipped.
+
+Modes (PREFILTER_MODE, applied at startup from AppConfig via `configure`):
+- off: never consulted
+- shadow: scored and logged next to the real LLM verdict, never skips
+- on: low-scoring messages return PASS without a model call
+"""
+
+import logging
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from src.utils.metrics import incr
+
+log = logging.getLogger(__name__)
+
+PREFILTER_MODES = ("off", "shadow", "on")
+PREFILTER_MODE = "off"
+# Messages scoring below this are confidently PASS
+PREFILTER_PASS_THRESHOLD = 0.2
+
+Rule = Callable[[str], tuple[str, float] | None]
+
+
+@dataclass(frozen=True)
+class PrefilterVerdict:
+    score: float
+    signals: tuple[str, ...]
+
+    @property
+    def skip(self) -> bool:
+        return self.score < PREFILTER_PASS_THRESHOLD
+
+
+def _pattern_rule(signal: str, weight: float, pattern: str) -> Rule:
+    regex = re.compile(pattern, re.IGNORECASE)
+
+    def rule(text: str) -> tuple[str, float] | None:
+        return (signal, weight) if regex.search(text) else None
+    return rule
+
+
+def _length_rule(text: str) -> tuple[str, float] | None:
+    # Longer messages carry more room for decisions and asks; cap the contribution
+    words = len(text.split())
+    if words <= 3:
+        return None
+    return "length", min(words / 60, 0.3)
+
+
+RULES: list[Rule] = [
+    _pattern_rule("decision", 0.6, r"\b(we('ve| have)? decided|team (agreed|decided)|we('re| are) going to|going forward|let'?s (use|switch|go with|move)|switch(ing)? to)\b"),
+    _pattern_rule("individual", 0.5, r"\b(i'?ll just|i'?m gonna|i'?m going to|i'?ll go ahead|instead of)\b"),
+    _pattern_rule("question", 0.4, r"\?"),
+    _pattern_rule("ask", 0.3, r"^\s*(who|what|how|why|when|where|can|could|should|does|do|is|are|anyone)\b"),
+    _pattern_rule("mention", 0.3, r"<@[UW][A-Z0-9]+>"),
+    _pattern_rule("blocker", 0.4, r"\b(blocked|blocker|stuck|broken|failing|urgent|help|outage|down)\b"),
+    _pattern_rule("ack", -0.3, r"^\s*(ok(ay)?|k|thanks|thank you|ty|lol|nice|cool|great|sounds good|\+1|:\w+:|lgtm|done|yep|yes|no)\W*$"),
+    _length_rule,
+]
+
+
+def configure(mode: str, pass_threshold: float) -> None:
+    """Set the mode and threshold (from AppConfig, once the environment is loaded)."""
+    global PREFILTER_MODE, PREFILTER_PASS_THRESHOLD
+    if mode not in PREFILTER_MODES:
+        raise ValueError(f"PREFILTER_MODE must be one of {', '.join(PREFILTER_MODES)}, got {mode!r}")
+    PREFILTER_MODE = mode
+    PREFILTER_PASS_THRESHOLD = pass_threshold
+
+
+def register_rule(rule: Rule) -> None:
+    """Add a custom signal rule (e.g. project-specific keywords)."""
+    RULES.append(rule)
+
+
+def score_message(text: str) -> PrefilterVerdict:
+    signals = []
+    score = 0.0
+    for rule in RULES:
+        hit = rule(text)
+        if hit:
+            signals.append(hit[0])
+            score += hit[1]
+    return PrefilterVerdict(score=max(0.0, min(score, 1.0)), signals=tuple(signals))
+
+
+def prefilter(text: str) -> PrefilterVerdict | None:
+    """Return a verdict when the message can skip the LLM (mode `on`), else None."""
+    if PREFILTER_MODE != "on":
+        return None
+    verdict = score_message(text)
+    if verdict.skip:
+        incr("prefilter.skipped")
+        return verdict
+    incr("prefilter.passed_to_llm")
+    return None
+
+
+def record_shadow(text: str, llm_result: str) -> None:
+    """In shadow mode, log what the prefilter would have done next to the LLM's verdict."""
+    if PREFILTER_MODE != "shadow":
+        return
+    verdict = score_message(text)
+    llm_pass = llm_result.startswith("PASS")
+    if verdict.skip and not llm_pass:
+        incr("prefilter.shadow_false_skip")
+    elif verdict.skip:
+        incr("prefilter.shadow_correct_skip")
+    else:
+        incr("prefilter.shadow_sent_to_llm")
+    log.info(
+        "prefilter shadow | would_skip=%s score=%.2f signals=%s llm=%s | %s",
+        verdict.skip, verdict.score, ",".join(verdict.signals) or "-", llm_result.split(":", 1)[0], text,
+    )
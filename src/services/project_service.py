@@ -1,20 +1,78 @@
+import hashlib
 import logging
-import re
-import shutil
-import subprocess
-import tempfile
+from collections.abc import Iterator
 from datetime import datetime
 from pathlib import Path
 
-from src.services.llm_service import classify_message, compact_ground_truth, respond_to_mention
+from src.models.ground_truth import GroundTruth
+from src.models.message_log import MessageLog
+from src.services.git_committer import submit_commit
+from src.services.llm_service import (
+    classify_message,
+    classify_messages,
+    compact_ground_truth,
+    respond_to_mention,
+    stream_response_to_mention,
+    summarize_decisions,
+)
+from src.services.prefilter import prefilter, record_shadow
+from src.services.retrieval_index import INDEX_FILENAME, RetrievalIndex
+from src.stores.db import read_events
+from src.stores.journal import append_line, atomic_write, flush_journal
+from src.utils.lru_cache import LRUCache
+from src.utils.metrics import incr
+from src.utils.tokens import estimate_tokens
 
 log = logging.getLogger(__name__)
 
 PROJECTS_DIR = Path("projects")
-# When ground truth exceeds this limit, the bot triggers LLM-based compaction
-# to keep the document scannable. Directory and Core Objective are preserved.
-MAX_GROUND_TRUTH_WORDS = 1000
+# When ground truth exceeds this many (estimated) tokens, the bot proposes LLM-based
+# compaction to keep the document scannable and every prompt that embeds it small.
+GROUND_TRUTH_TOKEN_BUDGET = 1500
+# "incremental" rolls only the oldest Decision Log entries into a summary block, leaving
+# Core Objective, Directory and recent entries byte-identical (so cached prompt prefixes
+# up to the log survive); "full" rewrites the whole document.
+COMPACTION_MODES = ("incremental", "full")
+COMPACTION_MODE = "incremental"
+# Incremental compaction rolls up enough old entries to land at this share of the budget
+COMPACTION_TARGET_RATIO = 0.6
+COMPACTION_SUMMARY_MAX_TOKENS = 512
 DECISION_LOG_PLACEHOLDER = "(Bot will populate this as decisions are made)\n"
+# Repeated messages ("standup in 5", relayed links) classify the same way until the
+# ground truth changes, so results are reused per project within these limits.
+CLASSIFY_CACHE_SIZE = 1000
+CLASSIFY_CACHE_TTL_SECONDS = 6 * 60 * 60
+# @mention answers see a bounded slice of messages.txt rather than the whole log:
+# entries from the recency window plus keyword matches, best-scored first, up to the budget.
+# Defaults until configure_respond_context applies AppConfig.
+RESPOND_CONTEXT_TOKEN_BUDGET = 1500
+RESPOND_CONTEXT_WINDOW_DAYS = 30.0
+RESPOND_CONTEXT_HALF_LIFE_DAYS = 7.0
+# Entries the retrieval index ranks highest for the question go in first, whatever their age
+RETRIEVAL_TOP_K = 8
+
+
+def configure_compaction(token_budget: int, mode: str) -> None:
+    """Set when and how compaction runs (from AppConfig, once the environment is loaded)."""
+    global GROUND_TRUTH_TOKEN_BUDGET, COMPACTION_MODE
+    if mode not in COMPACTION_MODES:
+        raise ValueError(f"COMPACTION_MODE must be one of {', '.join(COMPACTION_MODES)}, got {mode!r}")
+    GROUND_TRUTH_TOKEN_BUDGET = token_budget
+    COMPACTION_MODE = mode
+
+
+def configure_respond_context(token_budget: int, window_days: float, half_life_days: float) -> None:
+    """Set how much of messages.txt @mention answers see (from AppConfig, once the environment is loaded)."""
+    global RESPOND_CONTEXT_TOKEN_BUDGET, RESPOND_CONTEXT_WINDOW_DAYS, RESPOND_CONTEXT_HALF_LIFE_DAYS
+    RESPOND_CONTEXT_TOKEN_BUDGET = token_budget
+    RESPOND_CONTEXT_WINDOW_DAYS = window_days
+    RESPOND_CONTEXT_HALF_LIFE_DAYS = half_life_days
+
+
+def configure_retrieval(top_k: int) -> None:
+    """Set how many retrieved entries lead the @mention context (from AppConfig)."""
+    global RETRIEVAL_TOP_K
+    RETRIEVAL_TOP_K = top_k
 
 
 class ProjectAgent:
@@ -22,8 +80,14 @@ class ProjectAgent:
         self.name = project_name
         self.project_dir = PROJECTS_DIR / project_name
         self.project_dir.mkdir(parents=True, exist_ok=True)
+        self._classify_cache: LRUCache[str] = LRUCache(CLASSIFY_CACHE_SIZE, CLASSIFY_CACHE_TTL_SECONDS)
         self.ground_truth = self._load_file("ground_truth.txt")
-        self.messages = self._load_file("messages.txt")
+        self.ground_truth_version = _version(self.ground_truth)
+        self.document = GroundTruth.parse(self.ground_truth)
+        # Parsed messages.txt, kept in step by log_message instead of re-reading the file
+        self.message_log = MessageLog.parse(self._load_file("messages.txt"))
+        # Loaded on the first @mention, not per agent — most agents only ever classify
+        self.retrieval = RetrievalIndex(self.project_dir / INDEX_FILENAME)
 
     def _load_file(self, filename: str) -> str:
         path = self.project_dir / filename
@@ -32,8 +96,7 @@ class ProjectAgent:
         return ""
 
     def _write_file(self, filename: str, content: str) -> None:
-        path = self.project_dir / filename
-        path.write_text(content)
+        atomic_write(self.project_dir / filename, content)
 
     def initialize(self, members: list[dict]) -> str:
         """Set up ground truth with channel members. Returns confirmation message."""
@@ -59,13 +122,19 @@ class ProjectAgent:
             f"{DECISION_LOG_PLACEHOLDER}"
         )
 
-        self._write_file("ground_truth.txt", ground_truth)
-        self._write_file(
-            "messages.txt",
+        messages = (
             "# Important messages for {}\n"
-            "# Format: YYYY-MM-DD HH:MM | <@user_id> | slack_permalink | category | summary\n".format(self.name),
+            "# Format: YYYY-MM-DD HH:MM | <@user_id> | slack_permalink | category | summary\n".format(self.name)
         )
-        self.reload_ground_truth()
+        self._write_file("ground_truth.txt", ground_truth)
+        self._write_file("messages.txt", messages)
+        self._set_ground_truth(ground_truth)
+        self.message_log = MessageLog.parse(messages)
+        # A re-initialized project starts a fresh retrieval index from the new files; queued
+        # appends go out first so a later group commit can't recreate the old index
+        flush_journal(self.project_dir / INDEX_FILENAME)
+        (self.project_dir / INDEX_FILENAME).unlink(missing_ok=True)
+        self.retrieval = RetrievalIndex(self.project_dir / INDEX_FILENAME)
         return f"Initialized project *{self.name}* with {len(members)} team members."
 
     def set_role(self, user_id: str, role: str) -> str:
@@ -74,26 +143,85 @@ class ProjectAgent:
         if not path.exists():
             return "No ground truth file found. Run `@bot initialize` first."
 
-        content = path.read_text()
-        marker = f"(<@{user_id}>)"
-
-        for line in content.splitlines():
-            if marker in line:
-                # Build new line: keep name and ID, replace role
-                prefix = line.split(marker)[0] + marker
-                new_line = f"{prefix} — {role}"
-                content = content.replace(line, new_line)
-                self._write_file("ground_truth.txt", content)
-                self.reload_ground_truth()
-                return f"Updated your role: {role}"
+        updated = self.document.with_role(user_id, role)
+        if updated is None:
+            return f"Couldn't find <@{user_id}> in the Directory. Run `@bot initialize` first."
 
-        return f"Couldn't find <@{user_id}> in the Directory. Run `@bot initialize` first."
+        content = updated.render() + "\n"
+        self._write_file("ground_truth.txt", content)
+        self._set_ground_truth(content)
+        return f"Updated your role: {role}"
 
     def classify(self, user: str, message: str, history: str = "") -> str:
-        return classify_message(self.ground_truth, user, message, history)
+        if prefilter(message):
+            return "PASS"
+        key = self._classify_key(user, message)
+        cached = self._cached_classification(key)
+        if cached is not None:
+            return cached
+        result = classify_message(self.ground_truth, user, message, history)
+        record_shadow(message, result)
+        self._classify_cache.put(key, result)
+        return result
+
+    def classify_batch(self, messages: list[tuple[str, str]], history: str = "") -> list[str]:
+        """Classify several messages at once, only sending prefilter and cache misses to the model."""
+        keys = [self._classify_key(user, message) for user, message in messages]
+        results = [
+            "PASS" if prefilter(message) else self._cached_classification(key)
+            for (_, message), key in zip(messages, keys)
+        ]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            fresh = classify_messages(self.ground_truth, [messages[i] for i in misses], history)
+            for i, result in zip(misses, fresh):
+                results[i] = result
+                record_shadow(messages[i][1], result)
+                self._classify_cache.put(keys[i], result)
+        return [result or "PASS" for result in results]
+
+    def _classify_key(self, user: str, message: str) -> str:
+        normalized = " ".join(message.lower().split())
+        return hashlib.sha256(f"{self.ground_truth_version}\0{user}\0{normalized}".encode()).hexdigest()
+
+    def _cached_classification(self, key: str) -> str | None:
+        result = self._classify_cache.get(key)
+        incr("classify_cache.hits" if result is not None else "classify_cache.misses")
+        return result
 
     def respond(self, message: str, history: str = "") -> str:
-        return respond_to_mention(self.ground_truth, message, history, self.messages)
+        return respond_to_mention(self.ground_truth, message, history, self.messages_context(message))
+
+    def respond_stream(self, message: str, history: str = "") -> Iterator[str]:
+        return stream_response_to_mention(self.ground_truth, message, history, self.messages_context(message))
+
+    def messages_context(self, question: str) -> str:
+        """Top retrieved entries for the question, then recent important messages, within the token budget."""
+        if not self.retrieval.loaded:
+            self.retrieval.load(self._retrieval_seed())
+        lines: list[str] = []
+        used = 0
+        for document in self.retrieval.search(question, RETRIEVAL_TOP_K):
+            cost = estimate_tokens(document.text)
+            if used + cost <= RESPOND_CONTEXT_TOKEN_BUDGET:
+                lines.append(document.text)
+                used += cost
+        included = set(lines)
+        entries = self.message_log.select(
+            question,
+            RESPOND_CONTEXT_TOKEN_BUDGET - used,
+            RESPOND_CONTEXT_WINDOW_DAYS,
+            RESPOND_CONTEXT_HALF_LIFE_DAYS,
+        )
+        lines.extend(entry.line for entry in entries if entry.line not in included)
+        return "\n".join(lines)
+
+    def _retrieval_seed(self) -> list[tuple[str, str]]:
+        seed = [("message", entry.line) for entry in self.message_log.entries]
+        seed.extend(("decision", entry.line) for entry in self.document.decisions)
+        for event in read_events(self.project_dir / "events.db"):
+            seed.append(("event", f"{event['timestamp'][:16]} | {event['event_type']} | {event['category']} | {event['content']}"))
+        return seed
 
     def apply_update(self, update_text: str, approved_by: str) -> bool:
         """Append an accepted update to the AI Decision Log, then git commit.
@@ -103,93 +231,99 @@ class ProjectAgent:
         timestamp = datetime.now().strftime("%Y-%m-%d")
         entry = f"* **{timestamp}:** {update_text} (approved by <@{approved_by}>)"
 
-        path = self.project_dir / "ground_truth.txt"
-        content = path.read_text() if path.exists() else ""
-
-        if DECISION_LOG_PLACEHOLDER in content:
-            content = content.replace(DECISION_LOG_PLACEHOLDER, entry + "\n")
-        else:
-            content = content.rstrip() + "\n" + entry + "\n"
+        content = self.document.with_decision(entry, DECISION_LOG_PLACEHOLDER).render() + "\n"
 
         self._write_file("ground_truth.txt", content)
-        self.reload_ground_truth()
+        self._set_ground_truth(content)
+        self.retrieval.add("decision", entry)
         self._git_commit(update_text, approved_by)
         return self.check_compaction()
 
     def check_compaction(self) -> bool:
-        """Return True if ground truth exceeds the word limit."""
-        return len(self.ground_truth.split()) > MAX_GROUND_TRUTH_WORDS
+        """Return True if ground truth exceeds the token budget."""
+        return estimate_tokens(self.ground_truth) > GROUND_TRUTH_TOKEN_BUDGET
 
     def compact(self) -> str:
         """Compress the ground truth via LLM and save the result."""
-        compacted = compact_ground_truth(self.ground_truth)
+        base_version, compacted = self.draft_compaction()
+        self.apply_compaction(compacted, base_version)
+        return compacted
+
+    def draft_compaction(self) -> tuple[str, str]:
+        """Compress the ground truth via LLM without saving it.
+
+        Returns (version it was based on, compacted text). Safe to run off the
+        request thread — it only reads a snapshot of the current ground truth.
+        """
+        base_version, ground_truth, document = self.ground_truth_version, self.ground_truth, self.document
+        count = self._rollup_count(document) if COMPACTION_MODE == "incremental" else 0
+        if count:
+            oldest = "\n".join(entry.line for entry in document.decisions[:count])
+            summary = summarize_decisions(oldest, COMPACTION_SUMMARY_MAX_TOKENS)
+            return base_version, document.with_rolled_up_decisions(count, summary).render() + "\n"
+        return base_version, compact_ground_truth(ground_truth)
+
+    @staticmethod
+    def _rollup_count(document: GroundTruth) -> int:
+        """How many of the oldest Decision Log entries to roll up, or 0 to rewrite the whole document."""
+        target = int(GROUND_TRUTH_TOKEN_BUDGET * COMPACTION_TARGET_RATIO)
+        excess = estimate_tokens(document.render()) - target + COMPACTION_SUMMARY_MAX_TOKENS
+        removed = 0
+        # The newest entry always stays; if the rest of the log can't cover the excess, the
+        # bulk is in Objective/Directory and only a full rewrite helps
+        for count, entry in enumerate(document.decisions[:-1], start=1):
+            removed += estimate_tokens(entry.line)
+            if removed >= excess:
+                return count
+        return 0
+
+    def apply_compaction(self, compacted: str, base_version: str) -> bool:
+        """Save an approved compaction. Returns False if the ground truth changed since the draft."""
+        if base_version != self.ground_truth_version:
+            return False
         self._write_file("ground_truth.txt", compacted)
-        self.reload_ground_truth()
+        self._set_ground_truth(compacted)
         self._git_commit("compacted ground truth", "bot")
-        return compacted
+        return True
 
     def log_message(self, user: str, permalink: str, category: str, summary: str) -> None:
         """Append an important message entry to messages.txt."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
         line = f"{timestamp} | <@{user}> | {permalink} | {category} | {summary}\n"
-        path = self.project_dir / "messages.txt"
-        with open(path, "a") as f:
-            f.write(line)
-        self.messages = self._load_file("messages.txt")
+        append_line(self.project_dir / "messages.txt", line)
+        # Keep the parsed log in step with the file instead of re-reading it
+        entry = line.strip()
+        if entry:
+            self.message_log.append(entry)
+            self.retrieval.add("message", entry)
 
     def _git_commit(self, summary: str, approved_by: str) -> None:
-        """Commit ground truth to a project-specific branch via a temporary worktree.
+        """Queue the current ground truth for a commit on the project/<name> branch.
 
-        Uses a worktree so we never touch the working tree — avoids conflicts
-        with whatever the developer has checked out locally.
+        The committer writes it off the request thread and folds rapid approvals together.
         """
-        branch = f"project/{self.name}"
-        gt_path = self.project_dir / "ground_truth.txt"
-        worktree_dir = None
-
-        try:
-            # Create branch from HEAD if it doesn't exist
-            if subprocess.run(
-                ["git", "rev-parse", "--verify", branch], capture_output=True
-            ).returncode != 0:
-                subprocess.run(["git", "branch", branch], check=True, capture_output=True)
-
-            worktree_dir = Path(tempfile.mkdtemp(prefix="gt-"))
-            subprocess.run(
-                ["git", "worktree", "add", str(worktree_dir), branch],
-                check=True, capture_output=True,
-            )
-
-            # Copy ground truth into worktree at the repo-relative path
-            gt_rel = f"projects/{self.name}/ground_truth.txt"
-            dest = worktree_dir / gt_rel
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(str(gt_path), str(dest))
-
-            subprocess.run(
-                ["git", "-C", str(worktree_dir), "add", gt_rel],
-                check=True, capture_output=True,
-            )
-            subprocess.run(
-                ["git", "-C", str(worktree_dir), "commit", "-m",
-                 f"ground truth: {summary} (approved by {approved_by})"],
-                check=True, capture_output=True,
-            )
-            log.info("Committed ground truth to branch %s: %s", branch, summary)
-        except Exception as e:
-            log.debug("Git commit skipped: %s", e)
-        finally:
-            if worktree_dir:
-                subprocess.run(
-                    ["git", "worktree", "remove", "--force", str(worktree_dir)],
-                    capture_output=True,
-                )
+        content = (self.project_dir / "ground_truth.txt").read_text()
+        submit_commit(self.name, content, summary, approved_by)
 
     def validate_directory(self, channel_members: list[str]) -> list[str]:
         """Return user IDs listed in directory but not in the channel."""
-        directory_ids = re.findall(r"<@(U[A-Z0-9]+)>", self.ground_truth)
-        return [uid for uid in directory_ids if uid not in channel_members]
+        members = set(channel_members)
+        return [uid for uid in self.document.directory if uid not in members]
 
     def reload_ground_truth(self) -> None:
-        self.ground_truth = self._load_file("ground_truth.txt")
-        self.messages = self._load_file("messages.txt")
+        """Re-read both files from disk, e.g. after they were edited by hand."""
+        self._set_ground_truth(self._load_file("ground_truth.txt"))
+        self.message_log = MessageLog.parse(self._load_file("messages.txt"))
+
+    def _set_ground_truth(self, content: str) -> None:
+        self.ground_truth = content.strip()
+        version = _version(self.ground_truth)
+        if version != self.ground_truth_version:
+            self.document = GroundTruth.parse(self.ground_truth)
+            # Old entries can never match the new version's keys — drop them now rather than wait for LRU
+            self.ground_truth_version = version
+            self._classify_cache.clear()
+
+
+def _version(ground_truth: str) -> str:
+    return hashlib.sha256(ground_truth.encode()).hexdigest()[:16]
@@ -0,0 +1,107 @@
+"""Prompt templates loaded once, validated at startup, and hot-reloaded on mtime change."""
+
+import logging
+import string
+import threading
+import time
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# Resolved from the package location, not the working directory
+PROMPTS_DIR = Path(__file__).resolve().parents[2] / "prompts"
+# At most one stat() per template per interval — editing a prompt still takes effect
+# within a couple of seconds, but steady-state message handling does no file I/O.
+PROMPT_RELOAD_CHECK_SECONDS = 2.0
+
+# Every template and the exact placeholders it must contain. A missing or unexpected
+# field would otherwise only surface as a KeyError on the first message that uses it.
+REQUIRED_PLACEHOLDERS: dict[str, set[str]] = {
+    "classify.md": {"ground_truth"},
+    "classify_message.md": {"history", "user", "message"},
+    "classify_batch.md": {"history", "messages"},
+    "compaction.md": set(),
+    "compaction_decisions.md": set(),
+    "pr_alignment.md": {"ground_truth"},
+    "pr_alignment_details.md": {"author_name", "author_role", "pr_title", "commits"},
+    "respond.md": {"ground_truth"},
+    "respond_context.md": {"messages", "history"},
+    "misalign.md": {"misalign_content"},
+    "nudge.md": {"nudge_content"},
+}
+
+
+class PromptTemplateError(ValueError):
+    pass
+
+
+def _placeholders(template: str) -> set[str]:
+    return {field for _, field, _, _ in string.Formatter().parse(template) if field is not None}
+
+
+class PromptRegistry:
+    def __init__(self, directory: Path, required: dict[str, set[str]]) -> None:
+        self.directory = directory
+        self.required = required
+        self._lock = threading.Lock()
+        # name -> (text, mtime_ns, last_checked)
+        self._templates: dict[str, tuple[str, int, float]] = {}
+
+    def get(self, name: str) -> str:
+        now = time.monotonic()
+        cached = self._templates.get(name)
+        if cached and now - cached[2] < PROMPT_RELOAD_CHECK_SECONDS:
+            return cached[0]
+        with self._lock:
+            path = self.directory / name
+            mtime = path.stat().st_mtime_ns
+            cached = self._templates.get(name)
+            if cached and cached[1] == mtime:
+                text = cached[0]
+            else:
+                text = path.read_text()
+                self._validate(name, text)
+                if cached:
+                    log.info("Reloaded prompt %s", name)
+            self._templates[name] = (text, mtime, now)
+            return text
+
+    def render(self, name: str, **fields: str) -> str:
+        return self.get(name).format(**fields)
+
+    def load_all(self) -> None:
+        """Load and validate every known template, raising on the first problem."""
+        for name in self.required:
+            if not (self.directory / name).exists():
+                raise PromptTemplateError(f"Prompt template {name} not found in {self.directory}")
+            self.get(name)
+
+    def _validate(self, name: str, text: str) -> None:
+        try:
+            found = _placeholders(text)
+        except ValueError as e:
+            raise PromptTemplateError(f"Prompt {name} is not a valid template: {e}") from e
+        expected = self.required.get(name)
+        if expected is None:
+            return
+        missing = expected - found
+        unexpected = found - expected
+        if missing or unexpected:
+            raise PromptTemplateError(
+                f"Prompt {name} placeholders don't match: missing {sorted(missing)}, unexpected {sorted(unexpected)}"
+            )
+
+
+_registry = PromptRegistry(PROMPTS_DIR, REQUIRED_PLACEHOLDERS)
+
+
+def get_prompt(name: str) -> str:
+    return _registry.get(name)
+
+
+def render_prompt(name: str, **fields: str) -> str:
+    return _registry.render(name, **fields)
+
+
+def validate_prompts() -> None:
+    _registry.load_all()
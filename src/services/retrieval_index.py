@@ -0,0 +1,172 @@
+"""Per-project BM25 retrieval over important messages, Decision Log entries and events.
+
+Documents live in projects/<name>/retrieval.jsonl, one JSON object per line with
+their term counts, so loading never re-tokenizes and adding a document is a single
+journal append. The first load builds the file from messages.txt, the Decision Log
+and events.db; after that log_message / apply_update add documents incrementally.
+
+Scoring walks only the postings of the query terms. With NumPy installed the
+per-term updates and the top-k selection are vectorized; without it the same
+scores are accumulated in a dict.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.models.message_log import tokenize
+from src.stores.journal import append_line, atomic_write, flush_journal
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional — pure-Python scoring gives identical results
+    np = None
+
+log = logging.getLogger(__name__)
+
+INDEX_FILENAME = "retrieval.jsonl"
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+@dataclass(frozen=True)
+class RetrievedDocument:
+    source: str  # "message", "decision" or "event"
+    text: str
+    score: float
+
+
+class RetrievalIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._sources: list[str] = []
+        self._texts: list[str] = []
+        self._lengths: list[int] = []
+        self._seen: set[str] = set()
+        # term -> (doc ids, term frequencies), appended in doc id order
+        self._postings: dict[str, tuple[list[int], list[int]]] = {}
+        self._total_length = 0
+        self._arrays: dict[str, tuple] = {}  # term -> numpy (ids, tfs), rebuilt lazily after appends
+        self._length_array = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def load(self, seed: list[tuple[str, str]]) -> None:
+        """Load the on-disk index, or build it from `seed` (source, text) pairs if there is none."""
+        with self._lock:
+            if self._loaded:
+                return
+            # Documents add() queued under group commit belong to the file being read
+            flush_journal(self.path)
+            if self.path.exists():
+                for line in self.path.read_text().splitlines():
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # a torn last line from a crash — the rest is still valid
+                    self._insert(record["source"], record["text"], record["terms"])
+            else:
+                records = []
+                for source, text in seed:
+                    terms = dict(Counter(tokenize(text)))
+                    if self._insert(source, text, terms):
+                        records.append(_record(source, text, terms))
+                atomic_write(self.path, "".join(records))
+                log.info("Built retrieval index %s with %d documents", self.path, len(records))
+            self._loaded = True
+
+    def add(self, source: str, text: str) -> None:
+        """Index one new document. Before the first load, only the on-disk file is extended."""
+        text = text.strip()
+        if not text:
+            return
+        terms = dict(Counter(tokenize(text)))
+        with self._lock:
+            if self._loaded:
+                if self._insert(source, text, terms):
+                    append_line(self.path, _record(source, text, terms))
+            elif self.path.exists():
+                append_line(self.path, _record(source, text, terms))
+            # Otherwise the first load builds the file from the current project state
+
+    def search(self, query: str, k: int) -> list[RetrievedDocument]:
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._texts)
+            if not count or not terms or k <= 0:
+                return []
+            scorer = self._search_numpy if np is not None else self._search_python
+            ranked = scorer([t for t in terms if t in self._postings], count, k)
+            return [RetrievedDocument(self._sources[i], self._texts[i], score) for i, score in ranked]
+
+    def _insert(self, source: str, text: str, terms: dict[str, int]) -> bool:
+        digest = hashlib.sha1(" ".join(text.lower().split()).encode()).hexdigest()
+        if digest in self._seen:
+            return False
+        self._seen.add(digest)
+        doc_id = len(self._texts)
+        self._sources.append(source)
+        self._texts.append(text)
+        length = sum(terms.values())
+        self._lengths.append(length)
+        self._total_length += length
+        for term, tf in terms.items():
+            ids, tfs = self._postings.setdefault(term, ([], []))
+            ids.append(doc_id)
+            tfs.append(tf)
+            self._arrays.pop(term, None)
+        self._length_array = None
+        return True
+
+    def _idf(self, term: str, count: int) -> float:
+        df = len(self._postings[term][0])
+        return math.log(1 + (count - df + 0.5) / (df + 0.5))
+
+    def _search_python(self, terms: list[str], count: int, k: int) -> list[tuple[int, float]]:
+        avg_length = self._total_length / count or 1.0
+        scores: dict[int, float] = {}
+        for term in terms:
+            idf = self._idf(term, count)
+            ids, tfs = self._postings[term]
+            for doc_id, tf in zip(ids, tfs):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:k]
+
+    def _search_numpy(self, terms: list[str], count: int, k: int) -> list[tuple[int, float]]:
+        assert np is not None  # search() only picks this scorer when NumPy imported
+        if self._length_array is None:
+            self._length_array = np.asarray(self._lengths, dtype=np.float64)
+        avg_length = self._total_length / count or 1.0
+        scores = np.zeros(count, dtype=np.float64)
+        for term in terms:
+            if term not in self._arrays:
+                ids, tfs = self._postings[term]
+                self._arrays[term] = (np.asarray(ids, dtype=np.int64), np.asarray(tfs, dtype=np.float64))
+            ids, tfs = self._arrays[term]
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._length_array[ids] / avg_length)
+            # Each doc appears once per term's postings, so fancy-index += is safe
+            scores[ids] += self._idf(term, count) * tfs * (BM25_K1 + 1) / (tfs + norm)
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        # Score desc, newer doc first on ties — same as the pure-Python path
+        order = sorted(matched.tolist(), key=lambda i: (-scores[i], -i))
+        return [(i, float(scores[i])) for i in order]
+
+
+def _record(source: str, text: str, terms: dict[str, int]) -> str:
+    return json.dumps({"source": source, "text": text, "terms": terms}) + "\n"
@@ -1,12 +1,40 @@
+import logging
+import queue
 import sqlite3
+import threading
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from typing import Any
+
+from src.utils.metrics import incr, timed
+
+log = logging.getLogger(__name__)
 
 PROJECTS_DIR = Path("projects")
 
 # One SQLite DB per project — keeps projects isolated and avoids cross-project queries.
-# Connections are pooled for the process lifetime since SQLite handles are lightweight.
-_connections: dict[str, sqlite3.Connection] = {}
+# Each DB runs in WAL mode with a single writer thread: writes are queued, applied in
+# one transaction per batch (group commit) and the caller waits only for that commit.
+# Readers use their own per-thread connections and never block on the writer.
+# Stores are pooled for the process lifetime, keyed by project name.
+_connections: dict[str, "EventStore"] = {}
+_connections_lock = threading.Lock()
+
+# Most queued writes the writer thread commits in one transaction; set by configure()
+DB_WRITE_BATCH_MAX = 256
+# A writer thread with nothing to do exits after this long; the next write restarts it
+DB_WRITER_IDLE_SECONDS = 30.0
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    # Durable at checkpoints, not every commit — a crash can lose only the last moments, never corrupt
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-16000",  # 16 MB
+    "PRAGMA mmap_size=268435456",  # 256 MB
+    "PRAGMA temp_store=MEMORY",
+)
 
 CREATE_EVENTS = """
 CREATE TABLE IF NOT EXISTS events (
@@ -22,18 +50,209 @@ CREATE TABLE IF NOT EXISTS events (
 )
 """
 
+# Proposals awaiting a reaction or reply, so they survive restarts. Keyed by the bot
+# message's ts within a kind ("update", "nudge", "compaction"); payload is the JSON record.
+CREATE_PENDING = """
+CREATE TABLE IF NOT EXISTS pending_approvals (
+    kind TEXT NOT NULL,
+    ts TEXT NOT NULL,
+    user TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (kind, ts)
+)
+"""
+CREATE_PENDING_USER_INDEX = "CREATE INDEX IF NOT EXISTS idx_pending_user ON pending_approvals (user, kind)"
+
+# Schema migrations, applied in order on open. PRAGMA user_version records how many
+# have run; each one runs in its own transaction together with the version bump.
+# Never edit a shipped migration — append a new one.
+MIGRATIONS: tuple[tuple[str, ...], ...] = (
+    # 1: base tables (databases created before versioning already have these)
+    (CREATE_EVENTS, CREATE_PENDING, CREATE_PENDING_USER_INDEX),
+    # 2: integer epoch timestamps for range scans, and indexes for the query API.
+    # `timestamp` was written as local time, hence the 'utc' modifier in the backfill.
+    (
+        "ALTER TABLE events ADD COLUMN ts_epoch INTEGER",
+        "UPDATE events SET ts_epoch = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)",
+        "CREATE INDEX idx_events_type_time ON events (event_type, ts_epoch)",
+        "CREATE INDEX idx_events_user_time ON events (user, ts_epoch)",
+        "CREATE INDEX idx_events_category ON events (category, ts_epoch)",
+    ),
+    # 3: daily event counts per type/category/reaction, maintained by log_event and
+    # update_reaction in the same transaction as the event row ('' = no reaction yet)
+    (
+        """
+        CREATE TABLE event_rollups (
+            day TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            category TEXT NOT NULL,
+            reaction TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (day, event_type, category, reaction)
+        ) WITHOUT ROWID
+        """,
+        "INSERT INTO event_rollups (day, event_type, category, reaction, count) "
+        "SELECT substr(timestamp, 1, 10), event_type, category, COALESCE(reaction, ''), COUNT(*) "
+        "FROM events GROUP BY 1, 2, 3, 4",
+    ),
+    # 4: a per-database sequence number stamped on each reaction change, so incremental
+    # exports can pick up events reacted to since their last run
+    (
+        "ALTER TABLE events ADD COLUMN reaction_seq INTEGER",
+        "UPDATE events SET reaction_seq = id WHERE reaction IS NOT NULL",
+        "CREATE INDEX idx_events_reaction_seq ON events (reaction_seq)",
+    ),
+)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Bring an autocommit connection's schema up to SCHEMA_VERSION. Returns the version it started at."""
+    start = conn.execute("PRAGMA user_version").fetchone()[0]
+    if start > SCHEMA_VERSION:
+        log.warning("Database schema v%d is newer than this code (v%d)", start, SCHEMA_VERSION)
+    for version in range(start + 1, SCHEMA_VERSION + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in MIGRATIONS[version - 1]:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return start
+
+
+class _Write:
+    def __init__(self, fn: Callable[[sqlite3.Connection], Any]) -> None:
+        self.fn = fn
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.done = threading.Event()
+
+
+class EventStore:
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode: transactions and savepoints are issued explicitly by the writer
+        self._writer = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._writer.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            self._writer.execute(pragma)
+        start = migrate(self._writer)
+        if 0 < start < SCHEMA_VERSION:
+            log.info("Migrated %s from schema v%d to v%d", db_path, start, SCHEMA_VERSION)
+        self._queue: queue.Queue[_Write] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._readers = threading.local()
+
+    def write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run `fn` on the writer connection inside the next group commit and return its result.
+
+        Each call gets its own savepoint, so one failing write doesn't roll back the rest of the batch.
+        """
+        op = _Write(fn)
+        with self._lock:
+            self._queue.put(op)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"db-{self.db_path.parent.name}", daemon=True)
+                self._thread.start()
+        op.done.wait()
+        if op.error is not None:
+            raise op.error
+        return op.result
+
+    def read(self) -> sqlite3.Connection:
+        """This thread's read connection (WAL readers see every committed write)."""
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in PRAGMAS[1:]:
+                conn.execute(pragma)
+            self._readers.conn = conn
+        return conn
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=DB_WRITER_IDLE_SECONDS)
+            except queue.Empty:
+                with self._lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            batch = [first]
+            while len(batch) < DB_WRITE_BATCH_MAX:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply(batch)
+
+    def _apply(self, batch: list[_Write]) -> None:
+        conn = self._writer
+        try:
+            with timed("db.commit"):
+                conn.execute("BEGIN IMMEDIATE")
+                for op in batch:
+                    conn.execute("SAVEPOINT op")
+                    try:
+                        op.result = op.fn(conn)
+                        conn.execute("RELEASE op")
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO op")
+                        conn.execute("RELEASE op")
+                        op.error = e
+                conn.execute("COMMIT")
+            incr("db.commits")
+            incr("db.writes", len(batch))
+        except Exception as e:
+            log.error("Commit to %s failed: %s", self.db_path, e)
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for op in batch:
+                op.error = op.error or e
+        finally:
+            for op in batch:
+                op.done.set()
+
+
+def configure(write_batch_max: int) -> None:
+    """Set the writer's group-commit batch limit (from AppConfig, once the environment is loaded)."""
+    global DB_WRITE_BATCH_MAX
+    DB_WRITE_BATCH_MAX = write_batch_max
+
+
+def _store(project_name: str) -> EventStore:
+    with _connections_lock:
+        store = _connections.get(project_name)
+        if store is None:
+            store = _connections[project_name] = EventStore(PROJECTS_DIR / project_name / "events.db")
+        return store
+
+
+def _bump_rollup(conn: sqlite3.Connection, day: str, event_type: str, category: str, reaction: str, delta: int) -> None:
+    conn.execute(
+        "INSERT INTO event_rollups (day, event_type, category, reaction, count) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT (day, event_type, category, reaction) DO UPDATE SET count = count + excluded.count",
+        (day, event_type, category, reaction, delta),
+    )
+    if delta < 0:
+        conn.execute(
+            "DELETE FROM event_rollups WHERE day = ? AND event_type = ? AND category = ? AND reaction = ? AND count <= 0",
+            (day, event_type, category, reaction),
+        )
+
 
 def get_db(project_name: str) -> sqlite3.Connection:
-    if project_name in _connections:
-        return _connections[project_name]
-    db_path = PROJECTS_DIR / project_name / "events.db"
-    db_path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(db_path), check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    conn.execute(CREATE_EVENTS)
-    conn.commit()
-    _connections[project_name] = conn
-    return conn
+    """A read connection for ad-hoc queries; writes go through the store's writer."""
+    return _store(project_name).read()
 
 
 def log_event(
@@ -44,23 +263,46 @@ def log_event(
     content: str,
     permalink: str,
 ) -> int:
-    conn = get_db(project)
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor = conn.execute(
-        "INSERT INTO events (timestamp, event_type, user, category, content, permalink) VALUES (?, ?, ?, ?, ?, ?)",
-        (timestamp, event_type, user, category, content, permalink),
-    )
-    conn.commit()
-    return cursor.lastrowid or 0
+    now = datetime.now()
+    timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+
+    def insert(conn: sqlite3.Connection) -> int:
+        event_id = conn.execute(
+            "INSERT INTO events (timestamp, ts_epoch, event_type, user, category, content, permalink) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (timestamp, int(now.timestamp()), event_type, user, category, content, permalink),
+        ).lastrowid or 0
+        _bump_rollup(conn, timestamp[:10], event_type, category, "", 1)
+        return event_id
+
+    return _store(project).write(insert)
 
 
 def update_reaction(project: str, event_id: int, reaction: str, reacted_by: str) -> None:
-    conn = get_db(project)
-    conn.execute(
-        "UPDATE events SET reaction = ?, reacted_by = ? WHERE id = ?",
-        (reaction, reacted_by, event_id),
-    )
-    conn.commit()
+    def update(conn: sqlite3.Connection) -> None:
+        row = conn.execute(
+            "SELECT timestamp, event_type, category, reaction FROM events WHERE id = ?", (event_id,)
+        ).fetchone()
+        if row is None:
+            return
+        conn.execute(
+            "UPDATE events SET reaction = ?, reacted_by = ?, "
+            "reaction_seq = (SELECT COALESCE(MAX(reaction_seq), 0) + 1 FROM events) WHERE id = ?",
+            (reaction, reacted_by, event_id),
+        )
+        day = row["timestamp"][:10]
+        _bump_rollup(conn, day, row["event_type"], row["category"], row["reaction"] or "", -1)
+        _bump_rollup(conn, day, row["event_type"], row["category"], reaction, 1)
+
+    _store(project).write(update)
+
+
+def get_rollups(project: str) -> list[dict]:
+    """Daily event counts per (event_type, category, reaction); reaction is '' until reacted to."""
+    rows = get_db(project).execute(
+        "SELECT day, event_type, category, reaction, count FROM event_rollups ORDER BY day"
+    ).fetchall()
+    return [dict(row) for row in rows]
 
 
 def get_events(project: str, limit: int = 50) -> list[dict]:
@@ -69,3 +311,163 @@ def get_events(project: str, limit: int = 50) -> list[dict]:
         "SELECT * FROM events ORDER BY id DESC LIMIT ?", (limit,)
     ).fetchall()
     return [dict(row) for row in rows]
+
+
+@dataclass(frozen=True)
+class EventQuery:
+    """Filters for query_events. Every field is optional; set fields are ANDed.
+
+    Times are naive local datetimes like the ones log_event records; `until` is exclusive.
+    `reaction` matches one reaction ("approved", "rejected"); `reacted` picks events
+    with (True) or without (False) any reaction. `after_id` and `reaction_seq_after`
+    are high-water marks for incremental readers: events logged, or reacted to,
+    after the ones they have already seen.
+    """
+    event_types: tuple[str, ...] = ()
+    user: str | None = None
+    category: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    reaction: str | None = None
+    reacted: bool | None = None
+    after_id: int | None = None
+    reaction_seq_after: int | None = None
+    limit: int = 100
+
+
+@dataclass
+class EventPage:
+    events: list[dict]
+    # Pass back to query_events for the next (older) page; None on the last page
+    next_cursor: str | None
+
+
+def query_events(project: str, query: EventQuery = EventQuery(), cursor: str | None = None) -> EventPage:
+    """One page of matching events, newest first, served from the type/user/category indexes.
+
+    Pagination is keyset-based on (ts_epoch, id), so later pages cost the same as the first
+    and events logged between calls never shift or repeat rows.
+    """
+    clauses: list[str] = []
+    params: list[Any] = []
+    if query.event_types:
+        clauses.append(f"event_type IN ({', '.join('?' * len(query.event_types))})")
+        params.extend(query.event_types)
+    if query.user is not None:
+        clauses.append("user = ?")
+        params.append(query.user)
+    if query.category is not None:
+        clauses.append("category = ?")
+        params.append(query.category)
+    if query.since is not None:
+        clauses.append("ts_epoch >= ?")
+        params.append(int(query.since.timestamp()))
+    if query.until is not None:
+        clauses.append("ts_epoch < ?")
+        params.append(int(query.until.timestamp()))
+    if query.reaction is not None:
+        clauses.append("reaction = ?")
+        params.append(query.reaction)
+    if query.reacted is not None:
+        clauses.append("reaction IS NOT NULL" if query.reacted else "reaction IS NULL")
+    if query.after_id is not None:
+        clauses.append("id > ?")
+        params.append(query.after_id)
+    if query.reaction_seq_after is not None:
+        clauses.append("reaction_seq > ?")
+        params.append(query.reaction_seq_after)
+    if cursor is not None:
+        epoch, _, event_id = cursor.partition(":")
+        clauses.append("(ts_epoch, id) < (?, ?)")
+        params.extend((int(epoch), int(event_id)))
+    where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+    rows = get_db(project).execute(
+        f"SELECT * FROM events {where}ORDER BY ts_epoch DESC, id DESC LIMIT ?",
+        (*params, query.limit + 1),
+    ).fetchall()
+    events = [dict(row) for row in rows[:query.limit]]
+    next_cursor = None
+    if len(rows) > query.limit and events:
+        next_cursor = f"{events[-1]['ts_epoch']}:{events[-1]['id']}"
+    return EventPage(events, next_cursor)
+
+
+def iter_events(project: str, query: EventQuery = EventQuery()) -> Iterator[dict]:
+    """Every matching event, newest first, fetched a page at a time."""
+    cursor = None
+    while True:
+        page = query_events(project, query, cursor)
+        yield from page.events
+        if page.next_cursor is None:
+            return
+        cursor = page.next_cursor
+
+
+def read_events(db_path: Path) -> list[dict]:
+    """Read every event from an existing events.db without creating it or pooling the connection."""
+    if not db_path.exists():
+        return []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(row) for row in conn.execute("SELECT * FROM events ORDER BY id")]
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def read_user_events(db_path: Path, user: str, limit: int) -> list[dict]:
+    """A user's newest events from an existing events.db, read-only like read_events.
+
+    Databases not yet at SCHEMA_VERSION are skipped rather than migrated; they catch up
+    the next time their project opens its store.
+    """
+    if not db_path.exists():
+        return []
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            return []
+        rows = conn.execute(
+            "SELECT * FROM events WHERE user = ? ORDER BY ts_epoch DESC, id DESC LIMIT ?", (user, limit)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+def list_projects() -> list[str]:
+    """Names of projects that already have an events.db."""
+    if not PROJECTS_DIR.exists():
+        return []
+    return sorted(path.parent.name for path in PROJECTS_DIR.glob("*/events.db"))
+
+
+def save_pending(project: str, kind: str, ts: str, user: str, created_at: float, payload: str) -> None:
+    _store(project).write(lambda conn: conn.execute(
+        "INSERT OR REPLACE INTO pending_approvals (kind, ts, user, created_at, payload) VALUES (?, ?, ?, ?, ?)",
+        (kind, ts, user, created_at, payload),
+    ))
+
+
+def delete_pending(project: str, kind: str, ts: str) -> None:
+    _store(project).write(
+        lambda conn: conn.execute("DELETE FROM pending_approvals WHERE kind = ? AND ts = ?", (kind, ts))
+    )
+
+
+def load_pending(project: str, kind: str, expires_before: float) -> list[dict]:
+    """Drop expired rows of this kind, then return the rest oldest first."""
+    store = _store(project)
+    store.write(lambda conn: conn.execute(
+        "DELETE FROM pending_approvals WHERE kind = ? AND created_at < ?", (kind, expires_before)
+    ))
+    rows = store.read().execute(
+        "SELECT ts, user, created_at, payload FROM pending_approvals WHERE kind = ? ORDER BY created_at",
+        (kind,),
+    ).fetchall()
+    return [dict(row) for row in rows]
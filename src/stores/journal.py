@@ -0,0 +1,130 @@
+"""Durable file writes for the per-project text files.
+
+- `atomic_write` rewrites a whole file via temp file + fsync + rename, so readers
+  never see a half-written ground truth.
+- `append_line` adds a line to an append-only journal (messages.txt). With
+  JOURNAL_GROUP_COMMIT_MS > 0, appends are buffered and a background thread
+  writes + fsyncs each batch once, so per-event cost stays constant no matter
+  how large the file grows. Readers of the file may lag by up to that interval.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# 0 writes + fsyncs each line on the caller's thread; set from AppConfig by configure()
+JOURNAL_GROUP_COMMIT_MS = 0
+
+
+def configure(group_commit_ms: int) -> None:
+    """Set the group-commit window for journals opened after this (from AppConfig)."""
+    global JOURNAL_GROUP_COMMIT_MS
+    JOURNAL_GROUP_COMMIT_MS = group_commit_ms
+
+
+def atomic_write(path: Path, content: str | bytes) -> None:
+    flush_journal(path)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+class JournalWriter:
+    def __init__(self, path: Path, group_commit_ms: int = 0) -> None:
+        self.path = path
+        self.group_commit_ms = group_commit_ms
+        self._pending: list[str] = []
+        self._lock = threading.Lock()
+        # Held from taking a batch until it is on disk, so concurrent flushes can't reorder lines
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = threading.Event()
+        self._thread: threading.Thread | None = None
+        if group_commit_ms > 0:
+            self._thread = threading.Thread(target=self._run, name=f"journal-{path.parent.name}", daemon=True)
+            self._thread.start()
+
+    def append(self, line: str) -> None:
+        if self._thread is None:
+            with self._write_lock:
+                self._write([line])
+            return
+        with self._lock:
+            self._pending.append(line)
+        self._wakeup.set()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if lines:
+                self._write(lines)
+
+    def close(self) -> None:
+        self._closed.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+        self.flush()
+
+    def _write(self, lines: list[str]) -> None:
+        # Opened per batch rather than held, so an atomic_write rename never strands the handle
+        with open(self.path, "a") as f:
+            f.write("".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Let the rest of the burst arrive, then commit it in one write + fsync;
+            # close() cuts the window short instead of waiting it out
+            self._closed.wait(self.group_commit_ms / 1000)
+            try:
+                self.flush()
+            except Exception as e:
+                log.error("Journal flush to %s failed: %s", self.path, e)
+
+
+_journals: dict[Path, JournalWriter] = {}
+_journals_lock = threading.Lock()
+
+
+def _journal(path: Path) -> JournalWriter:
+    key = path.resolve()
+    with _journals_lock:
+        writer = _journals.get(key)
+        if writer is None:
+            writer = _journals[key] = JournalWriter(key, JOURNAL_GROUP_COMMIT_MS)
+        return writer
+
+
+def append_line(path: Path, line: str) -> None:
+    _journal(path).append(line)
+
+
+def flush_journal(path: Path) -> None:
+    writer = _journals.get(path.resolve())
+    if writer:
+        writer.flush()
+
+
+def close_journals() -> None:
+    """Flush and stop every journal writer (shutdown, tests)."""
+    with _journals_lock:
+        writers = list(_journals.values())
+        _journals.clear()
+    for writer in writers:
+        writer.close()
@@ -0,0 +1,111 @@
+"""Pending approvals persisted in each project's events.db.
+
+A PendingStore behaves like the dicts it replaces (keyed by the bot message's ts),
+but every write goes through to SQLite, so proposals survive restarts and deploys.
+Nothing is read until the first lookup; then every project's rows of that kind are
+loaded once into ts and user indexes and kept in step with later writes.
+Entries older than PENDING_APPROVAL_TTL_DAYS are dropped on load and on lookup.
+"""
+
+import json
+import threading
+import time
+from collections.abc import Iterator, MutableMapping
+
+from src.stores.db import delete_pending, list_projects, load_pending, save_pending
+
+# Default until configure() applies AppConfig
+PENDING_APPROVAL_TTL_DAYS = 7.0
+
+
+def configure(ttl_days: float) -> None:
+    """Set how long proposals wait for a reaction (from AppConfig, once the environment is loaded)."""
+    global PENDING_APPROVAL_TTL_DAYS
+    PENDING_APPROVAL_TTL_DAYS = ttl_days
+
+
+class PendingStore(MutableMapping[str, dict]):
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._entries: dict[str, dict] = {}
+        self._created: dict[str, float] = {}
+        self._by_user: dict[str, set[str]] = {}
+
+    def __getitem__(self, ts: str) -> dict:
+        with self._lock:
+            self._ensure_loaded()
+            if ts not in self._entries or self._expire(ts):
+                raise KeyError(ts)
+            return self._entries[ts]
+
+    def __setitem__(self, ts: str, record: dict) -> None:
+        created_at = time.time()
+        save_pending(record["channel_name"], self.kind, ts, record.get("user", ""), created_at, json.dumps(record))
+        with self._lock:
+            self._ensure_loaded()
+            self._forget(ts)
+            self._remember(ts, record, created_at)
+
+    def __delitem__(self, ts: str) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            record = self._entries[ts]
+            delete_pending(record["channel_name"], self.kind, ts)
+            self._forget(ts)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return iter([ts for ts in list(self._entries) if not self._expire(ts)])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(1 for _ in iter(self))
+
+    def count_for_user(self, user: str) -> int:
+        """Pending entries proposed for a user, via the user index."""
+        with self._lock:
+            self._ensure_loaded()
+            return sum(1 for ts in list(self._by_user.get(user, ())) if not self._expire(ts))
+
+    def clear(self) -> None:
+        """Forget the in-memory view; the next lookup reloads from the project stores.
+
+        Rows in SQLite are left alone — this is for tests and for picking up a
+        different PROJECTS_DIR, not for discarding proposals.
+        """
+        with self._lock:
+            self._loaded = False
+            self._entries.clear()
+            self._created.clear()
+            self._by_user.clear()
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        cutoff = time.time() - PENDING_APPROVAL_TTL_DAYS * 86400
+        for project in list_projects():
+            for row in load_pending(project, self.kind, cutoff):
+                self._remember(row["ts"], json.loads(row["payload"]), row["created_at"])
+        self._loaded = True
+
+    def _remember(self, ts: str, record: dict, created_at: float) -> None:
+        self._entries[ts] = record
+        self._created[ts] = created_at
+        self._by_user.setdefault(record.get("user", ""), set()).add(ts)
+
+    def _forget(self, ts: str) -> None:
+        record = self._entries.pop(ts, None)
+        self._created.pop(ts, None)
+        if record is not None:
+            self._by_user.get(record.get("user", ""), set()).discard(ts)
+
+    def _expire(self, ts: str) -> bool:
+        """Drop the entry if it's past its TTL. Returns True if it was expired."""
+        if time.time() - self._created[ts] < PENDING_APPROVAL_TTL_DAYS * 86400:
+            return False
+        delete_pending(self._entries[ts]["channel_name"], self.kind, ts)
+        self._forget(ts)
+        return True
@@ -0,0 +1,104 @@
+"""Process-wide channel id <-> name directory shared by the Slack handlers and the PR monitor."""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Channel names rarely change and renames arrive as channel_rename events,
+# so an hour is only a safety net for events we missed while disconnected.
+CHANNEL_CACHE_TTL_SECONDS = 60 * 60
+
+# channel_id -> (name, expires_at) and name -> (channel_id, expires_at)
+_names: dict[str, tuple[str, float]] = {}
+_ids: dict[str, tuple[str, float]] = {}
+# Monotonic time of the last full conversations_list walk — bounds re-listing on lookup misses
+_last_listed: float | None = None
+_lock = threading.Lock()
+
+
+def _store(channel_id: str, name: str) -> None:
+    expires_at = time.monotonic() + CHANNEL_CACHE_TTL_SECONDS
+    old = _names.get(channel_id)
+    if old and old[0] != name:
+        _ids.pop(old[0], None)
+    _names[channel_id] = (name, expires_at)
+    _ids[name] = (channel_id, expires_at)
+
+
+def _lookup(table: dict[str, tuple[str, float]], key: str) -> str | None:
+    entry = table.get(key)
+    if entry and entry[1] > time.monotonic():
+        return entry[0]
+    return None
+
+
+def warm_up(client) -> int:
+    """Bulk-load every public channel via paginated conversations_list. Returns channels cached."""
+    global _last_listed
+    count = 0
+    try:
+        for page in client.conversations_list(types="public_channel", limit=200):
+            with _lock:
+                for ch in page["channels"]:
+                    _store(ch["id"], ch["name"])
+                    count += 1
+    except Exception as e:
+        log.error("Failed to list channels: %s", e)
+        return count
+    with _lock:
+        _last_listed = time.monotonic()
+    log.info("Channel directory warmed with %d channels", count)
+    return count
+
+
+def resolve_channel_name(client, channel_id: str) -> str:
+    """Return the channel's name, falling back to the ID if Slack can't resolve it."""
+    with _lock:
+        name = _lookup(_names, channel_id)
+    if name:
+        return name
+    try:
+        response = client.conversations_info(channel=channel_id)
+        name = response["channel"]["name"]
+    except Exception:
+        return channel_id
+    with _lock:
+        _store(channel_id, name)
+    return name
+
+
+def resolve_channel_id(client, channel_name: str) -> str | None:
+    """Return the ID for a channel name, re-listing channels at most once per TTL on a miss."""
+    with _lock:
+        channel_id = _lookup(_ids, channel_name)
+        listed_recently = (
+            _last_listed is not None
+            and time.monotonic() - _last_listed < CHANNEL_CACHE_TTL_SECONDS
+        )
+    if channel_id or listed_recently:
+        return channel_id
+    warm_up(client)
+    with _lock:
+        return _lookup(_ids, channel_name)
+
+
+def handle_channel_rename(event: dict) -> None:
+    """Apply a channel_rename event so the old name stops resolving immediately."""
+    channel = event.get("channel", {})
+    channel_id = channel.get("id")
+    name = channel.get("name")
+    if not channel_id or not name:
+        return
+    with _lock:
+        _store(channel_id, name)
+    log.info("Channel %s renamed to #%s", channel_id, name)
+
+
+def clear_channels() -> None:
+    global _last_listed
+    with _lock:
+        _names.clear()
+        _ids.clear()
+        _last_listed = None
@@ -1,16 +1,28 @@
-def fetch_context(client, channel_id: str) -> str:
-    """Fetch last 20 channel messages from Slack, formatted for LLM context.
+import threading
+import time
+from collections import deque
 
-    No local storage — Slack is the storage layer. This keeps the bot stateless
-    and means context is always fresh, even after restarts.
-    """
-    response = client.conversations_history(channel=channel_id, limit=20)
+# How many human messages the LLM sees as context — matches the Slack backfill size.
+HISTORY_LIMIT = 20
+# If a channel has been quiet this long we may have missed events (disconnects, restarts),
+# so the next read backfills from Slack instead of trusting the buffer.
+HISTORY_MAX_IDLE_SECONDS = 15 * 60
+
+# Per-channel ring buffers of (ts, user, text), oldest first. Fed by incoming message
+# events so the hot path never needs a conversations_history round-trip.
+_buffers: dict[str, deque[tuple[str, str, str]]] = {}
+_last_seen: dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def _fetch_messages(client, channel_id: str) -> list[tuple[str, str, str]]:
+    response = client.conversations_history(channel=channel_id, limit=HISTORY_LIMIT)
     messages = response.get("messages", [])
 
     # Slack returns newest-first; reverse so the LLM sees conversation in chronological order
     messages.reverse()
 
-    lines = []
+    entries = []
     for msg in messages:
         # Filter out bot messages to prevent the LLM from referencing its own responses
         if msg.get("bot_id") or msg.get("subtype"):
@@ -18,6 +30,60 @@ def fetch_context(client, channel_id: str) -> str:
         user = msg.get("user", "unknown")
         text = msg.get("text", "")
         if text:
-            lines.append(f"<@{user}>: {text}")
+            entries.append((msg.get("ts", ""), user, text))
+    return entries
+
+
+def _format(entries) -> str:
+    return "\n".join(f"<@{user}>: {text}" for _, user, text in entries)
+
+
+def record_message(event: dict) -> None:
+    """Append an incoming human message event to its channel's buffer.
+
+    Cold channels are left alone — the first read backfills from Slack, which
+    already includes this message.
+    """
+    if event.get("bot_id") or event.get("subtype"):
+        return
+    # Thread replies never show up in conversations_history, so keep them out of context too
+    if event.get("thread_ts") and event.get("thread_ts") != event.get("ts"):
+        return
+    text = event.get("text", "")
+    channel_id = event.get("channel", "")
+    if not text or not channel_id:
+        return
+
+    with _lock:
+        buffer = _buffers.get(channel_id)
+        if buffer is None or _is_stale(channel_id):
+            return
+        ts = event.get("ts", "")
+        if any(entry[0] == ts for entry in buffer):
+            return
+        buffer.append((ts, event.get("user", "unknown"), text))
+        _last_seen[channel_id] = time.monotonic()
+
+
+def get_context(client, channel_id: str) -> str:
+    """Return recent channel context from the local buffer, backfilling from Slack when cold."""
+    with _lock:
+        if channel_id in _buffers and not _is_stale(channel_id):
+            return _format(_buffers[channel_id])
+
+    entries = _fetch_messages(client, channel_id)
+    with _lock:
+        _buffers[channel_id] = deque(entries, maxlen=HISTORY_LIMIT)
+        _last_seen[channel_id] = time.monotonic()
+        return _format(_buffers[channel_id])
+
+
+def _is_stale(channel_id: str) -> bool:
+    last = _last_seen.get(channel_id)
+    return last is None or time.monotonic() - last > HISTORY_MAX_IDLE_SECONDS
+
 
-    return "\n".join(lines)
+def clear_history() -> None:
+    with _lock:
+        _buffers.clear()
+        _last_seen.clear()
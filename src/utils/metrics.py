@@ -0,0 +1,67 @@
+"""In-process counters, gauges and stage latencies, surfaced via `@bot metrics`."""
+
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+
+_lock = threading.Lock()
+_counters: dict[str, int] = {}
+# stage -> [count, total_seconds, max_seconds]
+_latencies: dict[str, list[float]] = {}
+# Gauges are sampled lazily at snapshot time (e.g. queue depth)
+_gauges: dict[str, Callable[[], float]] = {}
+
+
+def incr(name: str, amount: int = 1) -> None:
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def record_latency(stage: str, seconds: float) -> None:
+    with _lock:
+        stats = _latencies.setdefault(stage, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        record_latency(stage, time.monotonic() - start)
+
+
+def register_gauge(name: str, fn: Callable[[], float]) -> None:
+    with _lock:
+        _gauges[name] = fn
+
+
+def snapshot() -> dict:
+    """Return a point-in-time copy of all metrics. Latencies are reported in milliseconds."""
+    with _lock:
+        counters = dict(_counters)
+        latencies = {
+            stage: {
+                "count": int(count),
+                "avg_ms": round(total / count * 1000) if count else 0,
+                "max_ms": round(peak * 1000),
+            }
+            for stage, (count, total, peak) in _latencies.items()
+        }
+        gauges = dict(_gauges)
+    return {
+        "counters": counters,
+        "latencies": latencies,
+        "gauges": {name: fn() for name, fn in gauges.items()},
+    }
+
+
+def reset_metrics() -> None:
+    with _lock:
+        _counters.clear()
+        _latencies.clear()
+        _gauges.clear()
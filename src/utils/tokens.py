@@ -0,0 +1,21 @@
+"""Local, dependency-free token count estimate for budgeting prompt sections."""
+
+import re
+
+_PIECE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count: common words are one token, long words and numbers
+    split every few characters, and each punctuation mark or symbol is its own token.
+    Errs slightly high on prose, which is the safe side for a budget.
+    """
+    count = 0
+    for piece in _PIECE.findall(text):
+        if piece[0].isalpha():
+            count += 1 + len(piece) // 8
+        elif piece[0].isdigit():
+            count += 1 + (len(piece) - 1) // 3
+        else:
+            count += 1
+    return count
@@ -0,0 +1,110 @@
+"""Process-wide Slack user directory, bulk-loaded via users_list and kept fresh by user_change events."""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Profile edits arrive as user_change events; the TTL only bounds drift from missed events
+USER_DIRECTORY_TTL_SECONDS = 6 * 60 * 60
+# Below this many unknown users, individual users_info calls beat paging the whole workspace
+BULK_FETCH_THRESHOLD = 20
+PAGE_LIMIT = 200
+
+_users: dict[str, dict] = {}
+_listed_at: float | None = None
+_lock = threading.Lock()
+
+
+def _next_cursor(response) -> str:
+    cursor = (response.get("response_metadata") or {}).get("next_cursor")
+    # Only a real, non-empty cursor string means there is another page
+    return cursor if isinstance(cursor, str) else ""
+
+
+def _member(user: dict) -> dict:
+    return {
+        "id": user.get("id", ""),
+        "name": user.get("name", ""),
+        "real_name": user.get("real_name", ""),
+        "title": user.get("profile", {}).get("title", ""),
+        "is_bot": bool(user.get("is_bot")) or user.get("id") == "USLACKBOT",
+        "deleted": bool(user.get("deleted")),
+    }
+
+
+def _is_fresh() -> bool:
+    return _listed_at is not None and time.monotonic() - _listed_at < USER_DIRECTORY_TTL_SECONDS
+
+
+def warm_up_users(client) -> int:
+    """Load the whole workspace directory via paginated users_list. Returns users cached."""
+    global _listed_at
+    cursor = ""
+    count = 0
+    while True:
+        response = client.users_list(limit=PAGE_LIMIT, cursor=cursor) if cursor else client.users_list(limit=PAGE_LIMIT)
+        with _lock:
+            for user in response.get("members", []):
+                _users[user["id"]] = _member(user)
+                count += 1
+        cursor = _next_cursor(response)
+        if not cursor:
+            break
+    with _lock:
+        _listed_at = time.monotonic()
+    log.info("User directory loaded with %d users", count)
+    return count
+
+
+def get_users(client, user_ids: list[str]) -> list[dict]:
+    """Return directory entries for the given IDs, in order, fetching only what's missing."""
+    with _lock:
+        missing = [uid for uid in user_ids if uid not in _users]
+        fresh = _is_fresh()
+    if missing and not fresh and len(missing) > BULK_FETCH_THRESHOLD:
+        warm_up_users(client)
+        with _lock:
+            missing = [uid for uid in user_ids if uid not in _users]
+    for user_id in missing:
+        try:
+            info = client.users_info(user=user_id)
+        except Exception as e:
+            log.warning("Failed to fetch user %s: %s", user_id, e)
+            continue
+        with _lock:
+            _users[user_id] = _member(info.get("user", {}))
+    with _lock:
+        return [_users[uid] for uid in user_ids if uid in _users]
+
+
+def channel_member_ids(client, channel_id: str) -> list[str]:
+    """Walk every page of conversations_members for a channel."""
+    member_ids: list[str] = []
+    cursor = ""
+    while True:
+        if cursor:
+            response = client.conversations_members(channel=channel_id, limit=PAGE_LIMIT, cursor=cursor)
+        else:
+            response = client.conversations_members(channel=channel_id, limit=PAGE_LIMIT)
+        member_ids.extend(response.get("members", []))
+        cursor = _next_cursor(response)
+        if not cursor:
+            return member_ids
+
+
+def handle_user_change(event: dict) -> None:
+    """Apply user_change / team_join events so the directory never needs a re-list for edits."""
+    user = event.get("user")
+    if not isinstance(user, dict) or not user.get("id"):
+        return
+    with _lock:
+        _users[user["id"]] = _member(user)
+
+
+def clear_users() -> None:
+    global _listed_at
+    with _lock:
+        _users.clear()
+        _listed_at = None
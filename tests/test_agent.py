@@ -2,7 +2,9 @@ import tempfile
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
-from src.services.project_service import ProjectAgent
+from src.models.message_log import MessageLog
+from src.services.project_service import ProjectAgent, configure_respond_context, configure_retrieval
+from src.stores.journal import close_journals
 
 # --- log_message tests ---
 
@@ -27,48 +29,88 @@ def test_log_message_updates_agent_messages():
             agent = ProjectAgent("testproject")
             agent.initialize([])
             agent.log_message("U123", "https://slack.com/archives/C1/p111", "blocker", "CI broken")
-    assert "CI broken" in agent.messages
+    assert [entry.summary for entry in agent.message_log.entries] == ["CI broken"]
 
 
-# --- _git_commit tests ---
-
+def test_log_message_keeps_memory_in_step_with_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.initialize([])
+            with patch.object(agent, "_load_file", wraps=agent._load_file) as mock_load:
+                agent.log_message("U1", "https://slack.com/archives/C1/p1", "decision", "Use Postgres")
+                agent.log_message("U2", "https://slack.com/archives/C1/p2", "blocker", "CI broken")
+            mock_load.assert_not_called()
+            on_disk = Path(tmp, "testproject", "messages.txt").read_text().strip()
+    assert [entry.line for entry in agent.message_log.entries] == [
+        entry.line for entry in MessageLog.parse(on_disk).entries
+    ]
 
-@patch("src.services.project_service.subprocess.run")
-def test_git_commit_uses_project_branch(mock_run):
-    # rev-parse returns non-zero (branch doesn't exist), rest succeed
-    check_result = MagicMock(returncode=1)
-    mock_run.return_value = check_result
 
+def test_respond_passes_bounded_messages_context():
     with tempfile.TemporaryDirectory() as tmp:
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
             agent = ProjectAgent("testproject")
             agent.initialize([])
-            # Reset to clear any calls from initialize
-            mock_run.reset_mock()
-            mock_run.return_value = MagicMock(returncode=1)
-            agent._git_commit("Switch to Postgres", "U123")
+            agent.log_message("U1", "https://slack.com/archives/C1/p1", "decision", "Use Postgres")
+            with (
+                patch("src.services.project_service.RESPOND_CONTEXT_TOKEN_BUDGET", 1500),
+                patch("src.services.project_service.respond_to_mention", return_value="ok") as mock_respond,
+            ):
+                configure_respond_context(0, 30, 7)
+                agent.respond("what database?")
+            assert mock_respond.call_args[0][3] == ""
+            with patch("src.services.project_service.respond_to_mention", return_value="ok") as mock_respond:
+                agent.respond("what database?")
+            assert "Use Postgres" in mock_respond.call_args[0][3]
+            assert "# Important messages" not in mock_respond.call_args[0][3]
+
+
+def test_respond_includes_old_entries_found_by_retrieval():
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.initialize([{"id": "U1", "real_name": "Alex", "name": "alex", "title": ""}])
+            with patch.object(agent, "_git_commit"):
+                agent.apply_update("Auth goes through Okta", "U1")
+            with patch("src.services.project_service.RESPOND_CONTEXT_WINDOW_DAYS", 0):
+                context = agent.messages_context("what did we decide about okta?")
+            agent.log_message("U1", "https://slack.com/archives/C1/p1", "pivot", "Dropping the mobile app")
+            later = agent.messages_context("mobile app?")
+            index_exists = Path(tmp, "testproject", "retrieval.jsonl").exists()
+    assert "Auth goes through Okta" in context
+    assert later.splitlines()[0].endswith("Dropping the mobile app")
+    assert index_exists
+
+
+def test_configure_retrieval_zero_leaves_out_retrieved_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.initialize([{"id": "U1", "real_name": "Alex", "name": "alex", "title": ""}])
+            with patch.object(agent, "_git_commit"):
+                agent.apply_update("Auth goes through Okta", "U1")
+            with (
+                patch("src.services.project_service.RETRIEVAL_TOP_K", 8),
+                patch("src.services.project_service.RESPOND_CONTEXT_WINDOW_DAYS", 0),
+            ):
+                configure_retrieval(0)
+                context = agent.messages_context("what did we decide about okta?")
+    assert "Auth goes through Okta" not in context
+
 
-    calls = [str(c) for c in mock_run.call_args_list]
-    # Should check if branch exists
-    assert any("rev-parse" in c and "project/testproject" in c for c in calls)
-    # Should create branch (since rev-parse returned non-zero)
-    assert any("'git', 'branch', 'project/testproject'" in c for c in calls)
-    # Should create worktree
-    assert any("worktree" in c and "add" in c for c in calls)
-    # Should commit
-    assert any("commit" in c for c in calls)
-    # Should clean up worktree in finally
-    assert any("worktree" in c and "remove" in c for c in calls)
+# --- _git_commit tests ---
 
 
-@patch("src.services.project_service.subprocess.run", side_effect=Exception("git not found"))
-def test_git_commit_skips_silently_on_failure(mock_run):
+@patch("src.services.project_service.submit_commit")
+def test_git_commit_queues_current_ground_truth(mock_submit):
     with tempfile.TemporaryDirectory() as tmp:
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
             agent = ProjectAgent("testproject")
             agent.initialize([])
-            # Should not raise
-            agent._git_commit("test", "U123")
+            agent._git_commit("Switch to Postgres", "U123")
+            on_disk = Path(tmp, "testproject", "ground_truth.txt").read_text()
+    mock_submit.assert_called_once_with("testproject", on_disk, "Switch to Postgres", "U123")
 
 
 # --- validate_directory tests ---
@@ -115,10 +157,12 @@ def test_loads_messages_file():
         project_dir = Path(tmp, "myproject")
         project_dir.mkdir()
         (project_dir / "ground_truth.txt").write_text("")
-        (project_dir / "messages.txt").write_text("https://slack.com/archives/C1/p123 - pivot decision")
+        (project_dir / "messages.txt").write_text(
+            "2024-05-01 10:00 | <@U1> | https://slack.com/archives/C1/p123 | pivot | pivot decision\n"
+        )
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
             agent = ProjectAgent("myproject")
-    assert "pivot decision" in agent.messages
+    assert [entry.summary for entry in agent.message_log.entries] == ["pivot decision"]
 
 
 def test_missing_files_return_empty():
@@ -126,7 +170,7 @@ def test_missing_files_return_empty():
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
             agent = ProjectAgent("nonexistent")
     assert agent.ground_truth == ""
-    assert agent.messages == ""
+    assert len(agent.message_log) == 0
 
 
 def test_initialize_creates_ground_truth_with_members():
@@ -169,7 +213,22 @@ def test_initialize_reloads_ground_truth():
             assert "Alex" in agent.ground_truth
 
 
-@patch("src.services.project_service.subprocess.run")
+def test_initialize_discards_index_appends_pending_in_group_commit():
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.initialize([])
+            agent.messages_context("anything")  # loads the retrieval index
+            with patch("src.stores.journal.JOURNAL_GROUP_COMMIT_MS", 60_000):
+                agent.log_message("U1", "https://slack.com/archives/C1/p1", "pivot", "Dropping the mobile app")
+                agent.initialize([])
+                close_journals()
+            index_path = Path(tmp, "testproject", "retrieval.jsonl")
+            stale = index_path.exists() and "mobile" in index_path.read_text()
+    assert not stale
+
+
+@patch("src.services.project_service.submit_commit")
 def test_apply_update_replaces_placeholder(mock_run):
     with tempfile.TemporaryDirectory() as tmp:
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
@@ -182,7 +241,7 @@ def test_apply_update_replaces_placeholder(mock_run):
     assert "(Bot will populate this as decisions are made)" not in content
 
 
-@patch("src.services.project_service.subprocess.run")
+@patch("src.services.project_service.submit_commit")
 def test_apply_update_appends_when_no_placeholder(mock_run):
     with tempfile.TemporaryDirectory() as tmp:
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
@@ -224,3 +283,54 @@ def test_set_role_unknown_user():
             agent.initialize([])
             result = agent.set_role("U999", "Some role")
     assert "Couldn't find" in result
+
+
+# --- classification cache tests ---
+
+
+@patch("src.services.project_service.classify_message", return_value="PASS")
+def test_classify_reuses_result_for_repeated_message(mock_classify):
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.initialize([])
+            assert agent.classify("U1", "Standup in 5", "history a") == "PASS"
+            assert agent.classify("U1", "  standup   in 5 ", "history b") == "PASS"
+    mock_classify.assert_called_once()
+
+
+@patch("src.services.project_service.classify_message", return_value="PASS")
+def test_classify_cache_is_per_user(mock_classify):
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.classify("U1", "standup in 5")
+            agent.classify("U2", "standup in 5")
+    assert mock_classify.call_count == 2
+
+
+@patch("src.services.project_service.submit_commit")
+@patch("src.services.project_service.classify_message", return_value="PASS")
+def test_classify_cache_invalidated_by_ground_truth_changes(mock_classify, _mock_run):
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.initialize([{"id": "U111", "real_name": "Alex", "name": "alex", "title": ""}])
+            agent.classify("U1", "standup in 5")
+            agent.apply_update("Switch to PostgreSQL", "U111")
+            agent.classify("U1", "standup in 5")
+            agent.set_role("U111", "Backend")
+            agent.classify("U1", "standup in 5")
+    assert mock_classify.call_count == 3
+
+
+@patch("src.services.project_service.classify_messages", return_value=["QUESTION|blocker: which?"])
+@patch("src.services.project_service.classify_message", return_value="PASS")
+def test_classify_batch_only_sends_cache_misses(_mock_single, mock_batch):
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.classify("U1", "standup in 5")
+            results = agent.classify_batch([("U1", "standup in 5"), ("U2", "change the API?")])
+    assert results == ["PASS", "QUESTION|blocker: which?"]
+    mock_batch.assert_called_once_with("", [("U2", "change the API?")], "")
@@ -10,14 +10,20 @@ from src.handlers.slack_events import (
     _format_diff,
     _get_agent,
     _parse_category,
+    _pending_compactions,
     _pending_nudges,
     _pending_updates,
+    _propose_compaction,
+    _run_deploy,
+    configure_streaming,
     handle_app_mention,
     handle_message,
     handle_reaction,
     register_handlers,
 )
+from src.services.project_service import GROUND_TRUTH_TOKEN_BUDGET
 from src.stores.db import _connections, get_events, log_event
+from src.utils.users import clear_users
 
 
 @contextmanager
@@ -25,25 +31,27 @@ def _project_env():
     """Real ProjectAgent + SQLite in a temp dir.
 
     Only mocks external boundaries: Slack API (resolve channel, fetch history),
-    git subprocess. LLM calls must be patched per-test.
+    git commits. LLM calls must be patched per-test.
     """
     with tempfile.TemporaryDirectory() as tmp:
         tmp_path = Path(tmp)
         with (
             patch("src.services.project_service.PROJECTS_DIR", tmp_path),
             patch("src.stores.db.PROJECTS_DIR", tmp_path),
-            patch("src.services.project_service.subprocess.run"),
+            patch("src.services.project_service.submit_commit"),
             patch("src.handlers.slack_events._resolve_channel_name", return_value="test-channel"),
-            patch("src.handlers.slack_events.fetch_context", return_value=""),
+            patch("src.handlers.slack_events.get_context", return_value=""),
         ):
             _agents.clear()
             _pending_updates.clear()
             _pending_nudges.clear()
+            _pending_compactions.clear()
             _connections.clear()
             yield tmp_path
             _agents.clear()
             _pending_updates.clear()
             _pending_nudges.clear()
+            _pending_compactions.clear()
             _connections.clear()
 
 
@@ -57,6 +65,8 @@ def test_register_handlers_adds_events():
     assert "app_mention" in calls
     assert "message" in calls
     assert "reaction_added" in calls
+    assert "channel_rename" in calls
+    assert "user_change" in calls
 
 
 def test_build_permalink():
@@ -349,3 +359,305 @@ def test_text_approval_case_insensitive():
             result = _check_text_approval({"channel": "C123", "user": "U456", "text": word, "thread_ts": ts}, MagicMock(), MagicMock())
             assert result is True, f"Failed for word: {word}"
             assert ts not in _pending_updates
+
+
+def test_register_handlers_with_pipeline_enqueues():
+    app = MagicMock()
+    pipeline = MagicMock()
+    register_handlers(app, pipeline)
+    kinds = [c[0][0] for c in pipeline.wrap.call_args_list]
+    assert kinds == ["app_mention", "message", "reaction_added"]
+
+
+def test_handle_app_mention_metrics_command():
+    say = MagicMock()
+    with patch("src.handlers.slack_events._resolve_channel_name", return_value="test-channel"):
+        handle_app_mention({"channel": "C123", "user": "U123", "text": "<@BOT123> metrics", "ts": "123.456"}, MagicMock(), say)
+    say.assert_called_once()
+    assert "Bot metrics" in say.call_args[0][0]
+
+
+@patch("src.services.project_service.classify_messages", return_value=["PASS", "ROUTE|escalation: <@U999> | needs DB help"])
+def test_handle_message_batched_results_fan_out(_mock_llm):
+    from src.services.classify_batcher import ClassifyBatcher
+
+    with _project_env():
+        batcher = ClassifyBatcher(window_seconds=60)
+        register_handlers(MagicMock(), batcher=batcher)
+        say = MagicMock()
+        try:
+            handle_message({"channel": "C123", "user": "U123", "text": "morning", "ts": "1.000"}, MagicMock(), say)
+            handle_message({"channel": "C123", "user": "U124", "text": "who handles DB?", "ts": "2.000"}, MagicMock(), say)
+            say.assert_not_called()
+            batcher.flush("C123")
+        finally:
+            register_handlers(MagicMock())
+        say.assert_called_once()
+        assert "<@U999>" in say.call_args[0][0]
+        assert say.call_args[1]["thread_ts"] == "2.000"
+        events = get_events("test-channel")
+        assert events[0]["event_type"] == "ROUTE"
+
+
+def test_handle_app_mention_streams_into_placeholder():
+    with _project_env():
+        agent = _get_agent("test-channel")
+        say = MagicMock(return_value={"ts": "555.000"})
+        client = MagicMock()
+        with (
+            patch("src.handlers.slack_events.STREAM_MENTIONS", True),
+            patch("src.handlers.slack_events.STREAM_UPDATE_INTERVAL_SECONDS", 0),
+            patch.object(agent, "respond_stream", return_value=iter(["The goal ", "is the MVP. ", "\n"])),
+        ):
+            handle_app_mention({"channel": "C123", "user": "U123", "text": "what's our goal?", "ts": "123.456"}, client, say)
+        say.assert_called_once()
+        assert say.call_args[1]["thread_ts"] == "123.456"
+        updates = [c[1]["text"] for c in client.chat_update.call_args_list]
+        assert updates[0] == "The goal "
+        assert updates[-1] == "The goal is the MVP."
+        assert all(c[1]["ts"] == "555.000" for c in client.chat_update.call_args_list)
+
+
+def test_register_handlers_uses_the_given_job_runner():
+    from src.handlers import slack_events
+    from src.services.job_runner import JobRunner
+
+    runner = JobRunner(workers=1)
+    with patch.object(slack_events, "_jobs", MagicMock()) as default:
+        register_handlers(MagicMock(), jobs=runner)
+        assert slack_events._jobs is runner
+    default.shutdown.assert_called_once_with(wait=False)
+    runner.shutdown()
+
+
+def test_configure_streaming_turns_streaming_on():
+    with _project_env():
+        agent = _get_agent("test-channel")
+        client = MagicMock()
+        with (
+            patch("src.handlers.slack_events.STREAM_MENTIONS", False),
+            patch("src.handlers.slack_events.STREAM_UPDATE_INTERVAL_SECONDS", 1.0),
+            patch.object(agent, "respond_stream", return_value=iter(["The goal is the MVP."])),
+        ):
+            configure_streaming(True, 0)
+            handle_app_mention(
+                {"channel": "C123", "user": "U123", "text": "what's our goal?", "ts": "123.456"},
+                client, MagicMock(return_value={"ts": "555.000"}),
+            )
+        assert client.chat_update.call_args[1]["text"] == "The goal is the MVP."
+
+
+def test_stream_updates_are_throttled():
+    with _project_env():
+        agent = _get_agent("test-channel")
+        client = MagicMock()
+        with (
+            patch("src.handlers.slack_events.STREAM_MENTIONS", True),
+            patch("src.handlers.slack_events.STREAM_UPDATE_INTERVAL_SECONDS", 3600),
+            patch.object(agent, "respond_stream", return_value=iter(["a", "b", "c"])),
+        ):
+            handle_app_mention({"channel": "C123", "user": "U123", "text": "hi", "ts": "1.0"}, client, MagicMock(return_value={"ts": "2.0"}))
+        client.chat_update.assert_called_once_with(channel="C123", ts="2.0", text="abc")
+
+
+def test_interrupted_stream_is_marked_as_partial():
+    def broken_stream():
+        yield "The goal is"
+        raise RuntimeError("connection reset")
+
+    with _project_env():
+        agent = _get_agent("test-channel")
+        client = MagicMock()
+        with (
+            patch("src.handlers.slack_events.STREAM_MENTIONS", True),
+            patch.object(agent, "respond_stream", return_value=broken_stream()),
+        ):
+            handle_app_mention({"channel": "C123", "user": "U123", "text": "hi", "ts": "1.0"}, client, MagicMock(return_value={"ts": "2.0"}))
+        final = client.chat_update.call_args[1]["text"]
+        assert final.startswith("The goal is")
+        assert "Answer interrupted" in final
+
+
+def test_handle_app_mention_initialize_uses_user_directory():
+    clear_users()
+    with _project_env():
+        client = MagicMock()
+        client.conversations_members.return_value = {"members": ["U1", "B1"]}
+        client.users_info.side_effect = [
+            {"user": {"id": "U1", "name": "alex", "real_name": "Alex", "profile": {"title": "Backend"}}},
+            {"user": {"id": "B1", "name": "bot", "is_bot": True, "profile": {}}},
+        ]
+        say = MagicMock()
+        handle_app_mention({"channel": "C123", "user": "U1", "text": "<@BOT> initialize", "ts": "1.0"}, client, say)
+        assert "1 team members" in say.call_args_list[0][0][0]
+        assert "(<@U1>) — Backend" in _agents["test-channel"].ground_truth
+    clear_users()
+
+
+# --- Background compaction ---
+
+
+def _oversized_agent():
+    agent = _get_agent("test-channel")
+    agent.initialize([{"id": "U1", "real_name": "Alex", "name": "alex", "title": ""}])
+    agent._write_file("ground_truth.txt", agent.ground_truth + "\n" + "word " * (GROUND_TRUTH_TOKEN_BUDGET + 100))
+    agent.reload_ground_truth()
+    return agent
+
+
+def test_approval_schedules_compaction_without_waiting():
+    with _project_env():
+        _oversized_agent()
+        event_id = log_event("test-channel", "UPDATE", "U1", "decision", "Use Postgres", "https://x")
+        _pending_updates["999.000"] = {
+            "update_text": "Use Postgres", "channel_name": "test-channel", "channel_id": "C123",
+            "thread_ts": "123.456", "category": "decision", "user": "U1", "permalink": "https://x",
+            "event_id": event_id,
+        }
+        client = MagicMock()
+        with (
+            patch("src.handlers.slack_events._jobs") as mock_jobs,
+            patch("src.services.project_service.compact_ground_truth") as mock_compact,
+        ):
+            _check_text_approval({"thread_ts": "999.000", "text": "yes", "channel": "C123", "user": "U2"}, client, MagicMock())
+        mock_compact.assert_not_called()
+        assert mock_jobs.submit.call_args[0][0] == "compaction:test-channel"
+        assert "Ground truth updated" in client.chat_postMessage.call_args[1]["text"]
+
+
+def test_compaction_draft_waits_for_approval():
+    with _project_env():
+        agent = _oversized_agent()
+        original = agent.ground_truth
+        client = MagicMock()
+        client.chat_postMessage.return_value = {"ts": "500.000"}
+        with patch("src.services.project_service.compact_ground_truth", return_value="# Compacted"):
+            _propose_compaction(agent, "C123", "123.456", client)
+        assert agent.ground_truth == original
+        assert _pending_compactions["500.000"]["compacted"] == "# Compacted"
+
+        handle_reaction({"reaction": "white_check_mark", "user": "U2", "item": {"ts": "500.000", "channel": "C123"}}, client, MagicMock())
+        assert agent.ground_truth == "# Compacted"
+        assert "500.000" not in _pending_compactions
+
+
+def test_compaction_redrafts_when_ground_truth_changes_mid_job():
+    with _project_env():
+        agent = _oversized_agent()
+        client = MagicMock()
+        client.chat_postMessage.return_value = {"ts": "500.000"}
+
+        def compact(ground_truth):
+            if "Late decision" not in agent.ground_truth:
+                agent.apply_update("Late decision", "U1")
+                return "# Stale draft"
+            return "# Fresh draft"
+
+        with patch("src.services.project_service.compact_ground_truth", side_effect=compact):
+            _propose_compaction(agent, "C123", "123.456", client)
+        assert _pending_compactions["500.000"]["compacted"] == "# Fresh draft"
+        assert client.chat_postMessage.call_count == 1
+
+
+def test_stale_compaction_is_not_applied():
+    with _project_env():
+        agent = _oversized_agent()
+        client = MagicMock()
+        client.chat_postMessage.return_value = {"ts": "500.000"}
+        with patch("src.services.project_service.compact_ground_truth", return_value="# Compacted"):
+            _propose_compaction(agent, "C123", "123.456", client)
+        agent.apply_update("Approved after the draft", "U1")
+        handle_reaction({"reaction": "white_check_mark", "user": "U2", "item": {"ts": "500.000", "channel": "C123"}}, client, MagicMock())
+        assert "Approved after the draft" in agent.ground_truth
+        assert "changed since this draft" in client.chat_postMessage.call_args[1]["text"]
+
+
+@patch("src.services.project_service.classify_message", return_value="UPDATE|decision: Switch to PostgreSQL")
+def test_pending_update_survives_restart(_mock_llm):
+    with _project_env():
+        say = MagicMock(return_value={"ts": "999.000"})
+        handle_message({"channel": "C123", "user": "U123", "text": "let's use postgres", "ts": "123.456"}, MagicMock(), say)
+        # Simulate a restart: in-memory state is gone, SQLite is not
+        _agents.clear()
+        _pending_updates.clear()
+        client = MagicMock()
+        client.conversations_members.return_value = {"members": ["U123"]}
+        handle_reaction({"reaction": "white_check_mark", "user": "U456", "item": {"ts": "999.000", "channel": "C123"}}, client, MagicMock())
+        assert "Switch to PostgreSQL" in _agents["test-channel"].ground_truth
+        assert "999.000" not in _pending_updates
+
+
+def test_dashboard_mention_queues_deploy_and_reports_in_thread():
+    client = MagicMock()
+    client.chat_postMessage.return_value = {"ts": "700.000"}
+    with (
+        patch("src.handlers.slack_events._resolve_channel_name", return_value="test-channel"),
+        patch("src.handlers.slack_events._jobs") as mock_jobs,
+        patch("src.handlers.slack_events.deploy", return_value="https://dash.example") as mock_deploy,
+    ):
+        mock_jobs.in_flight.return_value = False
+        say = MagicMock()
+        handle_app_mention({"channel": "C123", "user": "U1", "text": "<@UBOT> dashboard", "ts": "123.456"}, client, say)
+        mock_deploy.assert_not_called()
+        assert mock_jobs.submit.call_args[0][0] == "dashboard-deploy"
+        assert mock_jobs.submit.call_args[1]["coalesce"] is True
+
+        mock_jobs.submit.call_args[0][2]()
+    assert mock_deploy.call_args[0][0] == ["test-channel"]
+    final = client.chat_postMessage.call_args[1]
+    assert final["thread_ts"] == "123.456"
+    assert final["text"] == ":white_check_mark: Dashboard deployed: https://dash.example?project=test-channel"
+    say.assert_not_called()
+
+
+def test_deploy_requests_queued_during_a_deploy_share_one_follow_up():
+    client = MagicMock()
+    client.chat_postMessage.side_effect = [{"ts": "701.000"}, {"ts": "702.000"}] + [{}] * 4
+    with (
+        patch("src.handlers.slack_events._resolve_channel_name", side_effect=["alpha", "beta"]),
+        patch("src.handlers.slack_events._jobs") as mock_jobs,
+        patch("src.handlers.slack_events.deploy", return_value="https://dash.example") as mock_deploy,
+    ):
+        mock_jobs.in_flight.return_value = True
+        handle_app_mention({"channel": "C1", "user": "U1", "text": "dashboard", "ts": "1.0"}, client, MagicMock())
+        handle_app_mention({"channel": "C2", "user": "U2", "text": "dashboard", "ts": "2.0"}, client, MagicMock())
+        assert "in progress" in client.chat_postMessage.call_args_list[0][1]["text"]
+        _run_deploy(client)
+        _run_deploy(client)  # the coalesced follow-up finds nothing left to do
+    mock_deploy.assert_called_once()
+    assert mock_deploy.call_args[0][0] == ["alpha", "beta"]
+    replies = {c[1]["thread_ts"]: c[1]["text"] for c in client.chat_postMessage.call_args_list[2:]}
+    assert replies == {
+        "1.0": ":white_check_mark: Dashboard deployed: https://dash.example?project=alpha",
+        "2.0": ":white_check_mark: Dashboard deployed: https://dash.example?project=beta",
+    }
+
+
+def test_failed_deploy_is_reported():
+    client = MagicMock()
+    client.chat_postMessage.return_value = {"ts": "700.000"}
+    with (
+        patch("src.handlers.slack_events._resolve_channel_name", return_value="test-channel"),
+        patch("src.handlers.slack_events._jobs") as mock_jobs,
+        patch("src.handlers.slack_events.deploy", side_effect=RuntimeError("wrangler missing")),
+    ):
+        mock_jobs.in_flight.return_value = False
+        handle_app_mention({"channel": "C123", "user": "U1", "text": "dashboard", "ts": "123.456"}, client, MagicMock())
+        mock_jobs.submit.call_args[0][2]()
+    assert client.chat_postMessage.call_args[1]["text"] == ":x: Dashboard deploy failed: wrangler missing"
+
+
+def test_failed_deploy_reply_does_not_stop_the_others():
+    client = MagicMock()
+    client.chat_postMessage.side_effect = [{"ts": "701.000"}, {"ts": "702.000"}, RuntimeError("channel_not_found"), {}]
+    with (
+        patch("src.handlers.slack_events._resolve_channel_name", side_effect=["alpha", "beta"]),
+        patch("src.handlers.slack_events._jobs") as mock_jobs,
+        patch("src.handlers.slack_events.deploy", side_effect=RuntimeError("wrangler missing")),
+    ):
+        mock_jobs.in_flight.return_value = True
+        handle_app_mention({"channel": "C1", "user": "U1", "text": "dashboard", "ts": "1.0"}, client, MagicMock())
+        handle_app_mention({"channel": "C2", "user": "U2", "text": "dashboard", "ts": "2.0"}, client, MagicMock())
+        _run_deploy(client)
+    last = client.chat_postMessage.call_args_list[-1][1]
+    assert (last["thread_ts"], last["text"]) == ("2.0", ":x: Dashboard deploy failed: wrangler missing")
@@ -0,0 +1,75 @@
+from unittest.mock import MagicMock, patch
+
+from src.utils.channels import (
+    clear_channels,
+    handle_channel_rename,
+    resolve_channel_id,
+    resolve_channel_name,
+    warm_up,
+)
+
+
+def _client_with_channels(channels: list[dict]) -> MagicMock:
+    client = MagicMock()
+    client.conversations_list.return_value = [{"channels": channels}]
+    return client
+
+
+def test_warm_up_populates_both_directions():
+    clear_channels()
+    client = _client_with_channels([{"id": "C1", "name": "general"}, {"id": "C2", "name": "eng"}])
+    assert warm_up(client) == 2
+    assert resolve_channel_name(client, "C2") == "eng"
+    assert resolve_channel_id(client, "general") == "C1"
+    client.conversations_info.assert_not_called()
+    client.conversations_list.assert_called_once()
+    clear_channels()
+
+
+def test_resolve_channel_name_caches_conversations_info():
+    clear_channels()
+    client = MagicMock()
+    client.conversations_info.return_value = {"channel": {"name": "eng"}}
+    assert resolve_channel_name(client, "C2") == "eng"
+    assert resolve_channel_name(client, "C2") == "eng"
+    client.conversations_info.assert_called_once()
+    clear_channels()
+
+
+def test_resolve_channel_name_falls_back_to_id():
+    clear_channels()
+    client = MagicMock()
+    client.conversations_info.side_effect = Exception("channel_not_found")
+    assert resolve_channel_name(client, "C404") == "C404"
+    clear_channels()
+
+
+def test_resolve_channel_id_miss_does_not_relist_within_ttl():
+    clear_channels()
+    client = _client_with_channels([{"id": "C1", "name": "general"}])
+    assert resolve_channel_id(client, "missing") is None
+    assert resolve_channel_id(client, "missing") is None
+    client.conversations_list.assert_called_once()
+    clear_channels()
+
+
+def test_expired_entries_are_refetched():
+    clear_channels()
+    client = MagicMock()
+    client.conversations_info.return_value = {"channel": {"name": "eng"}}
+    with patch("src.utils.channels.CHANNEL_CACHE_TTL_SECONDS", -1):
+        resolve_channel_name(client, "C2")
+        resolve_channel_name(client, "C2")
+    assert client.conversations_info.call_count == 2
+    clear_channels()
+
+
+def test_channel_rename_invalidates_old_name():
+    clear_channels()
+    client = _client_with_channels([{"id": "C1", "name": "old-name"}])
+    warm_up(client)
+    handle_channel_rename({"type": "channel_rename", "channel": {"id": "C1", "name": "new-name"}})
+    assert resolve_channel_name(client, "C1") == "new-name"
+    assert resolve_channel_id(client, "new-name") == "C1"
+    assert resolve_channel_id(client, "old-name") is None
+    clear_channels()
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+from src.services.classify_batcher import ClassifyBatcher
+
+
+def _agent(batch_results: list[str] | None = None) -> MagicMock:
+    agent = MagicMock()
+    agent.name = "test-channel"
+    agent.classify.return_value = "PASS"
+    agent.classify_batch.return_value = batch_results or []
+    return agent
+
+
+def test_messages_in_window_share_one_call():
+    agent = _agent(["PASS", "QUESTION|blocker: which API?"])
+    results: list[str] = []
+    batcher = ClassifyBatcher(window_seconds=60)
+    batcher.submit(agent, "C1", "U1", "standup in 5", "", results.append)
+    batcher.submit(agent, "C1", "U2", "changing the API", "", results.append)
+    batcher.flush("C1")
+    agent.classify_batch.assert_called_once_with([("U1", "standup in 5"), ("U2", "changing the API")], "")
+    agent.classify.assert_not_called()
+    assert results == ["PASS", "QUESTION|blocker: which API?"]
+
+
+def test_single_message_uses_regular_classify():
+    agent = _agent()
+    results: list[str] = []
+    batcher = ClassifyBatcher(window_seconds=60)
+    batcher.submit(agent, "C1", "U1", "hello", "<@U0>: hi", results.append)
+    batcher.flush("C1")
+    agent.classify.assert_called_once_with("U1", "hello", "<@U0>: hi")
+    agent.classify_batch.assert_not_called()
+    assert results == ["PASS"]
+
+
+def test_max_batch_flushes_immediately():
+    agent = _agent(["PASS", "PASS"])
+    results: list[str] = []
+    batcher = ClassifyBatcher(window_seconds=60, max_batch=2)
+    batcher.submit(agent, "C1", "U1", "one", "", results.append)
+    batcher.submit(agent, "C1", "U1", "two", "", results.append)
+    assert results == ["PASS", "PASS"]
+
+
+def test_channels_are_batched_separately():
+    agent = _agent()
+    batcher = ClassifyBatcher(window_seconds=60)
+    batcher.submit(agent, "C1", "U1", "one", "", MagicMock())
+    batcher.submit(agent, "C2", "U1", "two", "", MagicMock())
+    batcher.flush("C1")
+    batcher.flush("C2")
+    assert agent.classify.call_count == 2
+
+
+def test_failed_batch_falls_back_to_pass():
+    agent = _agent()
+    agent.classify_batch.side_effect = RuntimeError("overloaded")
+    results: list[str] = []
+    batcher = ClassifyBatcher(window_seconds=60)
+    batcher.submit(agent, "C1", "U1", "one", "", results.append)
+    batcher.submit(agent, "C1", "U1", "two", "", results.append)
+    batcher.flush("C1")
+    assert results == ["PASS", "PASS"]
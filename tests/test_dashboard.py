@@ -1,9 +1,23 @@
+import gzip
 import json
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import patch
 
-from src.services.dashboard_service import build_stats, parse_messages_txt, export
+from src.services.dashboard_service import (
+    LocalDirectoryBackend,
+    Manifest,
+    WranglerBackend,
+    build_stats,
+    deploy,
+    deploy_backend,
+    export,
+    export_all,
+    parse_messages_txt,
+)
+from src.stores.db import _connections, log_event, update_reaction
 
 
 def test_parse_messages_txt():
@@ -29,18 +43,19 @@ def test_parse_messages_txt_missing_file():
 
 
 def test_build_stats():
-    events = [
-        {"event_type": "UPDATE", "category": "decision", "timestamp": "2026-02-21 14:00:00", "reaction": "approved"},
-        {"event_type": "MISALIGN", "category": "pivot", "timestamp": "2026-02-21 15:00:00", "reaction": "rejected"},
-        {"event_type": "ROUTE", "category": "escalation", "timestamp": "2026-02-22 10:00:00", "reaction": None},
+    rollups = [
+        {"day": "2026-02-21", "event_type": "UPDATE", "category": "decision", "reaction": "approved", "count": 2},
+        {"day": "2026-02-21", "event_type": "MISALIGN", "category": "pivot", "reaction": "rejected", "count": 2},
+        {"day": "2026-02-22", "event_type": "ROUTE", "category": "escalation", "reaction": "", "count": 1},
     ]
-    stats = build_stats(events)
-    assert stats["total_events"] == 3
-    assert stats["by_type"]["UPDATE"] == 1
-    assert stats["by_type"]["MISALIGN"] == 1
+    stats = build_stats(rollups)
+    assert stats["total_events"] == 5
+    assert stats["by_type"]["UPDATE"] == 2
+    assert stats["by_type"]["MISALIGN"] == 2
     assert stats["by_type"]["ROUTE"] == 1
-    assert stats["total_approved"] == 1
-    assert stats["total_with_reaction"] == 2
+    assert stats["by_day"] == {"2026-02-21": 4, "2026-02-22": 1}
+    assert stats["total_approved"] == 2
+    assert stats["total_with_reaction"] == 4
     assert stats["acceptance_rate"] == 50
 
 
@@ -50,7 +65,16 @@ def test_build_stats_empty():
     assert stats["acceptance_rate"] == 0
 
 
-def test_export_writes_json_files():
+def _read_shards(dashboard_dir: Path, manifest: Manifest, kind: str) -> list[dict]:
+    records = []
+    for month in sorted(manifest["shards"][kind]):
+        path = dashboard_dir / "projects" / manifest["project"] / manifest["shards"][kind][month]["file"]
+        data = path.read_bytes()
+        records.extend(json.loads(gzip.decompress(data) if path.suffix == ".gz" else data))
+    return records
+
+
+def test_export_writes_manifest_and_shards():
     with tempfile.TemporaryDirectory() as tmp:
         # Create a project with messages.txt
         project_dir = Path(tmp) / "testproject"
@@ -66,16 +90,206 @@ def test_export_writes_json_files():
             with patch("src.services.dashboard_service.DASHBOARD_DIR", dashboard_dir):
                 export("testproject")
 
-        assert (dashboard_dir / "meta.json").exists()
-        assert (dashboard_dir / "timeline.json").exists()
-        assert (dashboard_dir / "changes.json").exists()
-        assert (dashboard_dir / "misalignments.json").exists()
-        assert (dashboard_dir / "stats.json").exists()
+        manifest = json.loads((dashboard_dir / "projects" / "testproject" / "manifest.json").read_text())
+        index = json.loads((dashboard_dir / "index.json").read_text())
+        assert index["projects"][0]["name"] == "testproject"
+        assert index["projects"][0]["manifest"] == "projects/testproject/manifest.json"
+        assert manifest["project"] == "testproject"
+        assert manifest["shards"]["timeline"] == {"2026-02": {"file": "timeline/2026-02.json", "count": 1}}
+        assert manifest["stats"] == {}
 
-        meta = json.loads((dashboard_dir / "meta.json").read_text())
-        assert meta["project"] == "testproject"
-
-        timeline = json.loads((dashboard_dir / "timeline.json").read_text())
+        timeline = _read_shards(dashboard_dir, manifest, "timeline")
         assert len(timeline) == 1
         assert timeline[0]["summary"] == "test entry"
         assert timeline[0]["project"] == "testproject"
+
+
+def test_export_stats_count_every_event():
+    _connections.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        dashboard_dir = Path(tmp) / "dashboard" / "data"
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            for i in range(600):
+                event_id = log_event("testproject", "UPDATE", "U1", "decision", f"update {i}", "link")
+                if i % 2:
+                    update_reaction("testproject", event_id, "approved", "U2")
+            with patch("src.services.dashboard_service.DASHBOARD_DIR", dashboard_dir):
+                manifest = export("testproject")
+            changes = _read_shards(dashboard_dir, manifest, "changes")
+    stats = manifest["stats"]["testproject"]
+    assert stats["total_events"] == 600
+    assert stats["total_with_reaction"] == 300
+    assert stats["acceptance_rate"] == 100
+    assert [c["content"] for c in changes] == [f"update {i}" for i in range(600)]
+
+
+def test_incremental_export_appends_new_data_and_updates_reactions():
+    _connections.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        project_dir = Path(tmp) / "testproject"
+        project_dir.mkdir()
+        messages = project_dir / "messages.txt"
+        messages.write_text("# messages\n2026-01-10 09:00 | <@U1> | link | decision | january\n")
+        dashboard_dir = Path(tmp) / "dashboard" / "data"
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), \
+                patch("src.services.dashboard_service.DASHBOARD_DIR", dashboard_dir), \
+                patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            with patch("src.stores.db.datetime") as mock_datetime:
+                mock_datetime.now.return_value = datetime(2026, 1, 10, 9, 0)
+                old_id = log_event("testproject", "UPDATE", "U1", "decision", "january update", "link")
+            export("testproject")
+            january = dashboard_dir / "projects" / "testproject" / "timeline" / "2026-01.json"
+            january_mtime = january.stat().st_mtime_ns
+
+            with messages.open("a") as f:
+                f.write("2026-02-02 10:00 | <@U1> | link | blocker | february\n")
+            with patch("src.stores.db.datetime") as mock_datetime:
+                mock_datetime.now.return_value = datetime(2026, 2, 2, 10, 0)
+                log_event("testproject", "MISALIGN", "U2", "pivot", "february flag", "link")
+            update_reaction("testproject", old_id, "approved", "U3")
+            manifest = export("testproject")
+
+            timeline = _read_shards(dashboard_dir, manifest, "timeline")
+            changes = _read_shards(dashboard_dir, manifest, "changes")
+            misalignments = _read_shards(dashboard_dir, manifest, "misalignments")
+            assert january.stat().st_mtime_ns == january_mtime
+            assert manifest["cursors"]["messages_offset"] == messages.stat().st_size
+    assert [t["summary"] for t in timeline] == ["january", "february"]
+    assert [(c["content"], c["reaction"]) for c in changes] == [("january update", "approved")]
+    assert [m["content"] for m in misalignments] == ["february flag"]
+
+
+def test_export_rebuilds_when_messages_rewritten():
+    with tempfile.TemporaryDirectory() as tmp:
+        project_dir = Path(tmp) / "testproject"
+        project_dir.mkdir()
+        messages = project_dir / "messages.txt"
+        messages.write_text(
+            "# messages\n"
+            "2026-02-21 14:34 | <@U1> | link | decision | first\n"
+            "2026-02-21 14:35 | <@U1> | link | decision | second\n"
+        )
+        dashboard_dir = Path(tmp) / "dashboard" / "data"
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), \
+                patch("src.services.dashboard_service.DASHBOARD_DIR", dashboard_dir):
+            export("testproject")
+            messages.write_text("# messages\n2026-02-22 09:00 | <@U1> | link | decision | fresh\n")
+            manifest = export("testproject")
+            timeline = _read_shards(dashboard_dir, manifest, "timeline")
+    assert [t["summary"] for t in timeline] == ["fresh"]
+
+
+def test_export_rebuilds_when_rewritten_messages_grow_past_old_offset():
+    with tempfile.TemporaryDirectory() as tmp:
+        project_dir = Path(tmp) / "testproject"
+        project_dir.mkdir()
+        messages = project_dir / "messages.txt"
+        messages.write_text(
+            "# messages\n"
+            "2026-02-21 14:34 | <@U1> | link | decision | first\n"
+            "2026-02-21 14:35 | <@U1> | link | decision | secnd\n"
+        )
+        dashboard_dir = Path(tmp) / "dashboard" / "data"
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), \
+                patch("src.services.dashboard_service.DASHBOARD_DIR", dashboard_dir):
+            export("testproject")
+            # Same line lengths, so a line still ends exactly at the old offset
+            messages.write_text(
+                "# messages\n"
+                "2026-02-22 09:00 | <@U1> | link | decision | new_1\n"
+                "2026-02-22 09:01 | <@U1> | link | decision | new_2\n"
+                "2026-02-22 09:02 | <@U1> | link | decision | new_3\n"
+            )
+            manifest = export("testproject")
+            timeline = _read_shards(dashboard_dir, manifest, "timeline")
+    assert [t["summary"] for t in timeline] == ["new_1", "new_2", "new_3"]
+
+
+def test_export_gzip_shards():
+    with tempfile.TemporaryDirectory() as tmp:
+        project_dir = Path(tmp) / "testproject"
+        project_dir.mkdir()
+        (project_dir / "messages.txt").write_text("2026-02-21 14:34 | <@U1> | link | decision | zipped\n")
+        dashboard_dir = Path(tmp) / "dashboard" / "data"
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), \
+                patch("src.services.dashboard_service.DASHBOARD_DIR", dashboard_dir), \
+                patch.dict("os.environ", {"DASHBOARD_GZIP": "1"}):
+            manifest = export("testproject")
+            timeline = _read_shards(dashboard_dir, manifest, "timeline")
+    assert manifest["shards"]["timeline"]["2026-02"]["file"] == "timeline/2026-02.json.gz"
+    assert [t["summary"] for t in timeline] == ["zipped"]
+
+
+def test_export_all_exports_every_project_into_its_own_directory():
+    _connections.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("alpha", "beta", "gamma"):
+            (Path(tmp) / name).mkdir()
+            (Path(tmp) / name / "messages.txt").write_text(f"2026-02-21 14:34 | <@U1> | link | decision | {name} entry\n")
+        dashboard_dir = Path(tmp) / "dashboard" / "data"
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), \
+                patch("src.services.dashboard_service.DASHBOARD_DIR", dashboard_dir), \
+                patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            log_event("beta", "UPDATE", "U1", "decision", "beta update", "link")
+            manifests = export_all(workers=3)
+            index = json.loads((dashboard_dir / "index.json").read_text())
+            timelines = {m["project"]: _read_shards(dashboard_dir, m, "timeline") for m in manifests}
+    assert [p["name"] for p in index["projects"]] == ["alpha", "beta", "gamma"]
+    assert {p["name"]: p["total_events"] for p in index["projects"]} == {"alpha": 0, "beta": 1, "gamma": 0}
+    assert {name: [t["summary"] for t in timeline] for name, timeline in timelines.items()} == {
+        "alpha": ["alpha entry"], "beta": ["beta entry"], "gamma": ["gamma entry"],
+    }
+
+
+def test_export_all_reads_worker_count_from_environment():
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), \
+                patch("src.services.dashboard_service.DASHBOARD_DIR", Path(tmp) / "dashboard" / "data"), \
+                patch.dict("os.environ", {"DASHBOARD_EXPORT_WORKERS": "2"}), \
+                patch("src.services.dashboard_service.ThreadPoolExecutor", wraps=ThreadPoolExecutor) as pool:
+            export_all()
+    assert pool.call_args.kwargs["max_workers"] == 2
+
+
+def test_export_all_skips_failing_project():
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "good").mkdir()
+        (Path(tmp) / "bad").mkdir()
+        (Path(tmp) / "bad" / "messages.txt").write_bytes(b"\xff\xfe not utf-8\n")
+        dashboard_dir = Path(tmp) / "dashboard" / "data"
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), \
+                patch("src.services.dashboard_service.DASHBOARD_DIR", dashboard_dir):
+            manifests = export_all()
+            index = json.loads((dashboard_dir / "index.json").read_text())
+    assert [m["project"] for m in manifests] == ["good"]
+    assert [p["name"] for p in index["projects"]] == ["good"]
+
+
+def test_deploy_backend_reads_environment():
+    with patch.dict("os.environ", {"DASHBOARD_DEPLOY_DIR": "/srv/dashboard", "DASHBOARD_PUBLIC_URL": "http://localhost:8000/"}):
+        backend = deploy_backend()
+    assert isinstance(backend, LocalDirectoryBackend)
+    assert backend.target_dir == Path("/srv/dashboard")
+    assert backend.public_url == "http://localhost:8000/"
+    with patch.dict("os.environ", {"DASHBOARD_DEPLOY_DIR": ""}):
+        assert isinstance(deploy_backend(), WranglerBackend)
+
+
+def test_deploy_to_local_directory():
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "alpha").mkdir()
+        (Path(tmp) / "alpha" / "messages.txt").write_text("2026-02-21 14:34 | <@U1> | link | decision | entry\n")
+        site_dir = Path(tmp) / "dashboard"
+        site_dir.mkdir()
+        (site_dir / "index.html").write_text("<html></html>")
+        target = Path(tmp) / "www"
+        steps = []
+        with patch("src.services.dashboard_service.PROJECTS_DIR", Path(tmp)), \
+                patch("src.services.dashboard_service.DASHBOARD_SITE_DIR", site_dir), \
+                patch("src.services.dashboard_service.DASHBOARD_DIR", site_dir / "data"):
+            url = deploy(["alpha"], backend=LocalDirectoryBackend(target, "http://localhost:8000/"), progress=steps.append)
+        assert url == "http://localhost:8000/"
+        assert (target / "index.html").exists()
+        assert (target / "data" / "index.json").exists()
+        assert (target / "data" / "projects" / "alpha" / "manifest.json").exists()
+    assert steps == ["Exporting alpha...", "Publishing to local directory..."]
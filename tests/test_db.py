@@ -1,8 +1,26 @@
+import sqlite3
 import tempfile
+import threading
+from datetime import datetime
 from pathlib import Path
 from unittest.mock import patch
 
-from src.stores.db import get_events, log_event, update_reaction, _connections
+from src.stores.db import (
+    SCHEMA_VERSION,
+    EventQuery,
+    _Write,
+    _connections,
+    _store,
+    configure,
+    get_db,
+    get_events,
+    get_rollups,
+    iter_events,
+    log_event,
+    query_events,
+    update_reaction,
+)
+from src.utils.metrics import reset_metrics, snapshot
 
 
 def _reset_connections():
@@ -67,3 +85,173 @@ def test_db_file_created_in_project_dir():
         with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
             log_event("testproject", "ROUTE", "U1", "escalation", "test", "link")
         assert (Path(tmp) / "testproject" / "events.db").exists()
+
+
+def test_db_uses_wal_mode():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            log_event("testproject", "ROUTE", "U1", "escalation", "test", "link")
+            mode = get_db("testproject").execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+
+def test_concurrent_writes_are_group_committed():
+    _reset_connections()
+    reset_metrics()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            ids: list[int] = []
+            threads = [
+                threading.Thread(target=lambda i=i: ids.append(log_event("testproject", "ROUTE", f"U{i}", "escalation", f"msg {i}", "link")))
+                for i in range(40)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            events = get_events("testproject", limit=100)
+    assert len(events) == 40
+    assert sorted(ids) == list(range(1, 41))
+    counters = snapshot()["counters"]
+    assert counters["db.writes"] == 40
+    assert counters["db.commits"] <= 40
+
+
+def test_failed_write_does_not_roll_back_its_batch():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            store = _store("testproject")
+            bad = _Write(lambda conn: conn.execute("INSERT INTO missing_table VALUES (1)"))
+            good = _Write(lambda conn: conn.execute(
+                "INSERT INTO events (timestamp, event_type, user, category, content, permalink) "
+                "VALUES ('2025-01-01 00:00:00', 'ROUTE', 'U1', 'escalation', 'still written', 'link')"
+            ))
+            store._apply([bad, good])
+            events = get_events("testproject")
+    assert "missing_table" in str(bad.error)
+    assert good.error is None
+    assert [e["content"] for e in events] == ["still written"]
+
+
+def test_configure_limits_write_batch_size():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)), patch("src.stores.db.DB_WRITE_BATCH_MAX", 256):
+            configure(2)
+            store = _store("testproject")
+            with patch.object(store, "_apply", wraps=store._apply) as spy:
+                threads = [
+                    threading.Thread(target=log_event, args=("testproject", "ROUTE", f"U{i}", "general", "x", "link"))
+                    for i in range(20)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            events = get_events("testproject")
+    assert len(events) == 20
+    assert max(len(call.args[0]) for call in spy.call_args_list) <= 2
+
+
+def test_new_db_is_at_latest_schema_version():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            conn = get_db("testproject")
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert version == SCHEMA_VERSION
+    assert {"idx_events_type_time", "idx_events_user_time", "idx_events_category"} <= indexes
+
+
+def test_unversioned_db_is_migrated_and_backfilled():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "testproject" / "events.db"
+        db_path.parent.mkdir()
+        legacy = sqlite3.connect(str(db_path))
+        legacy.execute(
+            "CREATE TABLE events (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL, "
+            "event_type TEXT NOT NULL, user TEXT NOT NULL, category TEXT NOT NULL, content TEXT NOT NULL, "
+            "permalink TEXT NOT NULL, reaction TEXT, reacted_by TEXT)"
+        )
+        legacy.execute(
+            "INSERT INTO events (timestamp, event_type, user, category, content, permalink) "
+            "VALUES ('2026-02-21 14:30:00', 'ROUTE', 'U1', 'escalation', 'old row', 'link')"
+        )
+        legacy.commit()
+        legacy.close()
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            events = get_events("testproject")
+            rollups = get_rollups("testproject")
+            version = get_db("testproject").execute("PRAGMA user_version").fetchone()[0]
+    assert version == SCHEMA_VERSION
+    assert events[0]["content"] == "old row"
+    assert rollups == [{"day": "2026-02-21", "event_type": "ROUTE", "category": "escalation", "reaction": "", "count": 1}]
+    assert events[0]["ts_epoch"] == int(datetime(2026, 2, 21, 14, 30).timestamp())
+
+
+def test_query_events_filters_by_type_user_and_reaction():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            update_id = log_event("testproject", "UPDATE", "U1", "decision", "approved update", "link")
+            log_event("testproject", "UPDATE", "U2", "decision", "open update", "link")
+            log_event("testproject", "MISALIGN", "U1", "pivot", "flag", "link")
+            log_event("testproject", "ROUTE", "U1", "escalation", "route", "link")
+            update_reaction("testproject", update_id, "approved", "U9")
+
+            flags = query_events("testproject", EventQuery(event_types=("MISALIGN", "QUESTION")))
+            by_user = query_events("testproject", EventQuery(user="U1"))
+            approved = query_events("testproject", EventQuery(event_types=("UPDATE",), reaction="approved"))
+            unreacted = query_events("testproject", EventQuery(event_types=("UPDATE",), reacted=False))
+    assert [e["content"] for e in flags.events] == ["flag"]
+    assert [e["content"] for e in by_user.events] == ["route", "flag", "approved update"]
+    assert [e["content"] for e in approved.events] == ["approved update"]
+    assert [e["content"] for e in unreacted.events] == ["open update"]
+
+
+def test_query_events_time_range():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            with patch("src.stores.db.datetime") as mock_datetime:
+                mock_datetime.now.return_value = datetime(2026, 2, 1, 9, 0)
+                log_event("testproject", "ROUTE", "U1", "escalation", "february", "link")
+                mock_datetime.now.return_value = datetime(2026, 3, 1, 9, 0)
+                log_event("testproject", "ROUTE", "U1", "escalation", "march", "link")
+            page = query_events("testproject", EventQuery(since=datetime(2026, 2, 15), until=datetime(2026, 3, 15)))
+    assert [e["content"] for e in page.events] == ["march"]
+
+
+def test_query_events_paginates_with_cursor():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            for i in range(5):
+                log_event("testproject", "ROUTE", "U1", "escalation", f"msg {i}", "link")
+            first = query_events("testproject", EventQuery(limit=2))
+            second = query_events("testproject", EventQuery(limit=2), first.next_cursor)
+            third = query_events("testproject", EventQuery(limit=2), second.next_cursor)
+            everything = list(iter_events("testproject", EventQuery(limit=2)))
+    assert [e["content"] for e in first.events] == ["msg 4", "msg 3"]
+    assert [e["content"] for e in second.events] == ["msg 2", "msg 1"]
+    assert [e["content"] for e in third.events] == ["msg 0"]
+    assert third.next_cursor is None
+    assert [e["content"] for e in everything] == [f"msg {i}" for i in range(4, -1, -1)]
+
+
+def test_rollups_follow_events_and_reactions():
+    _reset_connections()
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            first = log_event("testproject", "UPDATE", "U1", "decision", "one", "link")
+            log_event("testproject", "UPDATE", "U1", "decision", "two", "link")
+            update_reaction("testproject", first, "rejected", "U2")
+            update_reaction("testproject", first, "approved", "U2")
+            rollups = get_rollups("testproject")
+    day = datetime.now().strftime("%Y-%m-%d")
+    assert sorted((r["reaction"], r["count"]) for r in rollups) == [("", 1), ("approved", 1)]
+    assert all(r["day"] == day and r["event_type"] == "UPDATE" for r in rollups)
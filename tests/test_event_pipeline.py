@@ -0,0 +1,78 @@
+import threading
+from unittest.mock import MagicMock
+
+from src.services.event_pipeline import EventPipeline
+from src.utils.metrics import reset_metrics, snapshot
+
+
+def test_events_for_one_channel_run_in_order():
+    reset_metrics()
+    seen: list[str] = []
+    pipeline = EventPipeline(workers=4)
+    pipeline.start()
+    for i in range(20):
+        pipeline.submit("message", lambda event, client, say: seen.append(event["text"]),
+                        {"channel": "C1", "text": str(i)}, MagicMock(), MagicMock())
+    pipeline.stop()
+    assert seen == [str(i) for i in range(20)]
+
+
+def test_wrapped_listener_returns_before_handler_runs():
+    reset_metrics()
+    release = threading.Event()
+    done = threading.Event()
+
+    def slow_handler(event, client, say):
+        release.wait(timeout=5)
+        done.set()
+
+    pipeline = EventPipeline(workers=1)
+    pipeline.start()
+    listener = pipeline.wrap("message", slow_handler)
+    listener(event={"channel": "C1"}, client=MagicMock(), say=MagicMock())
+    assert not done.is_set()
+    release.set()
+    pipeline.stop()
+    assert done.is_set()
+
+
+def test_reaction_events_route_by_item_channel():
+    reset_metrics()
+    channels: list[str] = []
+    pipeline = EventPipeline(workers=2)
+    pipeline.start()
+    pipeline.submit("reaction_added", lambda event, client, say: channels.append(event["item"]["channel"]),
+                    {"item": {"channel": "C9", "ts": "1.0"}}, MagicMock(), MagicMock())
+    pipeline.stop()
+    assert channels == ["C9"]
+
+
+def test_full_queue_drops_and_counts():
+    reset_metrics()
+    pipeline = EventPipeline(workers=1, max_queue=1)
+    # Not started, so nothing drains the queue
+    assert pipeline.submit("message", MagicMock(), {"channel": "C1"}, MagicMock(), MagicMock()) is True
+    assert pipeline.submit("message", MagicMock(), {"channel": "C1"}, MagicMock(), MagicMock()) is False
+    assert pipeline.depth() == 1
+    assert snapshot()["counters"]["pipeline.dropped"] == 1
+
+
+def test_handler_errors_do_not_kill_worker():
+    reset_metrics()
+    seen: list[str] = []
+
+    def flaky(event, client, say):
+        if event["text"] == "boom":
+            raise RuntimeError("boom")
+        seen.append(event["text"])
+
+    pipeline = EventPipeline(workers=1)
+    pipeline.start()
+    for text in ["boom", "ok"]:
+        pipeline.submit("message", flaky, {"channel": "C1", "text": text}, MagicMock(), MagicMock())
+    pipeline.stop()
+    assert seen == ["ok"]
+    metrics = snapshot()
+    assert metrics["counters"]["pipeline.errors"] == 1
+    assert metrics["latencies"]["pipeline.message"]["count"] == 2
+    assert metrics["gauges"]["pipeline.queue_depth"] == 0
@@ -0,0 +1,73 @@
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+from src.services import git_committer
+from src.services.git_committer import GitCommitter, configure
+
+
+def _git(repo: Path, *args: str) -> str:
+    return subprocess.run(["git", *args], cwd=repo, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def _init_repo(repo: Path) -> str:
+    _git(repo, "init", "-q")
+    _git(repo, "config", "user.name", "Test")
+    _git(repo, "config", "user.email", "test@example.com")
+    (repo / "README.md").write_text("hello\n")
+    _git(repo, "add", "README.md")
+    _git(repo, "commit", "-q", "-m", "initial")
+    return _git(repo, "rev-parse", "HEAD")
+
+
+def test_commit_creates_branch_from_head_without_touching_worktree():
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+        head = _init_repo(repo)
+        committer = GitCommitter(repo, coalesce_seconds=0)
+        committer.submit("demo", "Launch MVP by Friday.\n", "set objective", "U1")
+        committer.flush()
+
+        assert _git(repo, "rev-parse", "project/demo^") == head
+        assert _git(repo, "show", "project/demo:projects/demo/ground_truth.txt") == "Launch MVP by Friday."
+        assert _git(repo, "show", "project/demo:README.md") == "hello"
+        assert _git(repo, "log", "-1", "--format=%s", "project/demo") == "ground truth: set objective (approved by U1)"
+        assert _git(repo, "rev-parse", "HEAD") == head
+        assert _git(repo, "status", "--porcelain") == ""
+        assert len(_git(repo, "worktree", "list").splitlines()) == 1
+
+
+def test_rapid_updates_coalesce_into_one_commit_per_project():
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = Path(tmp)
+        head = _init_repo(repo)
+        committer = GitCommitter(repo, coalesce_seconds=60)
+        committer.submit("demo", "v1\n", "first", "U1")
+        committer.submit("demo", "v2\n", "second", "U2")
+        committer.submit("other", "other v1\n", "hello", "U3")
+        committer.flush()
+        committer.submit("demo", "v3\n", "third", "U1")
+        committer.flush()
+
+        assert _git(repo, "rev-list", "--count", f"{head}..project/demo") == "2"
+        assert _git(repo, "show", "project/demo~1:projects/demo/ground_truth.txt") == "v2"
+        assert "- first (approved by U1)" in _git(repo, "log", "-1", "--format=%B", "project/demo~1")
+        assert _git(repo, "show", "project/demo:projects/demo/ground_truth.txt") == "v3"
+        assert _git(repo, "show", "project/other:projects/other/ground_truth.txt") == "other v1"
+
+
+def test_commit_outside_a_repo_is_skipped_quietly():
+    with tempfile.TemporaryDirectory() as tmp:
+        committer = GitCommitter(Path(tmp), coalesce_seconds=0)
+        committer.submit("demo", "v1\n", "first", "U1")
+        committer.flush()  # must not raise
+
+
+def test_configure_sets_the_shared_committers_window():
+    with (
+        patch.object(git_committer, "GIT_COMMIT_COALESCE_SECONDS", 2.0),
+        patch.object(git_committer._committer, "coalesce_seconds", 2.0),
+    ):
+        configure(0.5)
+        assert git_committer._committer.coalesce_seconds == 0.5
@@ -2,21 +2,38 @@ import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
-from src.services.project_service import MAX_GROUND_TRUTH_WORDS, ProjectAgent
+import pytest
 
+from src.services.project_service import GROUND_TRUTH_TOKEN_BUDGET, ProjectAgent, configure_compaction
 
-def test_compaction_triggers_over_word_limit():
+
+def test_compaction_triggers_over_token_budget():
     with tempfile.TemporaryDirectory() as tmp:
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
             agent = ProjectAgent("testproject")
             agent.initialize([])
-            # Write ground truth with more than MAX_GROUND_TRUTH_WORDS words
-            big_text = "word " * (MAX_GROUND_TRUTH_WORDS + 100)
+            # Each short word is one estimated token
+            big_text = "word " * (GROUND_TRUTH_TOKEN_BUDGET + 100)
             agent._write_file("ground_truth.txt", big_text)
             agent.reload_ground_truth()
             assert agent.check_compaction() is True
 
 
+def test_configure_compaction_applies_budget_and_checks_mode():
+    with tempfile.TemporaryDirectory() as tmp:
+        with (
+            patch("src.services.project_service.PROJECTS_DIR", Path(tmp)),
+            patch("src.services.project_service.GROUND_TRUTH_TOKEN_BUDGET", GROUND_TRUTH_TOKEN_BUDGET),
+            patch("src.services.project_service.COMPACTION_MODE", "incremental"),
+        ):
+            agent = ProjectAgent("testproject")
+            agent.initialize([])
+            configure_compaction(10, "full")
+            assert agent.check_compaction() is True
+            with pytest.raises(ValueError):
+                configure_compaction(10, "sometimes")
+
+
 def test_compaction_skips_under_limit():
     with tempfile.TemporaryDirectory() as tmp:
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
@@ -26,7 +43,7 @@ def test_compaction_skips_under_limit():
 
 
 @patch("src.services.project_service.compact_ground_truth")
-@patch("src.services.project_service.subprocess.run")
+@patch("src.services.project_service.submit_commit")
 def test_compaction_preserves_directory_and_objective(mock_run, mock_compact):
     compacted = (
         "# Project Ground Truth\n\n"
@@ -70,3 +87,42 @@ def test_cache_invalidated_after_write():
             agent.reload_ground_truth()
             assert agent.ground_truth != old_gt
             assert agent.ground_truth == "Updated content"
+
+
+@patch("src.services.project_service.submit_commit")
+@patch("src.services.project_service.compact_ground_truth")
+@patch("src.services.project_service.summarize_decisions", return_value=["* **Summary (2025-01-01 to 2025-01-30):** Early decisions"])
+def test_incremental_compaction_rolls_up_only_oldest_decisions(mock_summarize, mock_full, _mock_commit):
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent.initialize([{"id": "U111", "real_name": "Alex", "name": "alex", "title": "Engineer"}])
+            for i in range(60):
+                agent.apply_update(f"Decision number {i} " + "with plenty of supporting detail " * 4, "U111")
+            before = agent.ground_truth
+            assert agent.check_compaction() is True
+            _, compacted = agent.draft_compaction()
+    mock_full.assert_not_called()
+    log_start = before.index("## AI Decision Log")
+    # Everything up to the log is byte-identical
+    assert compacted[:log_start] == before[:log_start]
+    assert "Early decisions" in compacted
+    assert "Decision number 0 " not in compacted
+    # Recent entries survive untouched, in order
+    assert before.splitlines()[-1] == compacted.rstrip("\n").splitlines()[-1]
+    rolled = mock_summarize.call_args[0][0].splitlines()
+    assert rolled[0].endswith("(approved by <@U111>)") and "Decision number 0 " in rolled[0]
+    assert len(rolled) < 60
+
+
+@patch("src.services.project_service.compact_ground_truth", return_value="# Rewritten")
+@patch("src.services.project_service.summarize_decisions")
+def test_compaction_falls_back_to_full_rewrite_without_decision_log(mock_summarize, mock_full):
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
+            agent = ProjectAgent("testproject")
+            agent._write_file("ground_truth.txt", "word " * (GROUND_TRUTH_TOKEN_BUDGET + 100))
+            agent.reload_ground_truth()
+            _, compacted = agent.draft_compaction()
+    mock_summarize.assert_not_called()
+    assert compacted == "# Rewritten"
@@ -0,0 +1,81 @@
+from pathlib import Path
+
+from src.models.ground_truth import GroundTruth
+
+SAMPLE = Path(__file__).resolve().parent.parent / "projects" / "new_human_and_model" / "ground_truth.txt"
+
+DOC = """# Project Ground Truth
+
+## Core Objective
+Launch the MVP by Friday.
+
+## Directory & Responsibilities
+* **Alex** (<@U111>) — Database & Infrastructure. github: AlexDev
+* **Sarah** (<@U222>)
+
+## AI Decision Log
+* **2026-02-21:** Switched to PostgreSQL (approved by <@U111>)
+* Summary of January: picked React
+"""
+
+
+def test_render_round_trips_byte_for_byte():
+    text = SAMPLE.read_text()
+    assert GroundTruth.parse(text).render() == text
+    assert GroundTruth.parse(DOC).render() == DOC
+
+
+def test_sections_are_indexed():
+    doc = GroundTruth.parse(DOC)
+    titles = [s.title for s in doc.sections]
+    assert titles == [None, "Core Objective", "Directory & Responsibilities", "AI Decision Log"]
+
+
+def test_directory_indexed_by_slack_id_and_github():
+    doc = GroundTruth.parse(DOC)
+    assert list(doc.directory) == ["U111", "U222"]
+    assert doc.directory["U111"].name == "Alex"
+    assert doc.by_github["alexdev"].slack_id == "U111"
+    assert doc.by_github["alexdev"].role_summary == "Database & Infrastructure"
+    assert doc.role_of("U222") == "(no role set)"
+    # IDs mentioned only in the Decision Log are not Directory entries
+    assert "U999" not in GroundTruth.parse(DOC + "* approved by <@U999>\n").directory
+
+
+def test_decision_entries_parsed():
+    doc = GroundTruth.parse(DOC)
+    assert [d.date for d in doc.decisions] == ["2026-02-21", ""]
+    assert doc.decisions[0].text.startswith("Switched to PostgreSQL")
+
+
+def test_with_role_only_touches_that_line():
+    doc = GroundTruth.parse(DOC)
+    updated = doc.with_role("U222", "Frontend")
+    assert updated is not None
+    changed = [i for i, (a, b) in enumerate(zip(doc.lines, updated.lines)) if a != b]
+    assert changed == [doc.directory["U222"].line_index]
+    assert updated.role_of("U222") == "Frontend"
+    assert doc.with_role("U404", "Nobody") is None
+
+
+def test_with_decision_replaces_placeholder_or_appends():
+    placeholder = "(Bot will populate this as decisions are made)\n"
+    empty = GroundTruth.parse("## AI Decision Log\n" + placeholder)
+    assert empty.with_decision("* new", placeholder).render() == "## AI Decision Log\n* new\n"
+    appended = GroundTruth.parse(DOC).with_decision("* newest", placeholder)
+    assert appended.render() == DOC.rstrip() + "\n* newest"
+    assert appended.decisions[-1].line == "* newest"
+
+
+def test_with_rolled_up_decisions_keeps_everything_else():
+    doc = GroundTruth.parse(DOC + "* **2026-02-22:** Newest call\n")
+    rolled = doc.with_rolled_up_decisions(2, ["* **Summary:** Postgres, React"])
+    assert rolled.render() == DOC.replace(
+        "* **2026-02-21:** Switched to PostgreSQL (approved by <@U111>)\n* Summary of January: picked React\n",
+        "* **Summary:** Postgres, React\n",
+    ) + "* **2026-02-22:** Newest call\n"
+    assert [d.text for d in rolled.decisions] == ["**Summary:** Postgres, React", "Newest call"]
+
+
+def test_parse_is_memoized():
+    assert GroundTruth.parse(DOC) is GroundTruth.parse(DOC)
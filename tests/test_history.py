@@ -1,9 +1,10 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
-from src.utils.history import fetch_context
+from src.utils.history import HISTORY_LIMIT, clear_history, get_context, record_message
 
 
 def test_formats_messages_oldest_first():
+    _reset()
     client = MagicMock()
     client.conversations_history.return_value = {
         "messages": [
@@ -11,13 +12,14 @@ def test_formats_messages_oldest_first():
             {"user": "U111", "text": "first message"},
         ]
     }
-    result = fetch_context(client, "C123")
+    result = get_context(client, "C123")
     lines = result.strip().splitlines()
     assert lines[0] == "<@U111>: first message"
     assert lines[1] == "<@U222>: second message"
 
 
 def test_skips_bot_messages():
+    _reset()
     client = MagicMock()
     client.conversations_history.return_value = {
         "messages": [
@@ -25,12 +27,13 @@ def test_skips_bot_messages():
             {"bot_id": "B999", "text": "bot message"},
         ]
     }
-    result = fetch_context(client, "C123")
+    result = get_context(client, "C123")
     assert "human message" in result
     assert "bot message" not in result
 
 
 def test_skips_subtypes():
+    _reset()
     client = MagicMock()
     client.conversations_history.return_value = {
         "messages": [
@@ -38,13 +41,80 @@ def test_skips_subtypes():
             {"user": "U111", "text": "real message"},
         ]
     }
-    result = fetch_context(client, "C123")
+    result = get_context(client, "C123")
     assert "joined" not in result
     assert "real message" in result
 
 
 def test_empty_channel():
+    _reset()
     client = MagicMock()
     client.conversations_history.return_value = {"messages": []}
-    result = fetch_context(client, "C123")
+    result = get_context(client, "C123")
     assert result == ""
+
+
+def _reset():
+    clear_history()
+
+
+def test_get_context_backfills_once_then_uses_buffer():
+    _reset()
+    client = MagicMock()
+    client.conversations_history.return_value = {
+        "messages": [{"user": "U111", "text": "first message", "ts": "1.000"}]
+    }
+    assert get_context(client, "C123") == "<@U111>: first message"
+
+    record_message({"channel": "C123", "user": "U222", "text": "second message", "ts": "2.000"})
+    result = get_context(client, "C123")
+    assert result.splitlines() == ["<@U111>: first message", "<@U222>: second message"]
+    client.conversations_history.assert_called_once()
+    _reset()
+
+
+def test_record_message_dedupes_backfilled_message():
+    _reset()
+    client = MagicMock()
+    client.conversations_history.return_value = {
+        "messages": [{"user": "U111", "text": "hello", "ts": "1.000"}]
+    }
+    get_context(client, "C123")
+    record_message({"channel": "C123", "user": "U111", "text": "hello", "ts": "1.000"})
+    assert get_context(client, "C123") == "<@U111>: hello"
+    _reset()
+
+
+def test_record_message_skips_bots_and_thread_replies():
+    _reset()
+    client = MagicMock()
+    client.conversations_history.return_value = {"messages": []}
+    get_context(client, "C123")
+    record_message({"channel": "C123", "bot_id": "B1", "text": "bot says", "ts": "1.000"})
+    record_message({"channel": "C123", "user": "U1", "text": "in thread", "ts": "2.000", "thread_ts": "1.500"})
+    assert get_context(client, "C123") == ""
+    _reset()
+
+
+def test_buffer_keeps_only_last_n_messages():
+    _reset()
+    client = MagicMock()
+    client.conversations_history.return_value = {"messages": []}
+    get_context(client, "C123")
+    for i in range(HISTORY_LIMIT + 5):
+        record_message({"channel": "C123", "user": "U1", "text": f"msg {i}", "ts": f"{i}.000"})
+    lines = get_context(client, "C123").splitlines()
+    assert len(lines) == HISTORY_LIMIT
+    assert lines[-1] == f"<@U1>: msg {HISTORY_LIMIT + 4}"
+    _reset()
+
+
+def test_stale_buffer_backfills_again():
+    _reset()
+    client = MagicMock()
+    client.conversations_history.return_value = {"messages": []}
+    with patch("src.utils.history.HISTORY_MAX_IDLE_SECONDS", -1):
+        get_context(client, "C123")
+        get_context(client, "C123")
+    assert client.conversations_history.call_count == 2
+    _reset()
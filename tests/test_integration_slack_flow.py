@@ -19,7 +19,7 @@ def test_update_flow_approve_reaction_integration():
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
             with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
                 with patch("src.handlers.slack_events._resolve_channel_name", return_value="test-channel"):
-                    with patch("src.handlers.slack_events.fetch_context", return_value=""):
+                    with patch("src.handlers.slack_events.get_context", return_value=""):
                         with patch("src.services.project_service.classify_message", return_value="UPDATE|decision: Use SQLite"):
                             with patch("src.services.project_service.ProjectAgent._git_commit", return_value=None):
                                 event = {
@@ -60,7 +60,7 @@ def test_question_flow_reaction_updates_event():
         with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)):
             with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
                 with patch("src.handlers.slack_events._resolve_channel_name", return_value="test-channel"):
-                    with patch("src.handlers.slack_events.fetch_context", return_value=""):
+                    with patch("src.handlers.slack_events.get_context", return_value=""):
                         with patch("src.services.project_service.classify_message", return_value="QUESTION|blocker: clarify scope"):
                             event = {
                                 "channel": "C123",
@@ -0,0 +1,70 @@
+import threading
+
+from src.services.job_runner import JobRunner
+from src.utils.metrics import reset_metrics, snapshot
+
+
+def test_duplicate_key_is_skipped_while_in_flight():
+    reset_metrics()
+    runner = JobRunner(workers=2)
+    release = threading.Event()
+    calls = []
+
+    def job():
+        calls.append(1)
+        release.wait(5)
+
+    first = runner.submit("compaction:demo", "compaction", job)
+    assert first is not None
+    assert runner.submit("compaction:demo", "compaction", job) is None
+    assert runner.in_flight("compaction:demo")
+    release.set()
+    first.result(5)
+    runner.shutdown()
+    assert calls == [1]
+    assert not runner.in_flight("compaction:demo")
+    assert snapshot()["counters"]["jobs.compaction.deduplicated"] == 1
+
+
+def test_key_is_released_after_failure():
+    reset_metrics()
+    runner = JobRunner(workers=1)
+
+    def boom():
+        raise RuntimeError("llm down")
+
+    failed = runner.submit("compaction:demo", "compaction", boom)
+    assert failed is not None
+    failed.result(5)
+    second = runner.submit("compaction:demo", "compaction", lambda: None)
+    assert second is not None
+    second.result(5)
+    runner.shutdown()
+    assert snapshot()["counters"]["jobs.compaction.errors"] == 1
+
+
+def test_coalesced_submissions_run_one_follow_up():
+    reset_metrics()
+    runner = JobRunner(workers=2)
+    release = threading.Event()
+    finished = threading.Event()
+    calls = []
+
+    def first():
+        calls.append("first")
+        release.wait(5)
+
+    def follow_up(label):
+        def job():
+            calls.append(label)
+            finished.set()
+        return job
+
+    runner.submit("deploy", "deploy", first, coalesce=True)
+    assert runner.submit("deploy", "deploy", follow_up("second"), coalesce=True) is None
+    assert runner.submit("deploy", "deploy", follow_up("third"), coalesce=True) is None
+    release.set()
+    assert finished.wait(5)
+    runner.shutdown()
+    assert calls == ["first", "third"]
+    assert snapshot()["counters"]["jobs.deploy.coalesced"] == 2
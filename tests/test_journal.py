@@ -0,0 +1,96 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from src.stores.journal import JournalWriter, append_line, atomic_write, close_journals, configure
+
+
+def test_atomic_write_replaces_content_and_leaves_no_temp_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ground_truth.txt"
+        path.write_text("old")
+        atomic_write(path, "new")
+        assert path.read_text() == "new"
+        assert [p.name for p in Path(tmp).iterdir()] == ["ground_truth.txt"]
+
+
+def test_atomic_write_keeps_original_when_write_fails():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "ground_truth.txt"
+        path.write_text("old")
+        with patch("src.stores.journal.os.replace", side_effect=OSError("disk full")):
+            try:
+                atomic_write(path, "new")
+            except OSError:
+                pass
+        assert path.read_text() == "old"
+        assert [p.name for p in Path(tmp).iterdir()] == ["ground_truth.txt"]
+
+
+def test_immediate_journal_writes_each_line():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "messages.txt"
+        writer = JournalWriter(path)
+        writer.append("a\n")
+        assert path.read_text() == "a\n"
+        writer.append("b\n")
+        assert path.read_text() == "a\nb\n"
+
+
+def test_group_commit_batches_appends_into_one_write():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "messages.txt"
+        writer = JournalWriter(path, group_commit_ms=50)
+        with patch.object(writer, "_write", wraps=writer._write) as mock_write:
+            for i in range(5):
+                writer.append(f"{i}\n")
+            deadline = time.monotonic() + 2
+            while not path.exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            writer.close()
+        assert path.read_text() == "0\n1\n2\n3\n4\n"
+        assert mock_write.call_count == 1
+
+
+def test_atomic_write_flushes_pending_appends_first():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "messages.txt"
+        with patch("src.stores.journal.JOURNAL_GROUP_COMMIT_MS", 60_000):
+            append_line(path, "pending\n")
+            atomic_write(path, "header\n")
+            append_line(path, "after\n")
+            close_journals()
+        assert path.read_text() == "header\nafter\n"
+
+
+def test_configure_enables_group_commit_for_new_journals():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "messages.txt"
+        with patch("src.stores.journal.JOURNAL_GROUP_COMMIT_MS", 0):
+            configure(60_000)
+            append_line(path, "buffered\n")
+            assert not path.exists()
+            close_journals()
+        assert path.read_text() == "buffered\n"
+
+
+def test_concurrent_flushes_keep_lines_in_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "messages.txt"
+        writer = JournalWriter(path, group_commit_ms=1)
+        stop = threading.Event()
+
+        def keep_flushing():
+            while not stop.is_set():
+                writer.flush()
+
+        flusher = threading.Thread(target=keep_flushing)
+        flusher.start()
+        for i in range(500):
+            writer.append(f"{i}\n")
+        stop.set()
+        flusher.join()
+        writer.close()
+        assert path.read_text().splitlines() == [str(i) for i in range(500)]
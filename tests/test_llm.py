@@ -1,6 +1,39 @@
 from unittest.mock import MagicMock, patch
 
-from src.services.llm_service import classify_message, classify_pr, respond_to_mention
+import httpx
+
+from src.utils.metrics import reset_metrics, snapshot
+
+from src.services import llm_service
+from src.services.llm_service import (
+    ANTHROPIC_MAX_RETRIES,
+    _get_client,
+    classify_message,
+    classify_messages,
+    classify_pr,
+    close_clients,
+    configure_client,
+    respond_to_mention,
+    summarize_decisions,
+    stream_response_to_mention,
+)
+
+
+# Real placeholders per template, so formatting mistakes in llm_service surface as KeyErrors
+_TEMPLATES = {
+    "classify.md": "system prompt {ground_truth}",
+    "classify_message.md": "{history} {user} {message}",
+    "classify_batch.md": "{history} {messages}",
+    "respond.md": "system prompt {ground_truth}",
+    "respond_context.md": "{messages} {history}",
+    "pr_alignment.md": "prompt {ground_truth}",
+    "pr_alignment_details.md": "{author_name} {author_role} {pr_title} {commits}",
+    "compaction_decisions.md": "roll up",
+}
+
+
+def _prompts(name: str) -> str:
+    return _TEMPLATES[name]
 
 
 def _mock_response(text: str) -> MagicMock:
@@ -14,7 +47,7 @@ def _mock_response(text: str) -> MagicMock:
 @patch("src.services.llm_service._get_client")
 @patch("src.services.llm_service._load_prompt")
 def test_classify_returns_pass(mock_prompt, mock_client):
-    mock_prompt.return_value = "system prompt {ground_truth} {user} {message}"
+    mock_prompt.side_effect = _prompts
     mock_client.return_value.messages.create.return_value = _mock_response("PASS")
 
     result = classify_message("Launch MVP by Friday", "U123", "sounds good")
@@ -24,7 +57,7 @@ def test_classify_returns_pass(mock_prompt, mock_client):
 @patch("src.services.llm_service._get_client")
 @patch("src.services.llm_service._load_prompt")
 def test_classify_returns_route(mock_prompt, mock_client):
-    mock_prompt.return_value = "system prompt {ground_truth} {user} {message}"
+    mock_prompt.side_effect = _prompts
     mock_client.return_value.messages.create.return_value = _mock_response(
         "ROUTE: <@U999> | needs help with database"
     )
@@ -37,7 +70,7 @@ def test_classify_returns_route(mock_prompt, mock_client):
 @patch("src.services.llm_service._get_client")
 @patch("src.services.llm_service._load_prompt")
 def test_classify_returns_update(mock_prompt, mock_client):
-    mock_prompt.return_value = "system prompt {ground_truth} {user} {message}"
+    mock_prompt.side_effect = _prompts
     mock_client.return_value.messages.create.return_value = _mock_response(
         "UPDATE: Team decided to switch to PostgreSQL"
     )
@@ -49,7 +82,7 @@ def test_classify_returns_update(mock_prompt, mock_client):
 @patch("src.services.llm_service._get_client")
 @patch("src.services.llm_service._load_prompt")
 def test_classify_returns_question(mock_prompt, mock_client):
-    mock_prompt.return_value = "system prompt {ground_truth} {user} {message}"
+    mock_prompt.side_effect = _prompts
     mock_client.return_value.messages.create.return_value = _mock_response(
         "QUESTION: What exactly do you mean by 'change the approach'?"
     )
@@ -61,7 +94,7 @@ def test_classify_returns_question(mock_prompt, mock_client):
 @patch("src.services.llm_service._get_client")
 @patch("src.services.llm_service._load_prompt")
 def test_classify_returns_misalign(mock_prompt, mock_client):
-    mock_prompt.return_value = "system prompt {ground_truth} {user} {message}"
+    mock_prompt.side_effect = _prompts
     mock_client.return_value.messages.create.return_value = _mock_response(
         "MISALIGN: conflicts with ground truth — team agreed on SQLite"
     )
@@ -74,7 +107,7 @@ def test_classify_returns_misalign(mock_prompt, mock_client):
 @patch("src.services.llm_service._get_client")
 @patch("src.services.llm_service._load_prompt")
 def test_respond_to_mention(mock_prompt, mock_client):
-    mock_prompt.return_value = "system prompt {ground_truth}"
+    mock_prompt.side_effect = _prompts
     mock_client.return_value.messages.create.return_value = _mock_response(
         "The team's goal is to launch the MVP by Friday."
     )
@@ -86,9 +119,7 @@ def test_respond_to_mention(mock_prompt, mock_client):
 @patch("src.services.llm_service._get_client")
 @patch("src.services.llm_service._load_prompt")
 def test_classify_pr_returns_pass(mock_prompt, mock_client):
-    mock_prompt.return_value = (
-        "prompt {author_name} {author_role} {pr_title} {commits} {ground_truth}"
-    )
+    mock_prompt.side_effect = _prompts
     mock_client.return_value.messages.create.return_value = _mock_response("PASS")
 
     result = classify_pr("Alex", "Database & Infrastructure", "Fix migration script", "fix migration", "ground truth")
@@ -98,12 +129,126 @@ def test_classify_pr_returns_pass(mock_prompt, mock_client):
 @patch("src.services.llm_service._get_client")
 @patch("src.services.llm_service._load_prompt")
 def test_classify_pr_returns_nudge(mock_prompt, mock_client):
-    mock_prompt.return_value = (
-        "prompt {author_name} {author_role} {pr_title} {commits} {ground_truth}"
-    )
+    mock_prompt.side_effect = _prompts
     mock_client.return_value.messages.create.return_value = _mock_response(
         "NUDGE: Should this go to Sarah (Frontend & UI)?"
     )
 
     result = classify_pr("Alex", "Database & Infrastructure", "Redesign navbar", "redesign nav", "ground truth")
     assert result.startswith("NUDGE:")
+
+
+@patch("src.services.llm_service._get_client")
+@patch("src.services.llm_service._load_prompt")
+def test_classify_messages_returns_one_line_per_message(mock_prompt, mock_client):
+    mock_prompt.side_effect = _prompts
+    mock_client.return_value.messages.create.return_value = _mock_response(
+        "1. PASS\n2. UPDATE|decision: Switch to PostgreSQL\n3. PASS"
+    )
+
+    result = classify_messages("Launch MVP", [("U1", "morning"), ("U2", "we decided on postgres"), ("U3", "ok")])
+    assert result == ["PASS", "UPDATE|decision: Switch to PostgreSQL", "PASS"]
+
+
+@patch("src.services.llm_service._get_client")
+@patch("src.services.llm_service._load_prompt")
+def test_classify_messages_missing_lines_default_to_pass(mock_prompt, mock_client):
+    mock_prompt.side_effect = _prompts
+    mock_client.return_value.messages.create.return_value = _mock_response("2. QUESTION|blocker: which one?")
+
+    result = classify_messages("Launch MVP", [("U1", "hi"), ("U2", "let's change it")])
+    assert result == ["PASS", "QUESTION|blocker: which one?"]
+
+
+@patch("src.services.llm_service._get_client")
+@patch("src.services.llm_service._load_prompt")
+def test_classify_caches_ground_truth_prefix_only(mock_prompt, mock_client):
+    mock_prompt.side_effect = _prompts
+    mock_client.return_value.messages.create.return_value = _mock_response("PASS")
+
+    classify_message("Launch MVP", "U123", "sounds good", "<@U1>: earlier")
+    kwargs = mock_client.return_value.messages.create.call_args[1]
+    assert kwargs["system"] == [
+        {"type": "text", "text": "system prompt Launch MVP", "cache_control": {"type": "ephemeral"}}
+    ]
+    user_turn = kwargs["messages"][0]["content"]
+    assert "sounds good" in user_turn
+    assert "<@U1>: earlier" in user_turn
+    assert "Launch MVP" not in user_turn
+
+
+@patch("src.services.llm_service._get_client")
+@patch("src.services.llm_service._load_prompt")
+def test_cache_usage_is_counted(mock_prompt, mock_client):
+    reset_metrics()
+    mock_prompt.side_effect = _prompts
+    response = _mock_response("PASS")
+    response.usage = MagicMock(cache_read_input_tokens=1200, cache_creation_input_tokens=0, input_tokens=40, output_tokens=2)
+    mock_client.return_value.messages.create.return_value = response
+
+    classify_message("Launch MVP", "U123", "sounds good")
+    counters = snapshot()["counters"]
+    assert counters["llm.cache_read_tokens"] == 1200
+    assert counters["llm.uncached_input_tokens"] == 40
+    assert "llm.cache_write_tokens" not in counters
+
+
+@patch.dict("os.environ", {"ANTHROPIC_API_KEY": "test-key"})
+def test_get_client_is_shared_and_configured():
+    close_clients()
+    try:
+        client = _get_client()
+        assert _get_client() is client
+        assert client.max_retries == ANTHROPIC_MAX_RETRIES
+    finally:
+        close_clients()
+    assert _get_client() is not client
+    close_clients()
+
+
+@patch.dict("os.environ", {"ANTHROPIC_API_KEY": "test-key"})
+def test_configure_client_rebuilds_with_new_settings():
+    close_clients()
+    before = _get_client()
+    with (
+        patch.object(llm_service, "ANTHROPIC_MAX_RETRIES", ANTHROPIC_MAX_RETRIES),
+        patch.object(llm_service, "ANTHROPIC_TIMEOUT_SECONDS", 60.0),
+        patch.object(llm_service, "ANTHROPIC_CONNECT_TIMEOUT_SECONDS", 5.0),
+        patch.object(llm_service, "ANTHROPIC_POOL_SIZE", 20),
+    ):
+        configure_client(9, 30, 2, 5)
+        client = _get_client()
+        close_clients()
+    assert client is not before
+    assert client.max_retries == 9
+    assert isinstance(client.timeout, httpx.Timeout)
+    assert client.timeout.connect == 2
+
+
+@patch("src.services.llm_service._get_client")
+@patch("src.services.llm_service._load_prompt")
+def test_stream_response_yields_deltas(mock_prompt, mock_client):
+    mock_prompt.side_effect = _prompts
+    stream = MagicMock()
+    stream.text_stream = iter(["The team's ", "goal is the MVP."])
+    mock_client.return_value.messages.stream.return_value.__enter__.return_value = stream
+
+    chunks = list(stream_response_to_mention("Launch MVP by Friday", "what's our goal?"))
+    assert "".join(chunks) == "The team's goal is the MVP."
+    kwargs = mock_client.return_value.messages.stream.call_args[1]
+    assert kwargs["max_tokens"] == 1024
+
+
+@patch("src.services.llm_service._get_client")
+@patch("src.services.llm_service._load_prompt")
+def test_summarize_decisions_keeps_bullets_and_caps_tokens(mock_prompt, mock_client):
+    mock_prompt.side_effect = _prompts
+    mock_client.return_value.messages.create.return_value = _mock_response(
+        "Here you go:\n* **Summary (2025-01-01 to 2025-01-09):** Postgres\n* Auth via Okta"
+    )
+    result = summarize_decisions("* **2025-01-01:** Postgres", 300)
+    assert result == ["* **Summary (2025-01-01 to 2025-01-09):** Postgres", "* Auth via Okta"]
+    assert mock_client.return_value.messages.create.call_args[1]["max_tokens"] == 300
+
+    mock_client.return_value.messages.create.return_value = _mock_response("Postgres,\nOkta")
+    assert summarize_decisions("* x", 300) == ["* Postgres, Okta"]
@@ -0,0 +1,29 @@
+from unittest.mock import patch
+
+from src.utils.lru_cache import LRUCache
+
+
+def test_get_returns_stored_value():
+    cache: LRUCache[str] = LRUCache(maxsize=10, ttl_seconds=60)
+    assert cache.get("a") is None
+    cache.put("a", "PASS")
+    assert cache.get("a") == "PASS"
+
+
+def test_evicts_least_recently_used():
+    cache: LRUCache[str] = LRUCache(maxsize=2, ttl_seconds=60)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    cache.get("a")
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert len(cache) == 2
+
+
+def test_expired_entries_miss():
+    cache: LRUCache[str] = LRUCache(maxsize=2, ttl_seconds=60)
+    cache.put("a", "1")
+    with patch("src.utils.lru_cache.time.monotonic", return_value=10**12):
+        assert cache.get("a") is None
+    assert len(cache) == 0
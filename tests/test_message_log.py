@@ -0,0 +1,59 @@
+from datetime import datetime
+
+from src.models.message_log import MessageLog
+from src.utils.tokens import estimate_tokens
+
+NOW = datetime(2025, 6, 30, 12, 0)
+
+
+def _line(timestamp: str, category: str, summary: str, user: str = "U1") -> str:
+    return f"{timestamp} | <@{user}> | https://slack.com/archives/C1/p1 | {category} | {summary}"
+
+
+def _select(log: MessageLog, question: str, budget: int = 1000) -> list[str]:
+    return [e.summary for e in log.select(question, budget, window_days=30, half_life_days=7, now=NOW)]
+
+
+def test_parse_skips_comments_and_malformed_lines():
+    log = MessageLog.parse(
+        "# Important messages for demo\n"
+        "# Format: YYYY-MM-DD HH:MM | <@user_id> | slack_permalink | category | summary\n"
+        "not a log line\n"
+        + _line("2025-06-29 09:00", "decision", "Use Postgres")
+    )
+    assert len(log) == 1
+    assert log.entries[0].category == "decision"
+    assert log.entries[0].user == "<@U1>"
+
+
+def test_select_returns_recent_entries_oldest_first():
+    log = MessageLog.parse("\n".join([
+        _line("2025-06-28 09:00", "blocker", "CI broken"),
+        _line("2025-06-29 09:00", "decision", "Use Postgres"),
+    ]))
+    assert _select(log, "anything new?") == ["CI broken", "Use Postgres"]
+
+
+def test_select_drops_old_entries_unless_they_match_the_question():
+    log = MessageLog.parse("\n".join([
+        _line("2024-01-10 09:00", "decision", "Auth goes through Okta"),
+        _line("2024-01-11 09:00", "milestone", "Shipped onboarding flow"),
+        _line("2025-06-29 09:00", "blocker", "CI broken"),
+    ]))
+    assert _select(log, "what did we decide about okta?") == ["Auth goes through Okta", "CI broken"]
+
+
+def test_select_respects_token_budget_and_prefers_relevant_entries():
+    lines = [_line(f"2025-06-{day:02d} 09:00", "general", f"filler note {day}") for day in range(1, 29)]
+    lines.insert(3, _line("2025-06-03 10:00", "decision", "Billing moves to Stripe"))
+    log = MessageLog.parse("\n".join(lines))
+    chosen = _select(log, "stripe billing?", budget=60)
+    assert "Billing moves to Stripe" in chosen
+    assert sum(estimate_tokens(e.line) for e in log.entries if e.summary in chosen) <= 60
+    assert len(chosen) < len(log)
+
+
+def test_append_indexes_new_entries():
+    log = MessageLog()
+    log.append(_line("2024-01-01 09:00", "pivot", "Dropping the mobile app"))
+    assert _select(log, "mobile plans?") == ["Dropping the mobile app"]
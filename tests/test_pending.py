@@ -0,0 +1,81 @@
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+from src.stores.db import _connections, get_db
+from src.stores.pending import PendingStore, configure
+
+
+@contextmanager
+def _stores_dir():
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            _connections.clear()
+            yield Path(tmp)
+            _connections.clear()
+
+
+def _record(channel: str = "alpha", user: str = "U1", text: str = "Use Postgres") -> dict:
+    return {"update_text": text, "channel_name": channel, "thread_ts": "1.0", "user": user}
+
+
+def test_entries_survive_a_restart():
+    with _stores_dir():
+        store = PendingStore("update")
+        store["100.0"] = _record("alpha")
+        store["200.0"] = _record("beta", user="U2")
+
+        restarted = PendingStore("update")
+        assert restarted["100.0"]["update_text"] == "Use Postgres"
+        assert restarted["200.0"]["channel_name"] == "beta"
+        assert sorted(restarted) == ["100.0", "200.0"]
+
+
+def test_delete_and_pop_remove_from_sqlite():
+    with _stores_dir():
+        store = PendingStore("update")
+        store["100.0"] = _record()
+        store["200.0"] = _record()
+        assert store.pop("100.0")["user"] == "U1"
+        del store["200.0"]
+        assert "100.0" not in PendingStore("update")
+        assert len(PendingStore("update")) == 0
+
+
+def test_kinds_are_separate():
+    with _stores_dir():
+        PendingStore("update")["100.0"] = _record()
+        assert "100.0" not in PendingStore("nudge")
+
+
+def test_count_for_user_uses_index():
+    with _stores_dir():
+        store = PendingStore("nudge")
+        store["1.0"] = _record(user="U1")
+        store["2.0"] = _record(channel="beta", user="U1")
+        store["3.0"] = _record(user="U2")
+        assert store.count_for_user("U1") == 2
+        del store["1.0"]
+        assert store.count_for_user("U1") == 1
+        assert PendingStore("nudge").count_for_user("U1") == 1
+
+
+def test_expired_entries_are_dropped():
+    with _stores_dir():
+        store = PendingStore("update")
+        store["100.0"] = _record()
+        store["200.0"] = _record()
+        get_db("alpha").execute("UPDATE pending_approvals SET created_at = ? WHERE ts = '100.0'", (time.time() - 30 * 86400,))
+        get_db("alpha").commit()
+
+        restarted = PendingStore("update")
+        assert "100.0" not in restarted
+        assert "200.0" in restarted
+        rows = get_db("alpha").execute("SELECT ts FROM pending_approvals").fetchall()
+        assert [row["ts"] for row in rows] == ["200.0"]
+
+        with patch("src.stores.pending.PENDING_APPROVAL_TTL_DAYS", 7.0):
+            configure(0)
+            assert "200.0" not in restarted
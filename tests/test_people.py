@@ -1,8 +1,15 @@
+import sqlite3
 import tempfile
 from pathlib import Path
 from unittest.mock import patch
 
-from src.services.people_service import build_person_summary, scan_user_activity, scan_user_projects
+from src.services.people_service import (
+    build_person_summary,
+    scan_user_activity,
+    scan_user_events,
+    scan_user_projects,
+)
+from src.stores.db import _connections, log_event, update_reaction
 
 
 def _create_project(tmp: str, name: str, ground_truth: str, messages: str = "") -> None:
@@ -88,6 +95,41 @@ def test_build_person_summary_includes_pending():
     assert "1 item" in result
 
 
+def test_build_person_summary_includes_recent_events():
+    _connections.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        _create_project(tmp, "project-a", "## Directory\n* **Alex** (<@U111>) — Backend")
+        with patch("src.services.people_service.PROJECTS_DIR", Path(tmp)), patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            event_id = log_event("project-a", "UPDATE", "U111", "decision", "Move to Postgres", "link")
+            update_reaction("project-a", event_id, "approved", "U222")
+            log_event("project-a", "MISALIGN", "U222", "pivot", "Someone else's flag", "link")
+            result = build_person_summary("U111")
+    assert "Recent Events" in result
+    assert "UPDATE | Move to Postgres (approved)" in result
+    assert "Someone else's flag" not in result
+
+
+def test_scan_user_events_reads_without_opening_stores():
+    _connections.clear()
+    with tempfile.TemporaryDirectory() as tmp:
+        _create_project(tmp, "current", "")
+        _create_project(tmp, "legacy", "")
+        with patch("src.stores.db.PROJECTS_DIR", Path(tmp)):
+            log_event("current", "UPDATE", "U111", "decision", "Move to Postgres", "link")
+        _connections.clear()
+        legacy_db = Path(tmp, "legacy", "events.db")
+        with sqlite3.connect(legacy_db) as conn:
+            conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, user TEXT, timestamp TEXT)")
+            conn.execute("INSERT INTO events (user, timestamp) VALUES ('U111', '2024-01-01 10:00')")
+        with patch("src.services.people_service.PROJECTS_DIR", Path(tmp)):
+            events = scan_user_events("U111")
+        with sqlite3.connect(legacy_db) as conn:
+            legacy_version = conn.execute("PRAGMA user_version").fetchone()[0]
+    assert [(e["project"], e["content"]) for e in events] == [("current", "Move to Postgres")]
+    assert not _connections
+    assert legacy_version == 0
+
+
 def test_user_mention_lookup():
     """Verify the regex in slack_events.py correctly matches a bare user mention."""
     import re
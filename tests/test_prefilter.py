@@ -0,0 +1,84 @@
+import logging
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.services import prefilter as prefilter_module
+from src.services.prefilter import RULES, configure, prefilter, record_shadow, register_rule, score_message
+from src.services.project_service import ProjectAgent
+from src.utils.metrics import reset_metrics, snapshot
+
+
+def test_chatter_is_skipped():
+    for text in ["sounds good", "thanks!", "standup in 5", ":tada:", "lgtm"]:
+        assert score_message(text).skip, text
+
+
+def test_actionable_messages_go_to_llm():
+    for text in [
+        "who handles the database?",
+        "we decided to switch to postgres",
+        "I'll just use MongoDB for this part",
+        "<@U123> can you take a look",
+        "CI is broken and I'm stuck",
+    ]:
+        assert not score_message(text).skip, text
+
+
+def test_signals_are_reported():
+    verdict = score_message("who owns the DB?")
+    assert "question" in verdict.signals
+    assert "ask" in verdict.signals
+
+
+def test_prefilter_off_never_skips():
+    with patch("src.services.prefilter.PREFILTER_MODE", "off"):
+        assert prefilter("thanks") is None
+
+
+def test_prefilter_on_skips_chatter():
+    reset_metrics()
+    with patch("src.services.prefilter.PREFILTER_MODE", "on"):
+        assert prefilter("thanks") is not None
+        assert prefilter("who owns the DB?") is None
+    counters = snapshot()["counters"]
+    assert counters["prefilter.skipped"] == 1
+    assert counters["prefilter.passed_to_llm"] == 1
+
+
+def test_shadow_logs_disagreement(caplog):
+    reset_metrics()
+    with patch("src.services.prefilter.PREFILTER_MODE", "shadow"), caplog.at_level(logging.INFO):
+        assert prefilter("thanks") is None
+        record_shadow("thanks", "QUESTION|blocker: thanks for what?")
+    assert snapshot()["counters"]["prefilter.shadow_false_skip"] == 1
+    assert "would_skip=True" in caplog.text
+    assert "llm=QUESTION|blocker" in caplog.text
+
+
+def test_register_rule_adds_signal():
+    rule = lambda text: ("launch", 0.5) if "launch" in text else None
+    register_rule(rule)
+    try:
+        assert "launch" in score_message("launch it").signals
+    finally:
+        RULES.remove(rule)
+
+
+@patch("src.services.project_service.classify_message")
+def test_agent_skips_llm_when_prefilter_on(mock_classify):
+    with tempfile.TemporaryDirectory() as tmp:
+        with patch("src.services.project_service.PROJECTS_DIR", Path(tmp)), patch("src.services.prefilter.PREFILTER_MODE", "on"):
+            agent = ProjectAgent("testproject")
+            assert agent.classify("U1", "thanks!") == "PASS"
+    mock_classify.assert_not_called()
+
+
+def test_configure_applies_mode_and_threshold():
+    with patch.object(prefilter_module, "PREFILTER_MODE", "off"), patch.object(prefilter_module, "PREFILTER_PASS_THRESHOLD", 0.2):
+        configure("on", 0.9)
+        assert prefilter("who handles the database?") is not None
+        with pytest.raises(ValueError):
+            configure("sometimes", 0.2)
@@ -0,0 +1,68 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.services.prompt_registry import PromptRegistry, PromptTemplateError, validate_prompts
+
+
+def test_shipped_prompts_are_valid():
+    validate_prompts()
+
+
+def test_get_reads_file_once_between_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, "nudge.md")
+        path.write_text("Hey — {nudge_content}")
+        registry = PromptRegistry(Path(tmp), {"nudge.md": {"nudge_content"}})
+        with patch("src.services.prompt_registry.PROMPT_RELOAD_CHECK_SECONDS", 0):
+            assert registry.render("nudge.md", nudge_content="x") == "Hey — x"
+            with patch.object(Path, "read_text", side_effect=AssertionError("re-read")):
+                assert registry.get("nudge.md") == "Hey — {nudge_content}"
+
+
+def test_get_skips_stat_within_check_interval():
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, "nudge.md").write_text("Hey — {nudge_content}")
+        registry = PromptRegistry(Path(tmp), {"nudge.md": {"nudge_content"}})
+        registry.get("nudge.md")
+        with patch.object(Path, "stat", side_effect=AssertionError("stat")):
+            registry.get("nudge.md")
+
+
+def test_reloads_when_mtime_changes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, "nudge.md")
+        path.write_text("Old {nudge_content}")
+        registry = PromptRegistry(Path(tmp), {"nudge.md": {"nudge_content"}})
+        with patch("src.services.prompt_registry.PROMPT_RELOAD_CHECK_SECONDS", 0):
+            registry.get("nudge.md")
+            path.write_text("New {nudge_content}")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert registry.get("nudge.md") == "New {nudge_content}"
+
+
+def test_missing_placeholder_fails_fast():
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, "classify.md").write_text("No ground truth here")
+        registry = PromptRegistry(Path(tmp), {"classify.md": {"ground_truth"}})
+        with pytest.raises(PromptTemplateError, match="ground_truth"):
+            registry.load_all()
+
+
+def test_unexpected_placeholder_fails_fast():
+    with tempfile.TemporaryDirectory() as tmp:
+        Path(tmp, "classify.md").write_text("{ground_truth} {typo}")
+        registry = PromptRegistry(Path(tmp), {"classify.md": {"ground_truth"}})
+        with pytest.raises(PromptTemplateError, match="typo"):
+            registry.load_all()
+
+
+def test_missing_file_fails_fast():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = PromptRegistry(Path(tmp), {"classify.md": {"ground_truth"}})
+        with pytest.raises(PromptTemplateError, match="not found"):
+            registry.load_all()
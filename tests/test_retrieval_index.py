@@ -0,0 +1,100 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from src.services.retrieval_index import RetrievalIndex
+from src.stores.journal import close_journals
+
+SEED = [
+    ("message", "2025-06-01 09:00 | <@U1> | https://x | decision | Use Postgres for the events store"),
+    ("decision", "* **2025-06-02:** Auth goes through Okta (approved by <@U2>)"),
+    ("event", "2025-06-03 10:00 | ROUTE | blocker | CI broken on main, ask Sam"),
+    ("message", "2025-06-04 09:00 | <@U3> | https://x | milestone | Shipped onboarding flow"),
+]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def scorer(request):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        yield
+    else:
+        with patch("src.services.retrieval_index.np", None):
+            yield
+
+
+def test_build_writes_index_file_and_search_ranks_matches(scorer):
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RetrievalIndex(Path(tmp) / "retrieval.jsonl")
+        index.load(SEED)
+        results = index.search("what did we pick for auth, okta?", k=3)
+        lines = (Path(tmp) / "retrieval.jsonl").read_text().splitlines()
+    assert len(lines) == 4
+    assert json.loads(lines[0])["terms"]["postgres"] == 1
+    assert [r.source for r in results] == ["decision"]
+    assert "Okta" in results[0].text
+
+
+def test_search_limits_to_top_k(scorer):
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RetrievalIndex(Path(tmp) / "retrieval.jsonl")
+        index.load([("message", f"deploy note number {i}") for i in range(50)] + [("decision", "deploy deploy freeze")])
+        results = index.search("deploy freeze", k=5)
+    assert len(results) == 5
+    assert results[0].text == "deploy deploy freeze"
+    assert results[0].score > results[1].score
+
+
+def test_numpy_and_python_scores_match():
+    pytest.importorskip("numpy")
+    with tempfile.TemporaryDirectory() as tmp:
+        index = RetrievalIndex(Path(tmp) / "retrieval.jsonl")
+        index.load(SEED + [("message", "postgres migration blocked on CI")])
+        vectorized = index.search("postgres CI", k=10)
+        with patch("src.services.retrieval_index.np", None):
+            plain = index.search("postgres CI", k=10)
+    assert [r.text for r in vectorized] == [r.text for r in plain]
+    assert [r.score for r in vectorized] == pytest.approx([r.score for r in plain])
+
+
+def test_add_is_incremental_and_persisted(scorer):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "retrieval.jsonl"
+        index = RetrievalIndex(path)
+        index.load(SEED)
+        index.add("decision", "* **2025-06-05:** Billing moves to Stripe")
+        index.add("decision", "* **2025-06-05:** Billing moves to Stripe")
+        assert index.search("stripe", k=1)[0].source == "decision"
+        reloaded = RetrievalIndex(path)
+        reloaded.load([])
+    assert len(index) == 5
+    assert len(reloaded) == 5
+
+
+def test_add_before_load_extends_existing_file_only():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "retrieval.jsonl"
+        RetrievalIndex(path).add("message", "ignored, the build will include it")
+        assert not path.exists()
+        RetrievalIndex(path).load(SEED)
+        RetrievalIndex(path).add("message", "Dropping the mobile app")
+        index = RetrievalIndex(path)
+        index.load([])
+    assert len(index) == 5
+    assert index.search("mobile", k=1)[0].text == "Dropping the mobile app"
+
+
+def test_load_sees_documents_pending_in_group_commit():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "retrieval.jsonl"
+        RetrievalIndex(path).load(SEED)
+        with patch("src.stores.journal.JOURNAL_GROUP_COMMIT_MS", 60_000):
+            RetrievalIndex(path).add("message", "Dropping the mobile app")
+            index = RetrievalIndex(path)
+            index.load([])
+            close_journals()
+    assert len(index) == 5
+    assert index.search("mobile", k=1)[0].text == "Dropping the mobile app"
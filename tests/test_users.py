@@ -0,0 +1,63 @@
+from unittest.mock import MagicMock, patch
+
+from src.utils.users import channel_member_ids, clear_users, get_users, handle_user_change, warm_up_users
+
+
+def _user(uid: str, name: str, **extra) -> dict:
+    return {"id": uid, "name": name.lower(), "real_name": name, "profile": {"title": ""}, **extra}
+
+
+def test_channel_member_ids_follows_cursor():
+    client = MagicMock()
+    client.conversations_members.side_effect = [
+        {"members": ["U1", "U2"], "response_metadata": {"next_cursor": "abc"}},
+        {"members": ["U3"], "response_metadata": {"next_cursor": ""}},
+    ]
+    assert channel_member_ids(client, "C1") == ["U1", "U2", "U3"]
+    assert client.conversations_members.call_args_list[1][1]["cursor"] == "abc"
+
+
+def test_warm_up_users_pages_through_users_list():
+    clear_users()
+    client = MagicMock()
+    client.users_list.side_effect = [
+        {"members": [_user("U1", "Alex")], "response_metadata": {"next_cursor": "next"}},
+        {"members": [_user("U2", "Sarah")], "response_metadata": {"next_cursor": ""}},
+    ]
+    assert warm_up_users(client) == 2
+    users = get_users(client, ["U2", "U1"])
+    assert [u["real_name"] for u in users] == ["Sarah", "Alex"]
+    client.users_info.assert_not_called()
+    clear_users()
+
+
+def test_large_cold_lookup_uses_bulk_listing():
+    clear_users()
+    client = MagicMock()
+    ids = [f"U{i}" for i in range(30)]
+    client.users_list.return_value = {"members": [_user(uid, uid) for uid in ids]}
+    with patch("src.utils.users.BULK_FETCH_THRESHOLD", 5):
+        assert len(get_users(client, ids)) == 30
+    client.users_list.assert_called_once()
+    client.users_info.assert_not_called()
+    clear_users()
+
+
+def test_small_lookup_uses_users_info_and_caches():
+    clear_users()
+    client = MagicMock()
+    client.users_info.return_value = {"user": _user("U1", "Alex")}
+    get_users(client, ["U1"])
+    get_users(client, ["U1"])
+    client.users_info.assert_called_once()
+    client.users_list.assert_not_called()
+    clear_users()
+
+
+def test_user_change_updates_directory():
+    clear_users()
+    client = MagicMock()
+    handle_user_change({"type": "user_change", "user": _user("U1", "Alex", profile={"title": "Backend"})})
+    assert get_users(client, ["U1"])[0]["title"] == "Backend"
+    client.users_info.assert_not_called()
+    clear_users()